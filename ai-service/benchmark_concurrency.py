@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Concurrency Benchmark for the AI Generation Service
+Fires N concurrent /api/ai/generate-content requests against the fake provider
+and compares wall-clock time with a single request.
+
+Usage: python benchmark_concurrency.py [--requests 10] [--latency 1.0]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+from datetime import datetime
+
+# Route every step to the fake provider before the app is imported
+os.environ["AI_MODEL_PRIMARY"] = "fake-model"
+os.environ["AI_MODEL_FALLBACK"] = "fake-model"
+os.environ["AI_MODEL_SUMMARIZATION"] = "fake-model"
+
+import httpx
+
+import main
+from models import GenerationSession
+from services.providers import FakeProvider
+
+AUTH_HEADERS = {"Authorization": "Bearer dev-token"}
+
+class InMemoryDatabase:
+    """Stands in for DatabaseService so the benchmark measures the AI pipeline only"""
+
+    def __init__(self):
+        self.sessions = {}
+
+    async def create_generation_session(
+        self, topic, user_id, options=None, content_type='article', idempotency_key=None, request_fingerprint=None
+    ):
+        session = GenerationSession(
+            id=len(self.sessions) + 1,
+            topic_input=topic,
+            user_id=user_id,
+            session_timestamp=datetime.now(),
+            status="processing"
+        )
+        self.sessions[session.id] = session
+        return session
+
+    async def update_generation_session(self, session_id, status, metadata=None, error_message=None):
+        self.sessions[session_id].status = status
+
+    async def complete_generation_session(self, session_id, content_type, content_data, metadata):
+        self.sessions[session_id].status = "completed"
+        return session_id
+
+    async def save_article_to_cms(self, session_id, article_data, metadata, card_position=None):
+        return session_id
+
+    async def save_recipe_to_cms(self, session_id, recipe_data, metadata):
+        return session_id
+
+    async def insert_generation_events(self, events):
+        pass
+
+    async def record_output_stats(self, model, output_tokens, words):
+        pass
+
+    async def save_checkpoint(self, session_id, step, result):
+        pass
+
+    async def get_checkpoints(self, session_id):
+        return {}
+
+async def generate(client: httpx.AsyncClient, index: int) -> float:
+    start = time.perf_counter()
+    response = await client.post(
+        "/api/ai/generate-content",
+        headers=AUTH_HEADERS,
+        json={"topic": f"Benefits of red lentils #{index}", "content_type": "article"}
+    )
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+async def probe_health(client: httpx.AsyncClient, stop: asyncio.Event) -> float:
+    """Track the slowest /health response while generations are running"""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/health")
+        worst = max(worst, time.perf_counter() - start)
+        await asyncio.sleep(0.05)
+    return worst
+
+async def run_benchmark(requests: int, latency: float):
+    main.db_service = InMemoryDatabase()
+    main.ai_processor.output_stats_store = main.db_service
+    main.ai_processor.checkpoint_store = main.db_service
+    main.analytics_writer.store = main.db_service
+    main.ai_processor.providers["fake"] = FakeProvider(latency_seconds=latency)
+
+    async with httpx.AsyncClient(app=main.app, base_url="http://benchmark", timeout=120) as client:
+        print(f"🧪 Concurrency benchmark: {requests} requests, {latency:.2f}s per model call")
+        print("=" * 60)
+
+        single = await generate(client, 0)
+        print(f"1 request:            {single:.2f}s")
+
+        stop = asyncio.Event()
+        health_task = asyncio.create_task(probe_health(client, stop))
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(generate(client, i) for i in range(1, requests + 1)))
+        concurrent = time.perf_counter() - start
+
+        stop.set()
+        worst_health = await health_task
+
+        print(f"{requests} concurrent requests: {concurrent:.2f}s "
+              f"(slowest request {max(latencies):.2f}s)")
+        print(f"Sequential estimate:  {single * requests:.2f}s")
+        print(f"Slowest /health during run: {worst_health * 1000:.1f}ms")
+        print("=" * 60)
+
+        ratio = concurrent / single
+        if ratio < 2:
+            print(f"✅ {requests} requests finished in {ratio:.2f}x the latency of one request")
+            return True
+
+        print(f"❌ Concurrent run took {ratio:.2f}x the latency of one request")
+        return False
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=10, help="number of concurrent requests")
+    parser.add_argument("--latency", type=float, default=1.0, help="simulated seconds per model call")
+    args = parser.parse_args()
+
+    if not asyncio.run(run_benchmark(args.requests, args.latency)):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Prompt Prefix Cache Benchmark
+Streams content generation requests for different topics through the fake
+provider with simulated prompt processing and prefix caching, and compares
+time to first token for the static-system-prefix layout with the old layout
+(topic first, instructions after it, in one user message).
+
+Providers only cache prefixes of at least 1024 tokens; --min-tokens
+simulates a different minimum.
+
+Usage: python benchmark_prompt_cache.py [--requests 10] [--prefill 0.5] [--min-tokens 1024]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+os.environ["AI_MODEL_PRIMARY"] = "fake-model"
+os.environ["AI_MODEL_FALLBACK"] = "fake-model"
+os.environ["LLM_CACHE_ENABLED"] = "false"
+
+from models import GenerationOptions
+from services.ai_processor import AIProcessor
+from services.providers import FakeProvider
+from services.token_accounting import count_tokens, PROMPT_CACHE_MIN_TOKENS
+
+TOPICS = [
+    "Benefits of red lentils", "Cooking with finger millet", "Black beluga lentils",
+    "Foxtail millet for breakfast", "Sprouting green lentils", "Pearl millet flatbreads",
+    "Lentils for athletes", "Barnyard millet porridge", "Storing dried lentils", "Kodo millet salads"
+]
+
+async def time_to_first_token(processor: AIProcessor, prompt: str, system: str):
+    start = time.perf_counter()
+    first = None
+
+    async def on_token(text: str):
+        nonlocal first
+        if first is None:
+            first = time.perf_counter() - start
+
+    result = await processor._call_model(
+        "fake-model", prompt, system=system, max_tokens=3000, use_cache=False, on_token=on_token
+    )
+    return first, result["cached_tokens"]
+
+async def run_layout(name: str, requests: int, prefill: float, min_tokens: int, static_prefix: bool):
+    processor = AIProcessor()
+    processor.providers["fake"] = FakeProvider(
+        latency_seconds=0.2, prefill_seconds_per_1k_tokens=prefill, min_prefix_tokens=min_tokens
+    )
+    options = GenerationOptions()
+
+    ttfts = []
+    cached = 0
+    for index in range(requests):
+        topic = TOPICS[index % len(TOPICS)]
+        request_part = processor.prompts.get_content_generation_prompt(topic, options)
+        instructions = processor.prompts.get_content_generation_system()
+        if static_prefix:
+            ttft, cached_tokens = await time_to_first_token(processor, request_part, instructions)
+        else:
+            # Old layout: request-specific text ahead of the static instructions
+            ttft, cached_tokens = await time_to_first_token(
+                processor, f"{request_part}\n\n{instructions}", "You are an expert nutrition writer."
+            )
+        ttfts.append(ttft)
+        cached += cached_tokens
+
+    warm = ttfts[1:] or ttfts
+    print(f"{name:<22} first {ttfts[0] * 1000:7.1f}ms   warm avg {sum(warm) / len(warm) * 1000:7.1f}ms   "
+          f"cached tokens {cached}")
+    return sum(warm) / len(warm)
+
+async def run_benchmark(requests: int, prefill: float, min_tokens: int):
+    print(f"🧪 Prompt cache benchmark: {requests} requests, {prefill:.2f}s prefill per 1K uncached tokens")
+    print("=" * 72)
+    old = await run_layout("Variable-first prompt", requests, prefill, min_tokens, static_prefix=False)
+    new = await run_layout("Static system prefix", requests, prefill, min_tokens, static_prefix=True)
+    print("=" * 72)
+
+    prefix_tokens = count_tokens(AIProcessor().prompts.get_content_generation_system(), "fake-model")
+    if prefix_tokens < min_tokens:
+        print(f"⚠️  The static prefix is {prefix_tokens} tokens, below the {min_tokens}-token cache minimum: "
+              f"nothing is cached until it grows (try --min-tokens {prefix_tokens})")
+        return True
+
+    if new < old:
+        print(f"✅ Warm time to first token {old / new:.2f}x faster with the static prefix")
+        return True
+
+    print("❌ Static prefix layout did not reduce time to first token")
+    return False
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=10, help="requests per layout")
+    parser.add_argument("--prefill", type=float, default=0.5, help="simulated seconds per 1K uncached prompt tokens")
+    parser.add_argument(
+        "--min-tokens", type=int, default=PROMPT_CACHE_MIN_TOKENS["fake"],
+        help="shortest system prompt the simulated provider caches"
+    )
+    args = parser.parse_args()
+
+    if not asyncio.run(run_benchmark(args.requests, args.prefill, args.min_tokens)):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main_cli()
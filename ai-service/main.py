@@ -3,12 +3,15 @@ AI Article Generation Service
 FastAPI backend for generating, fact-checking, and formatting articles
 """
 
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, Query, Header
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 import uvicorn
 import os
 import json
+import time
+import asyncio
+from typing import Dict, Any, Optional
 from dotenv import load_dotenv
 from contextlib import asynccontextmanager
 
@@ -16,13 +19,21 @@ from models import (
     ArticleGenerationRequest, 
     ContentGenerationRequest,
     ArticleGenerationResponse,
+    BatchGenerationRequest,
+    GenerationJobResponse,
+    GenerationOptions,
     GenerationSession,
-    HealthCheck
+    HealthCheck,
+    PerformanceAnalytics
 )
 from services.ai_processor import AIProcessor
 from services.database import DatabaseService
+from services.analytics import AnalyticsEventWriter, generation_event
 from services.auth import get_current_user
+from services.jobs import GenerationJobManager, JobQueueFullError
+from services.coalescing import SingleFlight, FlightAbandonedError, request_fingerprint
 from utils.logging import setup_logging
+from utils.sse import format_sse
 
 # Load environment variables
 load_dotenv()
@@ -31,16 +42,22 @@ load_dotenv()
 logger = setup_logging()
 
 # Initialize services
-ai_processor = AIProcessor()
 db_service = DatabaseService()
+ai_processor = AIProcessor(claim_store=db_service, output_stats_store=db_service, checkpoint_store=db_service)
+analytics_writer = AnalyticsEventWriter.from_env(db_service)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan management"""
     logger.info("Starting AI Article Generation Service")
     await db_service.connect()
+    await ai_processor.load_output_stats()
+    await analytics_writer.start()
+    await job_manager.start()
     yield
     logger.info("Shutting down AI Article Generation Service")
+    await job_manager.stop()
+    await analytics_writer.stop()
     await db_service.disconnect()
 
 # Initialize FastAPI app
@@ -69,107 +86,289 @@ async def health_check():
         version="1.0.0"
     )
 
-@app.post("/api/ai/generate-article", response_model=ArticleGenerationResponse)
-async def generate_article(
-    request: ArticleGenerationRequest,
-    background_tasks: BackgroundTasks,
-    current_user: dict = Depends(get_current_user)
+async def run_generation_pipeline(
+    request: ContentGenerationRequest,
+    session_id: int,
+    progress_callback=None,
+    stream_tokens: bool = False,
+    resume: bool = False
 ):
-    """
-    Main endpoint for AI article generation workflow
-    
-    Process:
-    1. Content Generation: Create comprehensive article from topic
-    2. Fact-Checking: Verify claims and add citations
-    3. Summarization: Generate key points and summary
-    4. CMS Formatting: Structure for database
-    5. Session Tracking: Save metadata and results
-    """
-    try:
-        logger.info(f"Starting article generation for topic: {request.topic}")
-        
-        # Create generation session
-        session = await db_service.create_generation_session(
+    """Run the article or recipe pipeline for a request; resume restores checkpointed steps"""
+    if request.content_type == "recipe":
+        return await ai_processor.generate_recipe_pipeline(
             topic=request.topic,
-            user_id=current_user["id"],
-            options=request.options.dict() if request.options else {}
+            session_id=session_id,
+            options=request.options,
+            progress_callback=progress_callback,
+            stream_tokens=stream_tokens,
+            resume=resume
         )
-        
-        # Process article generation pipeline
-        result = await ai_processor.generate_article_pipeline(
-            topic=request.topic,
-            session_id=session.id,
-            options=request.options
+    
+    return await ai_processor.generate_article_pipeline(
+        topic=request.topic,
+        session_id=session_id,
+        options=request.options,
+        progress_callback=progress_callback,
+        stream_tokens=stream_tokens,
+        resume=resume
+    )
+
+async def complete_generation_session(session_id: int, content_type: str, result: Dict[str, Any]):
+    """Record pipeline results on the session and save the draft to the CMS in one transaction"""
+    # Convert Pydantic models to dictionaries
+    content_dict = result["article"].dict() if hasattr(result["article"], 'dict') else result["article"]
+    
+    try:
+        # Recipe data is stored in "article" key for compatibility
+        cms_id = await db_service.complete_generation_session(
+            session_id=session_id,
+            content_type=content_type,
+            content_data=content_dict,
+            metadata=result["metadata"]
         )
+        logger.info(f"{content_type.title()} saved to CMS with ID: {cms_id}")
         
-        # Update session with results
+    except Exception as e:
+        logger.error(f"Failed to save {content_type} to CMS: {str(e)}")
+        # The generation was successful: record it without the CMS draft
         await db_service.update_generation_session(
-            session_id=session.id,
+            session_id=session_id,
             status="completed",
             metadata=result["metadata"]
         )
+
+def generation_response(session_id: int, result: Dict[str, Any]) -> ArticleGenerationResponse:
+    return ArticleGenerationResponse(
+        success=True,
+        session_id=session_id,
+        article=result["article"],
+        metadata=result["metadata"]
+    )
+
+# Identical concurrent generation requests share one in-flight pipeline run
+generation_flights = SingleFlight()
+
+async def run_generation_job(session_id: int, job, report):
+    """Worker entry point for queued generation jobs; job is (request, resume)"""
+    request, resume = job
+    try:
+        result = await run_generation_pipeline(request, session_id, progress_callback=report, resume=resume)
+        await complete_generation_session(session_id, request.content_type, result)
+        generation_flights.resolve_session(session_id, generation_response(session_id, result))
+        track_generation_analytics(session_id, request.content_type, result=result)
         
-        # Save article to CMS
+    except Exception as e:
+        generation_flights.resolve_session(session_id, error=e)
+        track_generation_analytics(session_id, request.content_type, error=e)
+        await db_service.update_generation_session(
+            session_id=session_id,
+            status="failed",
+            error_message=str(e)
+        )
+        raise e
+    
+    except BaseException:
+        # Worker cancelled (shutdown): release requests waiting on this session
+        generation_flights.abandon_session(session_id)
+        raise
+
+job_manager = GenerationJobManager(
+    runner=run_generation_job,
+    workers=int(os.getenv("AI_JOB_WORKERS", 2)),
+    max_queue_size=int(os.getenv("AI_JOB_QUEUE_SIZE", 100))
+)
+
+def job_response(session_id: int, status: str = "queued", headers: Dict[str, str] = None) -> JSONResponse:
+    """202 pointing the client at the session's status and events endpoints"""
+    return JSONResponse(
+        status_code=202,
+        content=GenerationJobResponse(
+            success=True,
+            session_id=session_id,
+            status=status,
+            status_url=f"/api/ai/sessions/{session_id}",
+            events_url=f"/api/ai/sessions/{session_id}/events"
+        ).dict(),
+        headers=headers
+    )
+
+def enqueue_generation_job(session_id: int, request: ContentGenerationRequest, resume: bool = False) -> JSONResponse:
+    """Queue a generation job and return its session id immediately"""
+    job_manager.submit(session_id, (request, resume))
+    return job_response(session_id)
+
+# Streaming generations run detached from the response so a client disconnect
+# does not abandon the session; keep references until they finish
+streaming_tasks = set()
+
+def stream_generation(session_id: int, request: ContentGenerationRequest, resume: bool = False) -> StreamingResponse:
+    """
+    Run the pipeline with token streaming and return a server-sent-events response:
+    session, token (content generation deltas), step, then completed or failed.
+    """
+    events = asyncio.Queue()
+    
+    async def report(event: str, data: Dict[str, Any] = None):
+        await events.put((event, {"session_id": session_id, **(data or {})}))
+    
+    async def run():
         try:
-            # Convert Pydantic models to dictionaries
-            article_dict = result["article"].dict() if hasattr(result["article"], 'dict') else result["article"]
-            metadata_dict = result["metadata"].dict() if hasattr(result["metadata"], 'dict') else result["metadata"]
-            
-            cms_article_id = await db_service.save_article_to_cms(
-                session_id=session.id,
-                article_data=article_dict,
-                metadata=metadata_dict
+            result = await run_generation_pipeline(
+                request,
+                session_id,
+                progress_callback=report,
+                stream_tokens=True,
+                resume=resume
             )
-            logger.info(f"Article saved to CMS with ID: {cms_article_id}")
+            await complete_generation_session(session_id, request.content_type, result)
+            response = generation_response(session_id, result)
+            generation_flights.resolve_session(session_id, response)
+            await events.put(("completed", response.dict()))
+            track_generation_analytics(session_id, request.content_type, result=result)
+            
         except Exception as e:
-            logger.error(f"Failed to save article to CMS: {str(e)}")
-            # Continue execution - the article generation was successful
-        
-        # Schedule background tasks for analytics
-        background_tasks.add_task(
-            track_generation_analytics,
-            session_id=session.id,
-            result=result
-        )
-        
-        logger.info(f"Article generation completed for session: {session.id}")
-        
-        return ArticleGenerationResponse(
-            success=True,
-            session_id=session.id,
-            article=result["article"],
-            metadata=result["metadata"]
-        )
-        
-    except Exception as e:
-        logger.error(f"Article generation failed: {str(e)}")
-        
-        # Update session status to failed
-        if 'session' in locals():
+            generation_flights.resolve_session(session_id, error=e)
+            track_generation_analytics(session_id, request.content_type, error=e)
+            logger.error(f"Streaming generation failed for session {session_id}: {str(e)}")
+            await events.put(("failed", {"session_id": session_id, "error": str(e)}))
             await db_service.update_generation_session(
-                session_id=session.id,
+                session_id=session_id,
                 status="failed",
                 error_message=str(e)
             )
         
+        except BaseException:
+            generation_flights.abandon_session(session_id)
+            raise
+    
+    task = asyncio.create_task(run())
+    streaming_tasks.add(task)
+    task.add_done_callback(streaming_tasks.discard)
+    
+    async def event_stream():
+        yield format_sse("session", {"session_id": session_id})
+        while True:
+            event, data = await events.get()
+            yield format_sse(event, data)
+            if event in ("completed", "failed"):
+                return
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def stream_flight(flight, session_id: int) -> StreamingResponse:
+    """SSE for a request coalesced into another one's generation: session, then the final result"""
+    async def event_stream():
+        yield format_sse("session", {"session_id": session_id})
+        try:
+            response = await flight.wait()
+            yield format_sse("completed", response.dict())
+        except Exception as e:
+            yield format_sse("failed", {"session_id": session_id, "error": str(getattr(e, "detail", e))})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def follow_generation(flight, request: ContentGenerationRequest, mode: str):
+    """Answer a coalesced request from the generation it joined"""
+    try:
+        if mode == "job":
+            return job_response(await flight.wait_started(), status="processing")
+        if mode == "stream":
+            return stream_flight(flight, await flight.wait_started())
+        return await flight.wait()
+        
+    except HTTPException:
+        raise
+    
+    except FlightAbandonedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    except Exception as e:
         raise HTTPException(
             status_code=500,
-            detail=f"Article generation failed: {str(e)}"
+            detail=f"{request.content_type.title()} generation failed: {str(e)}"
         )
 
-@app.post("/api/ai/generate-content", response_model=ArticleGenerationResponse)
-async def generate_content(
+async def replay_idempotent_request(
     request: ContentGenerationRequest,
-    background_tasks: BackgroundTasks,
-    current_user: dict = Depends(get_current_user)
+    idempotency_key: str,
+    fingerprint: str,
+    mode: str,
+    current_user: dict
 ):
     """
-    Unified endpoint for generating both articles and recipes
+    Response for a POST whose Idempotency-Key was seen before, or None to generate.
+    Completed sessions return their stored result, running ones their status (or,
+    in sync mode, the result once it is ready); a failed session releases the key.
+    """
+    session = await db_service.get_session_by_idempotency_key(current_user["id"], idempotency_key)
+    if not session:
+        return None
     
-    Content Types:
-    - article: Educational content with factoids
-    - recipe: Cooking instructions with ingredients
+    if session.get("request_fingerprint") != fingerprint:
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key was already used for a different request"
+        )
+    
+    if session["status"] == "failed":
+        await db_service.release_idempotency_key(session["id"])
+        return None
+    
+    logger.info(f"Replaying session {session['id']} for Idempotency-Key")
+    headers = {"Idempotent-Replayed": "true"}
+    
+    if session["status"] == "completed" and session.get("generated_data"):
+        data = session["generated_data"]
+        if isinstance(data, str):
+            data = json.loads(data)
+        return JSONResponse(
+            content={
+                "success": True,
+                "session_id": session["id"],
+                "article": data.get("article", data.get("recipe")),
+                "metadata": data.get("metadata")
+            },
+            headers=headers
+        )
+    
+    flight = generation_flights.get(session["id"])
+    if flight and mode == "sync":
+        return await follow_generation(flight, request, mode)
+    
+    return job_response(session["id"], status=session["status"], headers=headers)
+
+async def generate(
+    request: ContentGenerationRequest,
+    mode: str,
+    current_user: dict,
+    idempotency_key: str = None
+):
     """
+    Shared generation flow for the article and content endpoints.
+    
+    Concurrent requests with the same normalised user, topic, content type and
+    options share one pipeline run. A retried POST with the same Idempotency-Key
+    gets the original session instead of a new generation.
+    """
+    fingerprint = request_fingerprint(request, current_user["id"])
+    
+    if idempotency_key:
+        replay = await replay_idempotent_request(request, idempotency_key, fingerprint, mode, current_user)
+        if replay is not None:
+            return replay
+    
+    flight, leader = generation_flights.join_or_lead(fingerprint)
+    if not leader:
+        return await follow_generation(flight, request, mode)
+    
     try:
         logger.info(f"Starting {request.content_type} generation for topic: {request.topic}")
         
@@ -178,85 +377,276 @@ async def generate_content(
             topic=request.topic,
             user_id=current_user["id"],
             options=request.options.dict() if request.options else {},
-            content_type=request.content_type
+            content_type=request.content_type,
+            idempotency_key=idempotency_key,
+            request_fingerprint=fingerprint
         )
         
-        # Process generation pipeline
-        if request.content_type == "recipe":
-            result = await ai_processor.generate_recipe_pipeline(
-                topic=request.topic,
-                session_id=session.id,
-                options=request.options
-            )
-        else:  # article
-            result = await ai_processor.generate_article_pipeline(
-                topic=request.topic,
-                session_id=session.id,
-                options=request.options
+        if session is None:
+            # Another worker created a session for this key between the lookup and the insert
+            replay = await replay_idempotent_request(request, idempotency_key, fingerprint, mode, current_user)
+            if replay is None:
+                raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is in progress")
+            generation_flights.resolve(
+                flight,
+                error=HTTPException(status_code=409, detail="A request with this Idempotency-Key is in progress")
             )
-        
-        # Update session with results
-        await db_service.update_generation_session(
-            session_id=session.id,
-            status="completed",
-            metadata=result["metadata"]
+            return replay
+    
+    except HTTPException as e:
+        generation_flights.resolve(flight, error=e)
+        raise
+    
+    except Exception as e:
+        generation_flights.resolve(flight, error=e)
+        logger.error(f"{request.content_type.title()} generation failed: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"{request.content_type.title()} generation failed: {str(e)}"
         )
-        
-        # Save to CMS based on content type
-        try:
-            # Convert Pydantic models to dictionaries
-            article_dict = result["article"].dict() if hasattr(result["article"], 'dict') else result["article"]
-            metadata_dict = result["metadata"].dict() if hasattr(result["metadata"], 'dict') else result["metadata"]
-            
-            if request.content_type == "recipe":
-                cms_id = await db_service.save_recipe_to_cms(
-                    session_id=session.id,
-                    recipe_data=article_dict,  # Recipe data is stored in "article" key for compatibility
-                    metadata=metadata_dict
-                )
-                logger.info(f"Recipe saved to CMS with ID: {cms_id}")
-            else:  # article
-                cms_id = await db_service.save_article_to_cms(
-                    session_id=session.id,
-                    article_data=article_dict,
-                    metadata=metadata_dict
+    
+    except BaseException:
+        # Cancelled (client disconnect, shutdown): followers must not wait forever
+        generation_flights.abandon(flight)
+        raise
+    
+    return await run_session(flight, session.id, request, mode)
+
+async def run_session(
+    flight,
+    session_id: int,
+    request: ContentGenerationRequest,
+    mode: str,
+    resume: bool = False
+):
+    """Lead a session's pipeline run in the requested mode, marking the session failed on error"""
+    generation_flights.started(flight, session_id)
+    
+    try:
+        # Job mode: hand the pipeline to the worker pool and return right away
+        if mode == "job":
+            try:
+                return enqueue_generation_job(session_id, request, resume)
+            except JobQueueFullError as e:
+                await db_service.update_generation_session(
+                    session_id=session_id,
+                    status="failed",
+                    error_message=str(e)
                 )
-                logger.info(f"Article saved to CMS with ID: {cms_id}")
-        except Exception as e:
-            logger.error(f"Failed to save {request.content_type} to CMS: {str(e)}")
-            # Continue execution - the generation was successful
+                raise HTTPException(status_code=503, detail=str(e))
         
-        # Schedule background tasks for analytics
-        background_tasks.add_task(
-            track_generation_analytics,
-            session_id=session.id,
-            result=result
-        )
+        # Stream mode: forward content tokens as they are generated
+        if mode == "stream":
+            return stream_generation(session_id, request, resume)
         
-        logger.info(f"{request.content_type.title()} generation completed for session: {session.id}")
+        # Process generation pipeline
+        result = await run_generation_pipeline(request, session_id, resume=resume)
         
-        return ArticleGenerationResponse(
-            success=True,
-            session_id=session.id,
-            article=result["article"],
-            metadata=result["metadata"]
-        )
+        await complete_generation_session(session_id, request.content_type, result)
         
+        response = generation_response(session_id, result)
+        generation_flights.resolve(flight, response)
+        track_generation_analytics(session_id, request.content_type, result=result)
+        
+        logger.info(f"{request.content_type.title()} generation completed for session: {session_id}")
+        
+        return response
+        
+    except HTTPException as e:
+        generation_flights.resolve(flight, error=e)
+        raise
+    
     except Exception as e:
+        generation_flights.resolve(flight, error=e)
+        track_generation_analytics(session_id, request.content_type, error=e)
         logger.error(f"{request.content_type.title()} generation failed: {str(e)}")
         
         # Update session status to failed
-        if 'session' in locals():
-            await db_service.update_generation_session(
-                session_id=session.id,
-                status="failed",
-                error_message=str(e)
-            )
+        await db_service.update_generation_session(
+            session_id=session_id,
+            status="failed",
+            error_message=str(e)
+        )
         
         raise HTTPException(
             status_code=500,
             detail=f"{request.content_type.title()} generation failed: {str(e)}"
         )
+    
+    except BaseException:
+        # Cancelled (client disconnect, shutdown): followers must not wait forever
+        generation_flights.abandon(flight)
+        raise
+
+@app.post("/api/ai/generate-article", response_model=ArticleGenerationResponse)
+async def generate_article(
+    request: ArticleGenerationRequest,
+    mode: str = Query("sync", pattern="^(sync|job|stream)$"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Main endpoint for AI article generation workflow
+    
+    Process:
+    1. Content Generation: Create comprehensive article from topic
+    2. Fact-Checking: Verify claims and add citations
+    3. Summarization: Generate key points and summary
+    4. CMS Formatting: Structure for database
+    5. Session Tracking: Save metadata and results
+    
+    With mode=job the request returns 202 with the session id and the
+    pipeline runs on the worker pool; follow it via the session endpoints.
+    With mode=stream the response is a server-sent-events stream of the
+    content tokens as they are generated, followed by the final result.
+    Send an Idempotency-Key header to make retries return the original session.
+    """
+    return await generate(
+        ContentGenerationRequest(
+            topic=request.topic,
+            content_type="article",
+            options=request.options
+        ),
+        mode,
+        current_user,
+        idempotency_key
+    )
+
+@app.post("/api/ai/generate-content", response_model=ArticleGenerationResponse)
+async def generate_content(
+    request: ContentGenerationRequest,
+    mode: str = Query("sync", pattern="^(sync|job|stream)$"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Unified endpoint for generating both articles and recipes
+    
+    Content Types:
+    - article: Educational content with factoids
+    - recipe: Cooking instructions with ingredients
+    
+    With mode=job the request returns 202 with the session id and the
+    pipeline runs on the worker pool; follow it via the session endpoints.
+    With mode=stream the response is a server-sent-events stream of the
+    content tokens as they are generated, followed by the final result.
+    Send an Idempotency-Key header to make retries return the original session.
+    """
+    return await generate(request, mode, current_user, idempotency_key)
+
+async def run_batch_item(
+    index: int,
+    session_id: int,
+    request: ContentGenerationRequest,
+    semaphore: asyncio.Semaphore
+) -> Dict[str, Any]:
+    """Generate one batch item; failures are reported in the result instead of raised"""
+    async with semaphore:
+        try:
+            result = await run_generation_pipeline(request, session_id)
+            await complete_generation_session(session_id, request.content_type, result)
+            track_generation_analytics(session_id, request.content_type, result=result)
+            
+            return {
+                "index": index,
+                **ArticleGenerationResponse(
+                    success=True,
+                    session_id=session_id,
+                    article=result["article"],
+                    metadata=result["metadata"]
+                ).dict()
+            }
+            
+        except Exception as e:
+            logger.error(f"Batch item {index} (session {session_id}) failed: {str(e)}")
+            track_generation_analytics(session_id, request.content_type, error=e)
+            try:
+                await db_service.update_generation_session(
+                    session_id=session_id,
+                    status="failed",
+                    error_message=str(e)
+                )
+            except Exception as update_error:
+                logger.error(f"Failed to mark session {session_id} as failed: {str(update_error)}")
+            
+            return {
+                "index": index,
+                "success": False,
+                "session_id": session_id,
+                "error": str(e)
+            }
+
+@app.post("/api/ai/generate-batch")
+async def generate_batch(
+    request: BatchGenerationRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Generate several articles/recipes in one call
+    
+    Sessions for every item are created in a single database round trip, then
+    items run concurrently (capped by max_concurrency, AI_BATCH_MAX_CONCURRENCY
+    by default, and by the per-provider limits). The response is NDJSON: a
+    "sessions" line, one "result" line per item as it finishes (in completion
+    order, with its index), and a final "summary" line. A failed item is
+    reported on its own line and does not stop the rest of the batch.
+    """
+    try:
+        sessions = await db_service.create_generation_sessions(
+            items=[
+                {
+                    "topic": item.topic,
+                    "content_type": item.content_type,
+                    "options": item.options.dict() if item.options else {}
+                }
+                for item in request.items
+            ],
+            user_id=current_user["id"]
+        )
+    except Exception as e:
+        logger.error(f"Batch session creation failed: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Batch generation failed: {str(e)}"
+        )
+    
+    max_concurrency = request.max_concurrency or int(os.getenv("AI_BATCH_MAX_CONCURRENCY", 4))
+    semaphore = asyncio.Semaphore(max_concurrency)
+    start_time = time.time()
+    
+    logger.info(f"Starting batch of {len(sessions)} generations (concurrency {max_concurrency})")
+    
+    # Items run as independent tasks so a client disconnect does not abandon them
+    tasks = [
+        asyncio.create_task(run_batch_item(index, session.id, item, semaphore))
+        for index, (session, item) in enumerate(zip(sessions, request.items))
+    ]
+    
+    async def result_stream():
+        yield json.dumps({
+            "event": "sessions",
+            "session_ids": [session.id for session in sessions]
+        }) + "\n"
+        
+        succeeded = 0
+        for next_done in asyncio.as_completed(tasks):
+            item_result = await next_done
+            succeeded += 1 if item_result["success"] else 0
+            yield json.dumps({"event": "result", **item_result}, default=str) + "\n"
+        
+        yield json.dumps({
+            "event": "summary",
+            "total": len(tasks),
+            "succeeded": succeeded,
+            "failed": len(tasks) - succeeded,
+            "processing_time": round(time.time() - start_time, 3)
+        }) + "\n"
+    
+    return StreamingResponse(
+        result_stream(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.get("/api/ai/sessions/{session_id}")
 async def get_generation_session(
@@ -276,8 +666,16 @@ async def get_generation_session(
                 detail="Generation session not found"
             )
         
+        # Live step progress for jobs running in this process
+        progress = job_manager.get_progress(session_id)
+        if progress:
+            session["progress"] = progress
+        
         return session
         
+    except HTTPException:
+        raise
+    
     except Exception as e:
         logger.error(f"Failed to retrieve session {session_id}: {str(e)}")
         raise HTTPException(
@@ -285,6 +683,107 @@ async def get_generation_session(
             detail="Failed to retrieve generation session"
         )
 
+@app.post("/api/ai/sessions/{session_id}/resume", response_model=ArticleGenerationResponse)
+async def resume_generation_session(
+    session_id: int,
+    mode: str = Query("sync", pattern="^(sync|job|stream)$"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Restart a failed or interrupted session from its last good step
+    
+    Steps checkpointed by the earlier run (content, fact-checked content,
+    summary, ...) are restored instead of being generated again, so a retry
+    only pays for the steps that had not finished. Modes are as for
+    generation; resuming a session that is still running here follows it.
+    """
+    session = await db_service.get_generation_session(
+        session_id=session_id,
+        user_id=current_user["id"]
+    )
+    
+    if not session:
+        raise HTTPException(
+            status_code=404,
+            detail="Generation session not found"
+        )
+    
+    if session["status"] == "completed":
+        raise HTTPException(
+            status_code=409,
+            detail="Generation session is already completed"
+        )
+    
+    options = session.get("generation_options")
+    if isinstance(options, str):
+        options = json.loads(options)
+    request = ContentGenerationRequest(
+        topic=session["topic_input"],
+        content_type=session.get("content_type") or "article",
+        options=GenerationOptions(**options) if options else None
+    )
+    
+    running = generation_flights.get(session_id)
+    if running:
+        return await follow_generation(running, request, mode)
+    
+    flight, leader = generation_flights.join_or_lead(f"resume:{session_id}")
+    if not leader:
+        return await follow_generation(flight, request, mode)
+    
+    logger.info(f"Resuming {request.content_type} generation for session {session_id}")
+    
+    try:
+        await db_service.update_generation_session(session_id=session_id, status="processing")
+    except Exception as e:
+        generation_flights.resolve(flight, error=e)
+        logger.error(f"Failed to resume session {session_id}: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to resume generation session"
+        )
+    
+    except BaseException:
+        generation_flights.abandon(flight)
+        raise
+    
+    return await run_session(flight, session_id, request, mode, resume=True)
+
+@app.get("/api/ai/sessions/{session_id}/events")
+async def stream_generation_session_events(
+    session_id: int,
+    current_user: dict = Depends(get_current_user)
+):
+    """Server-sent events stream of job progress for a session"""
+    session = await db_service.get_generation_session(
+        session_id=session_id,
+        user_id=current_user["id"]
+    )
+    
+    if not session:
+        raise HTTPException(
+            status_code=404,
+            detail="Generation session not found"
+        )
+    
+    async def event_stream():
+        # Sessions not queued in this process only report their stored status
+        if not job_manager.get_progress(session_id):
+            yield format_sse("status", {
+                "session_id": session_id,
+                "status": session["status"]
+            })
+            return
+        
+        async for event in job_manager.subscribe(session_id):
+            yield format_sse(event["event"], event["data"])
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/api/ai/save-draft")
 async def save_as_draft(
     session_id: int,
@@ -374,11 +873,16 @@ async def save_as_draft(
             detail="Failed to save article as draft"
         )
 
-@app.get("/api/ai/analytics/performance")
+@app.get("/api/ai/analytics/performance", response_model=PerformanceAnalytics)
 async def get_performance_analytics(
     current_user: dict = Depends(get_current_user)
 ):
-    """Get AI model performance analytics"""
+    """
+    Get AI model performance analytics
+    
+    Per-model totals, 30-day cost and quality trends, the last 24 hours and
+    the most generated topics, read from rollups kept current as sessions finish.
+    """
     try:
         analytics = await db_service.get_performance_analytics()
         return analytics
@@ -390,15 +894,35 @@ async def get_performance_analytics(
             detail="Failed to retrieve performance analytics"
         )
 
-async def track_generation_analytics(session_id: int, result):
-    """Background task for tracking generation analytics"""
+@app.get("/api/ai/metrics")
+async def get_service_metrics(
+    current_user: dict = Depends(get_current_user)
+):
+    """Runtime metrics for capacity tuning"""
+    return {
+        "database_pool": db_service.get_pool_metrics(),
+        "generation_jobs": job_manager.metrics(),
+        "llm_cache": ai_processor.response_cache.stats() if ai_processor.response_cache else {"enabled": False},
+        "rate_limits": ai_processor.rate_limiter.metrics(),
+        "circuit_breakers": {
+            name: breaker.metrics() for name, breaker in ai_processor.circuit_breakers.items()
+        },
+        "hedging": ai_processor.hedging_metrics(),
+        "output_budget": ai_processor.output_budget.metrics(),
+        "prompt_cache": ai_processor.prompt_cache_metrics(),
+        "coalescing": generation_flights.metrics(),
+        "analytics": analytics_writer.metrics()
+    }
+
+def track_generation_analytics(
+    session_id: int,
+    content_type: str,
+    result: Dict[str, Any] = None,
+    error: Exception = None
+):
+    """Queue a completed or failed generation event; never blocks the request"""
     try:
-        await db_service.track_analytics(
-            session_id=session_id,
-            model_performance=result.metadata,
-            quality_metrics=result.article.get("quality_metrics", {})
-        )
-        logger.info(f"Analytics tracked for session: {session_id}")
+        analytics_writer.record(generation_event(session_id, content_type, result=result, error=error))
         
     except Exception as e:
         logger.error(f"Failed to track analytics for session {session_id}: {str(e)}")
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Database Migrations
+Applies the SQL files in migrations/ that the database has not seen yet.
+Run once per deploy, before starting the workers; workers only check that
+the schema version is current.
+
+Usage: python migrate.py [--status] [--target VERSION]
+"""
+
+import os
+import sys
+import argparse
+
+from dotenv import load_dotenv
+
+from services.migrations import MigrationRunner, MigrationError
+
+load_dotenv()
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--status", action="store_true", help="list applied and pending migrations without applying")
+    parser.add_argument("--target", type=int, default=None, help="apply migrations up to this version only")
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        print("❌ DATABASE_URL is not set")
+        sys.exit(1)
+
+    runner = MigrationRunner(os.getenv("DATABASE_URL"))
+
+    try:
+        if args.status:
+            icons = {"applied": "✅", "pending": "⏳", "changed": "❌", "missing": "❌"}
+            for row in runner.status():
+                applied_at = f"  {row['applied_at']:%Y-%m-%d %H:%M}" if row["applied_at"] else ""
+                print(f"{icons[row['state']]} {row['version']:03d} {row['name']:<40} {row['state']}{applied_at}")
+            return
+
+        applied = runner.migrate(args.target)
+
+    except MigrationError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    if applied:
+        print(f"✅ Applied {len(applied)} migrations: {', '.join(m.path.name for m in applied)}")
+    else:
+        print("✅ Database schema is up to date")
+
+if __name__ == "__main__":
+    main_cli()
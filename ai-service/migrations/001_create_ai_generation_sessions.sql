@@ -0,0 +1,50 @@
+-- =============================================================================
+-- AI GENERATION SESSIONS
+-- Migration: 001_create_ai_generation_sessions.sql
+-- Session tracking table and AI metadata columns on articles and recipes
+-- =============================================================================
+
+-- Every statement is idempotent so databases set up before versioned
+-- migrations existed are recorded at this version without changes
+
+CREATE TABLE IF NOT EXISTS ai_generation_sessions (
+  id SERIAL PRIMARY KEY,
+  topic_input TEXT NOT NULL,
+  user_id INTEGER NOT NULL,
+  content_type VARCHAR(10) DEFAULT 'article', -- 'article' or 'recipe'
+  session_timestamp TIMESTAMP DEFAULT NOW(),
+  status VARCHAR(20) DEFAULT 'processing',
+
+  model_used VARCHAR(50),
+  total_tokens INTEGER,
+  total_cost DECIMAL(8,4),
+  processing_time_seconds INTEGER,
+  quality_score INTEGER,
+
+  generated_data JSONB, -- Store the complete generated content
+  cms_article_id INTEGER,
+  cms_recipe_id INTEGER,
+  error_message TEXT,
+
+  created_at TIMESTAMP DEFAULT NOW(),
+  updated_at TIMESTAMP DEFAULT NOW()
+);
+
+-- =============================================================================
+-- AI METADATA COLUMNS
+-- =============================================================================
+
+ALTER TABLE articles ADD COLUMN IF NOT EXISTS ai_generated BOOLEAN DEFAULT FALSE;
+ALTER TABLE articles ADD COLUMN IF NOT EXISTS generation_prompt TEXT;
+ALTER TABLE articles ADD COLUMN IF NOT EXISTS ai_model_used VARCHAR(50);
+ALTER TABLE articles ADD COLUMN IF NOT EXISTS generation_timestamp TIMESTAMP;
+ALTER TABLE articles ADD COLUMN IF NOT EXISTS fact_check_notes JSONB;
+ALTER TABLE articles ADD COLUMN IF NOT EXISTS ai_quality_score INTEGER;
+ALTER TABLE articles ADD COLUMN IF NOT EXISTS generation_cost DECIMAL(8,4);
+
+ALTER TABLE recipes ADD COLUMN IF NOT EXISTS ai_generated BOOLEAN DEFAULT FALSE;
+ALTER TABLE recipes ADD COLUMN IF NOT EXISTS generation_prompt TEXT;
+ALTER TABLE recipes ADD COLUMN IF NOT EXISTS ai_model_used VARCHAR(50);
+ALTER TABLE recipes ADD COLUMN IF NOT EXISTS generation_timestamp TIMESTAMP;
+ALTER TABLE recipes ADD COLUMN IF NOT EXISTS ai_quality_score INTEGER;
+ALTER TABLE recipes ADD COLUMN IF NOT EXISTS generation_cost DECIMAL(8,4);
@@ -0,0 +1,17 @@
+-- =============================================================================
+-- FACT-CHECK CLAIM CACHE
+-- Migration: 002_create_fact_check_claims.sql
+-- Shared claim -> verification cache for claim-level fact-checking
+-- =============================================================================
+
+CREATE TABLE IF NOT EXISTS ai_fact_check_claims (
+  claim_hash CHAR(64) PRIMARY KEY, -- sha256 of the normalised claim
+  claim_text TEXT NOT NULL,
+  verdict VARCHAR(20) NOT NULL, -- 'supported', 'unsupported' or 'uncertain'
+  citation TEXT,
+  note TEXT,
+  model_used VARCHAR(50),
+  hit_count INTEGER DEFAULT 0,
+  verified_at TIMESTAMP DEFAULT NOW(),
+  last_used_at TIMESTAMP DEFAULT NOW()
+);
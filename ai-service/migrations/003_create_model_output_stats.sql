@@ -0,0 +1,13 @@
+-- =============================================================================
+-- MODEL OUTPUT STATS
+-- Migration: 003_create_model_output_stats.sql
+-- Running output token / word totals per model for adaptive max_tokens
+-- =============================================================================
+
+CREATE TABLE IF NOT EXISTS ai_model_output_stats (
+  model VARCHAR(50) PRIMARY KEY,
+  output_tokens BIGINT NOT NULL DEFAULT 0,
+  words BIGINT NOT NULL DEFAULT 0,
+  samples INTEGER NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP DEFAULT NOW()
+);
@@ -0,0 +1,12 @@
+-- =============================================================================
+-- IDEMPOTENCY KEYS
+-- Migration: 004_add_idempotency_keys.sql
+-- A retried POST with the same Idempotency-Key replays the original session
+-- =============================================================================
+
+ALTER TABLE ai_generation_sessions ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR(255);
+ALTER TABLE ai_generation_sessions ADD COLUMN IF NOT EXISTS request_fingerprint CHAR(64);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ai_generation_sessions_idempotency_key
+ON ai_generation_sessions (user_id, idempotency_key)
+WHERE idempotency_key IS NOT NULL;
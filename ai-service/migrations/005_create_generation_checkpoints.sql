@@ -0,0 +1,16 @@
+-- =============================================================================
+-- GENERATION CHECKPOINTS
+-- Migration: 005_create_generation_checkpoints.sql
+-- Per-step pipeline results so failed or interrupted sessions can resume
+-- =============================================================================
+
+-- Options the session was requested with, so it can be resumed
+ALTER TABLE ai_generation_sessions ADD COLUMN IF NOT EXISTS generation_options JSONB;
+
+CREATE TABLE IF NOT EXISTS ai_generation_checkpoints (
+  session_id INTEGER NOT NULL REFERENCES ai_generation_sessions(id) ON DELETE CASCADE,
+  step VARCHAR(50) NOT NULL,
+  result JSONB NOT NULL, -- Step outputs plus usage (tokens, cost, cache hit)
+  created_at TIMESTAMP DEFAULT NOW(),
+  PRIMARY KEY (session_id, step)
+);
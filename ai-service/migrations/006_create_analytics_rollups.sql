@@ -0,0 +1,95 @@
+-- =============================================================================
+-- ANALYTICS ROLLUPS
+-- Migration: 006_create_analytics_rollups.sql
+-- Hourly and daily generation totals per model and content type, and per-topic
+-- counts, updated as sessions finish so analytics never scan all sessions
+-- =============================================================================
+
+CREATE TABLE IF NOT EXISTS ai_generation_rollups_hourly (
+  bucket TIMESTAMP NOT NULL, -- Start of the hour the session was created in
+  model_used VARCHAR(50) NOT NULL, -- 'unknown' for sessions that failed before a model answered
+  content_type VARCHAR(10) NOT NULL,
+
+  generations INTEGER NOT NULL DEFAULT 0, -- Finished attempts (completed + failed)
+  completed INTEGER NOT NULL DEFAULT 0,
+  failed INTEGER NOT NULL DEFAULT 0,
+  total_cost DECIMAL(12,4) NOT NULL DEFAULT 0,
+  total_tokens BIGINT NOT NULL DEFAULT 0,
+  total_processing_seconds BIGINT NOT NULL DEFAULT 0,
+  quality_sum BIGINT NOT NULL DEFAULT 0,
+  quality_count INTEGER NOT NULL DEFAULT 0,
+
+  updated_at TIMESTAMP DEFAULT NOW(),
+  PRIMARY KEY (bucket, model_used, content_type)
+);
+
+CREATE TABLE IF NOT EXISTS ai_generation_rollups_daily (
+  bucket DATE NOT NULL, -- Day the session was created on
+  model_used VARCHAR(50) NOT NULL,
+  content_type VARCHAR(10) NOT NULL,
+
+  generations INTEGER NOT NULL DEFAULT 0,
+  completed INTEGER NOT NULL DEFAULT 0,
+  failed INTEGER NOT NULL DEFAULT 0,
+  total_cost DECIMAL(12,4) NOT NULL DEFAULT 0,
+  total_tokens BIGINT NOT NULL DEFAULT 0,
+  total_processing_seconds BIGINT NOT NULL DEFAULT 0,
+  quality_sum BIGINT NOT NULL DEFAULT 0,
+  quality_count INTEGER NOT NULL DEFAULT 0,
+
+  updated_at TIMESTAMP DEFAULT NOW(),
+  PRIMARY KEY (bucket, model_used, content_type)
+);
+
+CREATE TABLE IF NOT EXISTS ai_topic_rollups (
+  topic_key TEXT NOT NULL, -- Lower-cased topic without surrounding punctuation
+  content_type VARCHAR(10) NOT NULL,
+  topic TEXT NOT NULL, -- Most recent spelling
+  generations INTEGER NOT NULL DEFAULT 0,
+  completed INTEGER NOT NULL DEFAULT 0,
+  last_generated_at TIMESTAMP,
+  PRIMARY KEY (topic_key, content_type)
+);
+
+CREATE INDEX IF NOT EXISTS idx_ai_topic_rollups_generations ON ai_topic_rollups (generations DESC);
+
+-- =============================================================================
+-- BACKFILL FROM EXISTING SESSIONS
+-- =============================================================================
+
+INSERT INTO ai_generation_rollups_hourly (
+  bucket, model_used, content_type, generations, completed, failed,
+  total_cost, total_tokens, total_processing_seconds, quality_sum, quality_count
+)
+SELECT
+  date_trunc('hour', created_at), COALESCE(model_used, 'unknown'), COALESCE(content_type, 'article'),
+  COUNT(*), COUNT(*) FILTER (WHERE status = 'completed'), COUNT(*) FILTER (WHERE status = 'failed'),
+  COALESCE(SUM(total_cost), 0), COALESCE(SUM(total_tokens), 0), COALESCE(SUM(processing_time_seconds), 0),
+  COALESCE(SUM(quality_score), 0), COUNT(quality_score)
+FROM ai_generation_sessions
+WHERE status IN ('completed', 'failed')
+GROUP BY 1, 2, 3
+ON CONFLICT DO NOTHING;
+
+INSERT INTO ai_generation_rollups_daily (
+  bucket, model_used, content_type, generations, completed, failed,
+  total_cost, total_tokens, total_processing_seconds, quality_sum, quality_count
+)
+SELECT
+  created_at::date, COALESCE(model_used, 'unknown'), COALESCE(content_type, 'article'),
+  COUNT(*), COUNT(*) FILTER (WHERE status = 'completed'), COUNT(*) FILTER (WHERE status = 'failed'),
+  COALESCE(SUM(total_cost), 0), COALESCE(SUM(total_tokens), 0), COALESCE(SUM(processing_time_seconds), 0),
+  COALESCE(SUM(quality_score), 0), COUNT(quality_score)
+FROM ai_generation_sessions
+WHERE status IN ('completed', 'failed')
+GROUP BY 1, 2, 3
+ON CONFLICT DO NOTHING;
+
+INSERT INTO ai_topic_rollups (topic_key, content_type, topic, generations, completed, last_generated_at)
+SELECT
+  lower(regexp_replace(btrim(topic_input, ' .!?'), '\s+', ' ', 'g')), COALESCE(content_type, 'article'),
+  MAX(topic_input), COUNT(*), COUNT(*) FILTER (WHERE status = 'completed'), MAX(created_at)
+FROM ai_generation_sessions
+WHERE status IN ('completed', 'failed')
+GROUP BY 1, 2
+ON CONFLICT DO NOTHING;
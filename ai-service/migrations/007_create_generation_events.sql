@@ -0,0 +1,29 @@
+-- =============================================================================
+-- GENERATION EVENTS
+-- Migration: 007_create_generation_events.sql
+-- Per-generation analytics events, written in batches by the analytics writer
+-- =============================================================================
+
+CREATE TABLE IF NOT EXISTS ai_generation_events (
+  id BIGSERIAL PRIMARY KEY,
+  session_id INTEGER, -- No foreign key: events outlive cleaned-up sessions
+  event_type VARCHAR(20) NOT NULL, -- completed, failed
+  content_type VARCHAR(20),
+  model_used VARCHAR(100),
+  quality_score INTEGER,
+  tokens_used INTEGER,
+  input_tokens INTEGER,
+  output_tokens INTEGER,
+  cached_input_tokens INTEGER,
+  cost_usd DECIMAL(10,6),
+  processing_time_seconds REAL,
+  cache_hits INTEGER,
+  cache_misses INTEGER,
+  retries INTEGER,
+  data JSONB, -- Quality metrics, step timings, failovers, resumed steps or the error
+  occurred_at TIMESTAMP NOT NULL,
+  recorded_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_ai_generation_events_occurred ON ai_generation_events(occurred_at);
+CREATE INDEX IF NOT EXISTS idx_ai_generation_events_session ON ai_generation_events(session_id);
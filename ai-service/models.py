@@ -18,12 +18,22 @@ class GenerationOptions(BaseModel):
     include_factoids: bool = True
     include_seo_meta: bool = True
     brand_voice: str = "authoritative_approachable"
+    bypass_cache: bool = False  # Skip LLM response cache lookups for this request
+    pipelined_fact_check: bool = False  # Fact-check each "## " section while later ones are still generating
+    chunked_fact_check: bool = False  # Fact-check heading-bounded chunks concurrently instead of one prompt
+    claim_fact_check: bool = False  # Verify extracted claims, reusing the shared claim cache
+    filtered_fact_check: bool = False  # Send only claim-bearing sentences (with anchors) to the fact-checker
+    summary_mode: str = Field(default="llm", pattern="^(llm|digest|fast)$")  # digest: summarize a local extract; fast: no model call
 
 class ContentGenerationRequest(BaseModel):
     topic: str = Field(..., min_length=5, max_length=200)
     content_type: str = Field(default="article", pattern="^(article|recipe)$")
     options: Optional[GenerationOptions] = None
 
+class BatchGenerationRequest(BaseModel):
+    items: List[ContentGenerationRequest] = Field(..., min_length=1, max_length=100)
+    max_concurrency: Optional[int] = Field(default=None, ge=1, le=20)
+
 # Keep backward compatibility
 class ArticleGenerationRequest(BaseModel):
     topic: str = Field(..., min_length=5, max_length=200)
@@ -50,10 +60,28 @@ class GeneratedArticle(BaseModel):
 class GenerationMetadata(BaseModel):
     model_used: str
     tokens_used: int
+    input_tokens: int = 0  # Prompt side of tokens_used
+    output_tokens: int = 0  # Completion side of tokens_used
+    cached_input_tokens: int = 0  # Part of input_tokens read from the provider's prompt prefix cache
     processing_time_seconds: float
     cost_usd: float
+    price_table_version: str = ""  # Price table cost_usd was computed with
     quality_score: int = Field(..., ge=0, le=100)
     steps_completed: List[str]
+    cache_hits: int = 0
+    cache_misses: int = 0
+    step_timings: Dict[str, float] = {}  # Seconds per pipeline step
+    critical_path_seconds: float = 0.0  # Longest dependency chain through the step graph
+    retries: int = 0  # Model calls retried after a transient provider error
+    failovers: Dict[str, str] = {}  # Step -> model that served it instead of the first choice
+    hedged_requests: int = 0  # Steps where a duplicate request was raced on the next model
+    hedge_wins: int = 0  # Hedged steps answered first by the duplicate
+    hedge_rate: float = 0.0  # hedged_requests / model-calling steps
+    hedge_win_rate: float = 0.0  # hedge_wins / hedged_requests
+    hedge_extra_cost_usd: float = 0.0  # Estimated cost of the losing duplicates (included in cost_usd)
+    fact_check_claims: int = 0  # Claims checked in claim-level or filtered fact-checking
+    fact_check_claims_cached: int = 0  # ...of which were answered from the claim cache
+    resumed_steps: List[str] = []  # Steps restored from checkpoints instead of run again
     timestamp: datetime
 
 class ArticleGenerationResponse(BaseModel):
@@ -63,6 +91,13 @@ class ArticleGenerationResponse(BaseModel):
     metadata: GenerationMetadata
     error: Optional[str] = None
 
+class GenerationJobResponse(BaseModel):
+    success: bool
+    session_id: int
+    status: str  # queued, or the running session's status for coalesced and replayed requests
+    status_url: str
+    events_url: str
+
 class GenerationSession(BaseModel):
     id: int
     topic_input: str
@@ -92,8 +127,10 @@ class AIModelPerformance(BaseModel):
     last_updated: datetime
 
 class PerformanceAnalytics(BaseModel):
-    total_generations: int
+    total_generations: int  # Finished sessions (completed + failed)
     models: List[AIModelPerformance]
     cost_summary: Dict[str, float]
-    quality_trends: Dict[str, List[float]]
-    popular_topics: List[Dict[str, Any]]
\ No newline at end of file
+    quality_trends: Dict[str, List[Dict[str, Any]]]  # "overall" and per model: date, average_quality; oldest first
+    popular_topics: List[Dict[str, Any]]
+    cost_trends: List[Dict[str, Any]] = []  # Last 30 days: date, generations, daily_cost; newest first
+    last_updated: Optional[datetime] = None
\ No newline at end of file
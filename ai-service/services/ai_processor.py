@@ -4,16 +4,14 @@ Handles the 5-step article generation pipeline
 """
 
 import os
+import re
 import time
 import json
-from typing import Dict, List, Any
+import asyncio
+from typing import Dict, List, Any, Optional, Callable, Awaitable
 from datetime import datetime
 from slugify import slugify
 
-import openai
-from anthropic import Anthropic
-import google.generativeai as genai
-
 from models import (
     GenerationOptions, 
     GeneratedArticle, 
@@ -21,122 +19,249 @@ from models import (
     FactCheckNote
 )
 from services.prompts import PromptTemplates
+from services.llm_cache import LLMResponseCache
+from services.pipeline_graph import PipelineGraph, PipelineStep
+from services.hedging import LatencyTracker, first_successful
+from services.extractive import build_digest, extractive_summary
+from services.claims import (
+    extract_claims,
+    parse_verifications,
+    annotate,
+    splice,
+    annotations_in
+)
+from services.sections import SectionSplitter, SECTION_MARKER, chunk_sections, join_sections, partial_marker
+from services.token_accounting import (
+    PriceTable,
+    PROMPT_CACHE_MIN_TOKENS,
+    count_tokens,
+    count_prompt_tokens,
+    fit_max_tokens
+)
+from services.output_budget import OutputBudget
+from services.rate_limiter import RateLimiter, rate_limit_retry_after
+from services.resilience import (
+    RetryPolicy,
+    CircuitBreaker,
+    CircuitOpenError,
+    StepBudgetExceededError,
+    is_retryable,
+    is_timeout,
+    should_fail_over
+)
+from services.providers import (
+    OpenAIProvider,
+    AnthropicProvider,
+    GeminiProvider,
+    FakeProvider
+)
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# "[[P3]] passage text" lines in a filtered fact-check answer
+PASSAGE_LINE = re.compile(r"^\s*\[\[(P\d+)\]\]\s*(.*)$", re.MULTILINE)
+
+ANTHROPIC_DEFAULT_MODEL = "claude-3-sonnet-20240229"
+ANTHROPIC_FALLBACK_MODEL = "claude-3-haiku-20240307"
+
+# Output sizing: words written per step and fixed token overheads
+DEFAULT_TARGET_WORDS = 1500
+CONTENT_EXTRA_TOKENS = 150  # Title and meta lines around the article body
+FACT_CHECK_NOTES_TOKENS = 400  # FACT-CHECK NOTES appended after the rewritten article
+SUMMARY_WORDS = 350  # Title, summary, key points, tips and meta description
+
 class AIProcessor:
-    def __init__(self):
-        self.openai_client = openai.OpenAI(
-            api_key=os.getenv("OPENAI_API_KEY")
-        )
-        self.anthropic_client = Anthropic(
-            api_key=os.getenv("ANTHROPIC_API_KEY")
-        )
-        
-        # Configure Google Gemini
-        google_api_key = os.getenv("GOOGLE_API_KEY")
-        if google_api_key:
-            genai.configure(api_key=google_api_key)
+    def __init__(self, claim_store=None, output_stats_store=None, checkpoint_store=None):
+        # Async provider clients - every model call is awaited on the event loop
+        self.providers = {
+            "openai": OpenAIProvider(),
+            "anthropic": AnthropicProvider(),
+            "gemini": GeminiProvider(),
+            "fake": FakeProvider()
+        }
         
         self.primary_model = os.getenv("AI_MODEL_PRIMARY", "gpt-4")
         self.fallback_model = os.getenv("AI_MODEL_FALLBACK", "gpt-3.5-turbo")
         self.summarization_model = os.getenv("AI_MODEL_SUMMARIZATION", "gemini-1.5-flash")
+        # Extra models (any provider) tried after AI_MODEL_FALLBACK when a call keeps failing
+        self.failover_models = [
+            model.strip() for model in os.getenv("AI_MODEL_FAILOVER", "").split(",") if model.strip()
+        ]
         self.prompts = PromptTemplates()
+        self.response_cache = LLMResponseCache.from_env()
+        self.rate_limiter = RateLimiter.from_env()
+        self.price_table = PriceTable.from_env()
+        self.prompt_cache_stats = {"requests": 0, "cacheable_requests": 0, "input_tokens": 0, "cached_tokens": 0}
+        
+        # Completion budgets from target lengths and learned tokens-per-word ratios
+        self.output_budget = OutputBudget.from_env()
+        self.output_stats_store = output_stats_store
+        
+        self.retry_policy = RetryPolicy.from_env()
+        self.circuit_breakers = {
+            name: CircuitBreaker(
+                name,
+                failure_threshold=int(os.getenv("AI_CIRCUIT_FAILURE_THRESHOLD", 5)),
+                reset_timeout=float(os.getenv("AI_CIRCUIT_RESET_SECONDS", 30))
+            )
+            for name in self.providers
+        }
+        
+        # Hedging: duplicate a slow call to the next model once it passes its observed percentile
+        self.hedging_enabled = os.getenv("AI_HEDGING_ENABLED", "false").lower() == "true"
+        self.hedge_percentile = float(os.getenv("AI_HEDGE_PERCENTILE", 0.9))
+        self.latency_tracker = LatencyTracker(
+            window=int(os.getenv("AI_HEDGE_WINDOW", 200)),
+            min_samples=int(os.getenv("AI_HEDGE_MIN_SAMPLES", 20))
+        )
+        self.hedge_stats = {"hedged": 0, "hedge_wins": 0, "extra_cost_usd": 0.0}
+        
+        # Shared claim -> verification cache (DatabaseService) for claim-level fact-checking
+        self.claim_store = claim_store
+        self.claim_batch_size = int(os.getenv("AI_CLAIM_BATCH_SIZE", 25))
+        
+        # Upper bound on a chunk sent to the fact-checker in chunked mode
+        self.fact_check_chunk_chars = int(os.getenv("AI_FACT_CHECK_CHUNK_CHARS", 4000))
+        
+        # Size of the extractive digest sent to the summarization model in "digest" mode
+        self.summary_digest_chars = int(os.getenv("AI_SUMMARY_DIGEST_CHARS", 3000))
+        
+        # Per-step results are saved here (DatabaseService) so a session can resume after a failure
+        self.checkpoint_store = checkpoint_store
+        
+        # Latency budget per model-calling step, covering retries and failover. Steps
+        # without one get two attempt timeouts: a timed-out model plus its failover.
+        default_budget = os.getenv("AI_STEP_BUDGET_SECONDS")
+        self.step_budgets = {}
+        for step in ("content_generation", "fact_checking", "summarization"):
+            budget = os.getenv(f"AI_STEP_BUDGET_{step.upper()}_SECONDS", default_budget)
+            if budget:
+                self.step_budgets[step] = float(budget)
+        
+        # Per-provider in-flight call limits, shared by every request in this process
+        default_limit = int(os.getenv("AI_PROVIDER_MAX_CONCURRENCY", 8))
+        self.provider_limits = {
+            name: asyncio.Semaphore(
+                int(os.getenv(f"AI_PROVIDER_MAX_CONCURRENCY_{name.upper()}", default_limit))
+            )
+            for name in self.providers
+        }
         
     async def generate_article_pipeline(
         self, 
         topic: str, 
         session_id: int,
-        options: GenerationOptions = None
+        options: GenerationOptions = None,
+        progress_callback: Callable[[str, Dict[str, Any]], Awaitable[None]] = None,
+        stream_tokens: bool = False,
+        resume: bool = False
     ) -> Dict[str, Any]:
         """
         Main pipeline for article generation
         
-        Steps:
+        Steps (run as a dependency graph):
         1. Content Generation
         2. Fact-Checking
-        3. Summarization
+        3. Summarization          } run concurrently on the
+           Quality Assessment     } fact-checked content
         4. CMS Formatting
-        5. Quality Assessment
+        
+        With options.pipelined_fact_check, steps 1 and 2 overlap: each "## "
+        section is fact-checked while later sections are still generating.
+        
+        Each finished step is checkpointed; with resume=True the steps already
+        checkpointed for session_id are restored instead of run again.
         """
         start_time = time.time()
-        total_tokens = 0
-        total_cost = 0.0
-        steps_completed = []
+        use_cache = not (options and options.bypass_cache)
+        on_token = self._token_forwarder(progress_callback, "content_generation") if stream_tokens else None
+        chunked = bool(options and options.chunked_fact_check)
+        claim_level = bool(options and options.claim_fact_check)
+        filtered = bool(options and options.filtered_fact_check)
+        summary_mode = options.summary_mode if options else "llm"
         
-        try:
-            logger.info(f"Starting article generation pipeline for session {session_id}")
-            
-            # Step 1: Content Generation
-            logger.info("Step 1: Generating article content")
-            content_result = await self._generate_content(topic, options)
-            total_tokens += content_result["tokens_used"]
-            total_cost += content_result["cost"]
-            steps_completed.append("content_generation")
-            
-            raw_content = content_result["content"]
-            
-            # Step 2: Fact-Checking
-            logger.info("Step 2: Fact-checking content")
-            factcheck_result = await self._fact_check_content(raw_content, topic)
-            total_tokens += factcheck_result["tokens_used"]
-            total_cost += factcheck_result["cost"]
-            steps_completed.append("fact_checking")
-            
-            enhanced_content = factcheck_result["enhanced_content"]
-            fact_check_notes = factcheck_result["fact_check_notes"]
-            
-            # Step 3: Summarization
-            logger.info("Step 3: Creating summary and key points")
-            summary_result = await self._create_summary(enhanced_content, topic)
-            total_tokens += summary_result["tokens_used"]
-            total_cost += summary_result["cost"]
-            steps_completed.append("summarization")
-            
-            # Step 4: CMS Formatting
-            logger.info("Step 4: Formatting for CMS")
+        async def content_generation(topic, options):
+            result = await self._generate_content(topic, options, use_cache=use_cache, on_token=on_token)
+            return {**result, "raw_content": result["content"]}
+        
+        async def fact_checking(raw_content, topic):
+            return await self._fact_check_content(
+                raw_content,
+                topic,
+                use_cache=use_cache,
+                chunked=chunked,
+                claim_level=claim_level,
+                filtered=filtered
+            )
+        
+        async def summarization(enhanced_content, topic):
+            result = await self._create_summary(enhanced_content, topic, use_cache=use_cache, mode=summary_mode)
+            return {**result, "summary_data": result}
+        
+        async def quality_assessment(enhanced_content, options):
+            # Articles are stored with the fact-checked content unchanged
+            quality_score = await self._assess_quality({"content": enhanced_content}, options)
+            return {"quality_score": quality_score}
+        
+        async def cms_formatting(enhanced_content, summary_data, topic, options):
             formatted_result = await self._format_for_cms(
                 content=enhanced_content,
-                summary_data=summary_result,
+                summary_data=summary_data,
                 topic=topic,
                 options=options
             )
-            steps_completed.append("cms_formatting")
-            
-            # Step 5: Quality Assessment
-            logger.info("Step 5: Assessing content quality")
-            quality_score = await self._assess_quality(
-                formatted_result["article"],
-                options
+            return {"formatted": formatted_result["article"]}
+        
+        async def content_generation_fact_checking(topic, options):
+            return await self._generate_and_fact_check_pipelined(
+                self._generate_content, topic, options, use_cache=use_cache, on_token=on_token
             )
-            steps_completed.append("quality_assessment")
+        
+        if options and options.pipelined_fact_check:
+            head = [
+                PipelineStep(
+                    "content_generation_fact_checking", content_generation_fact_checking,
+                    ["topic", "options"], ["raw_content", "enhanced_content", "fact_check_notes"]
+                )
+            ]
+        else:
+            head = [
+                PipelineStep("content_generation", content_generation, ["topic", "options"], ["raw_content"]),
+                PipelineStep("fact_checking", fact_checking, ["raw_content", "topic"], ["enhanced_content", "fact_check_notes"])
+            ]
+        
+        graph = PipelineGraph(head + [
+            PipelineStep("summarization", summarization, ["enhanced_content", "topic"], ["summary_data"]),
+            PipelineStep("quality_assessment", quality_assessment, ["enhanced_content", "options"], ["quality_score"]),
+            PipelineStep("cms_formatting", cms_formatting, ["enhanced_content", "summary_data", "topic", "options"], ["formatted"])
+        ])
+        
+        try:
+            logger.info(f"Starting article generation pipeline for session {session_id}")
+            
+            run = await self._run_pipeline_graph(graph, topic, options, progress_callback, session_id, resume)
+            state = run["state"]
+            formatted = state["formatted"]
+            quality_score = state["quality_score"]
             
             processing_time = time.time() - start_time
             
             # Create final result
             article = GeneratedArticle(
-                title=formatted_result["article"]["title"],
-                slug=formatted_result["article"]["slug"],
-                content=formatted_result["article"]["content"],
-                excerpt=formatted_result["article"]["excerpt"],
-                summary=formatted_result["article"]["summary"],
-                key_points=formatted_result["article"]["key_points"],
-                meta_title=formatted_result["article"]["meta_title"],
-                meta_description=formatted_result["article"]["meta_description"],
-                fact_check_notes=fact_check_notes,
+                title=formatted["title"],
+                slug=formatted["slug"],
+                content=formatted["content"],
+                excerpt=formatted["excerpt"],
+                summary=formatted["summary"],
+                key_points=formatted["key_points"],
+                meta_title=formatted["meta_title"],
+                meta_description=formatted["meta_description"],
+                fact_check_notes=state["fact_check_notes"],
                 quality_metrics=quality_score
             )
             
-            metadata = GenerationMetadata(
-                model_used=self.primary_model,
-                tokens_used=total_tokens,
-                processing_time_seconds=processing_time,
-                cost_usd=total_cost,
-                quality_score=int(quality_score.get("overall_score", 85)),
-                steps_completed=steps_completed,
-                timestamp=datetime.now()
-            )
+            metadata = self._build_metadata(run, quality_score, processing_time)
             
             logger.info(f"Article generation completed successfully for session {session_id}")
             
@@ -153,101 +278,125 @@ class AIProcessor:
         self, 
         topic: str, 
         session_id: int,
-        options: GenerationOptions = None
+        options: GenerationOptions = None,
+        progress_callback: Callable[[str, Dict[str, Any]], Awaitable[None]] = None,
+        stream_tokens: bool = False,
+        resume: bool = False
     ) -> Dict[str, Any]:
         """
         Recipe generation pipeline
         
-        Steps:
+        Steps (run as a dependency graph):
         1. Recipe Generation
         2. Fact-Checking
-        3. Summarization (using Gemini)
+        3. Summarization (using Gemini)  } run concurrently on the
+           Recipe Parsing                } fact-checked content
+           Quality Assessment            }
         4. CMS Formatting
-        5. Quality Assessment
+        
+        With options.pipelined_fact_check, steps 1 and 2 overlap per "## " section.
+        Steps are checkpointed and restored on resume as for articles.
         """
         start_time = time.time()
-        total_tokens = 0
-        total_cost = 0.0
-        steps_completed = []
+        use_cache = not (options and options.bypass_cache)
+        on_token = self._token_forwarder(progress_callback, "recipe_generation") if stream_tokens else None
+        chunked = bool(options and options.chunked_fact_check)
+        claim_level = bool(options and options.claim_fact_check)
+        filtered = bool(options and options.filtered_fact_check)
+        summary_mode = options.summary_mode if options else "llm"
         
-        try:
-            logger.info(f"Starting recipe generation pipeline for session {session_id}")
-            
-            # Step 1: Recipe Generation
-            logger.info("Step 1: Generating recipe content")
-            content_result = await self._generate_recipe_content(topic, options)
-            total_tokens += content_result["tokens_used"]
-            total_cost += content_result["cost"]
-            steps_completed.append("recipe_generation")
-            
-            raw_content = content_result["content"]
-            
-            # Step 2: Fact-Checking (nutritional information)
-            logger.info("Step 2: Fact-checking nutritional content")
-            factcheck_result = await self._fact_check_content(raw_content, topic)
-            total_tokens += factcheck_result["tokens_used"]
-            total_cost += factcheck_result["cost"]
-            steps_completed.append("fact_checking")
-            
-            enhanced_content = factcheck_result["enhanced_content"]
-            fact_check_notes = factcheck_result["fact_check_notes"]
-            
-            # Step 3: Summarization (using Gemini)
-            logger.info("Step 3: Creating recipe summary using Gemini")
-            summary_result = await self._create_summary(enhanced_content, topic)
-            total_tokens += summary_result["tokens_used"]
-            total_cost += summary_result["cost"]
-            steps_completed.append("summarization")
-            
-            # Step 4: Recipe CMS Formatting
-            logger.info("Step 4: Formatting recipe for CMS")
+        async def recipe_generation(topic, options):
+            result = await self._generate_recipe_content(topic, options, use_cache=use_cache, on_token=on_token)
+            return {**result, "raw_content": result["content"]}
+        
+        async def fact_checking(raw_content, topic):
+            # Fact-checking nutritional information
+            return await self._fact_check_content(
+                raw_content,
+                topic,
+                use_cache=use_cache,
+                chunked=chunked,
+                claim_level=claim_level,
+                filtered=filtered
+            )
+        
+        async def summarization(enhanced_content, topic):
+            result = await self._create_summary(enhanced_content, topic, use_cache=use_cache, mode=summary_mode)
+            return {**result, "summary_data": result}
+        
+        async def recipe_parsing(enhanced_content, topic):
+            return {"recipe_data": self._parse_recipe_content(enhanced_content, topic)}
+        
+        async def quality_assessment(enhanced_content, options):
+            quality_score = await self._assess_quality({"content": enhanced_content}, options)
+            return {"quality_score": quality_score}
+        
+        async def cms_formatting(recipe_data, summary_data, topic, options):
             formatted_result = await self._format_recipe_for_cms(
-                content=enhanced_content,
-                summary_data=summary_result,
+                recipe_data=recipe_data,
+                summary_data=summary_data,
                 topic=topic,
                 options=options
             )
-            steps_completed.append("cms_formatting")
-            
-            # Step 5: Quality Assessment
-            logger.info("Step 5: Assessing recipe quality")
-            quality_score = await self._assess_quality(
-                formatted_result["recipe"],
-                options
+            return {"formatted": formatted_result["recipe"]}
+        
+        async def recipe_generation_fact_checking(topic, options):
+            return await self._generate_and_fact_check_pipelined(
+                self._generate_recipe_content, topic, options, use_cache=use_cache, on_token=on_token
             )
-            steps_completed.append("quality_assessment")
+        
+        if options and options.pipelined_fact_check:
+            head = [
+                PipelineStep(
+                    "recipe_generation_fact_checking", recipe_generation_fact_checking,
+                    ["topic", "options"], ["raw_content", "enhanced_content", "fact_check_notes"]
+                )
+            ]
+        else:
+            head = [
+                PipelineStep("recipe_generation", recipe_generation, ["topic", "options"], ["raw_content"]),
+                PipelineStep("fact_checking", fact_checking, ["raw_content", "topic"], ["enhanced_content", "fact_check_notes"])
+            ]
+        
+        graph = PipelineGraph(head + [
+            PipelineStep("summarization", summarization, ["enhanced_content", "topic"], ["summary_data"]),
+            PipelineStep("recipe_parsing", recipe_parsing, ["enhanced_content", "topic"], ["recipe_data"]),
+            PipelineStep("quality_assessment", quality_assessment, ["enhanced_content", "options"], ["quality_score"]),
+            PipelineStep("cms_formatting", cms_formatting, ["recipe_data", "summary_data", "topic", "options"], ["formatted"])
+        ])
+        
+        try:
+            logger.info(f"Starting recipe generation pipeline for session {session_id}")
+            
+            run = await self._run_pipeline_graph(graph, topic, options, progress_callback, session_id, resume)
+            state = run["state"]
+            formatted = state["formatted"]
+            summary_data = state["summary_data"]
+            quality_score = state["quality_score"]
             
             processing_time = time.time() - start_time
             
             # Create final result
             recipe = GeneratedArticle(  # Reuse model structure
-                title=formatted_result["recipe"]["title"],
-                slug=formatted_result["recipe"]["slug"],
-                content=formatted_result["recipe"]["description"],
-                excerpt=formatted_result["recipe"]["description"][:200],
-                summary=summary_result.get("summary", ""),
-                key_points=summary_result.get("key_points", []),
-                meta_title=formatted_result["recipe"]["meta_title"],
-                meta_description=formatted_result["recipe"]["meta_description"],
-                fact_check_notes=fact_check_notes,
+                title=formatted["title"],
+                slug=formatted["slug"],
+                content=formatted["description"],
+                excerpt=formatted["description"][:200],
+                summary=summary_data.get("summary", ""),
+                key_points=summary_data.get("key_points", []),
+                meta_title=formatted["meta_title"],
+                meta_description=formatted["meta_description"],
+                fact_check_notes=state["fact_check_notes"],
                 quality_metrics=quality_score
             )
             
-            metadata = GenerationMetadata(
-                model_used=self.primary_model,
-                tokens_used=total_tokens,
-                processing_time_seconds=processing_time,
-                cost_usd=total_cost,
-                quality_score=int(quality_score.get("overall_score", 85)),
-                steps_completed=steps_completed,
-                timestamp=datetime.now()
-            )
+            metadata = self._build_metadata(run, quality_score, processing_time)
             
             logger.info(f"Recipe generation completed successfully for session {session_id}")
             
             return {
                 "article": recipe,  # Using same structure for compatibility
-                "recipe_data": formatted_result["recipe"],  # Full recipe data
+                "recipe_data": formatted,  # Full recipe data
                 "metadata": metadata
             }
             
@@ -255,251 +404,1102 @@ class AIProcessor:
             logger.error(f"Recipe generation pipeline failed for session {session_id}: {str(e)}")
             raise e
     
-    async def _generate_content(self, topic: str, options: GenerationOptions) -> Dict[str, Any]:
+    async def _run_pipeline_graph(
+        self,
+        graph: PipelineGraph,
+        topic: str,
+        options: GenerationOptions,
+        progress_callback,
+        session_id: int = None,
+        resume: bool = False
+    ) -> Dict[str, Any]:
+        """Run a pipeline graph, checkpointing and reporting each finished step and tallying usage"""
+        steps_completed = []
+        completed = await self._load_checkpoints(session_id) if resume else {}
+        
+        async def on_step_complete(step: str, result: Dict[str, Any]):
+            logger.info(f"Pipeline step completed: {step}")
+            steps_completed.append(step)
+            await self._save_checkpoint(session_id, step, result)
+            await self._report_step(progress_callback, step)
+        
+        run = await graph.run(
+            {"topic": topic, "options": options},
+            on_step_complete=on_step_complete,
+            completed=completed
+        )
+        if run["restored"]:
+            logger.info(f"Session {session_id} resumed after checkpointed steps: {', '.join(run['restored'])}")
+        
+        total_tokens = 0
+        token_split = {"input": 0, "output": 0, "cached": 0}
+        total_cost = 0.0
+        cache_stats = {"hits": 0, "misses": 0}
+        retries = 0
+        failovers = {}
+        hedge_stats = {"model_steps": 0, "hedged": 0, "wins": 0, "extra_cost": 0.0}
+        claim_stats = {"total": 0, "cached": 0}
+        for step, result in run["results"].items():
+            if "tokens_used" not in result:
+                continue  # Local step, no model call
+            claim_stats["total"] += result.get("claims_total", 0)
+            claim_stats["cached"] += result.get("claims_cached", 0)
+            total_tokens += result["tokens_used"]
+            token_split["input"] += result.get("input_tokens", 0)
+            token_split["output"] += result.get("output_tokens", 0)
+            token_split["cached"] += result.get("cached_tokens", 0)
+            total_cost += result["cost"]
+            self._count_cache_result(cache_stats, result)
+            retries += result.get("retries", 0)
+            if result.get("failover_model"):
+                failovers[step] = result["failover_model"]
+            
+            hedge_stats["model_steps"] += 1
+            if result.get("hedged"):
+                hedge_stats["hedged"] += 1
+                hedge_stats["wins"] += 1 if result["hedge_won"] else 0
+                hedge_stats["extra_cost"] += result["hedge_extra_cost"]
+        
+        # Duplicate hedge requests are billed too
+        total_cost += hedge_stats["extra_cost"]
+        
+        return {
+            **run,
+            "steps_completed": run["restored"] + steps_completed,
+            "total_tokens": total_tokens,
+            "token_split": token_split,
+            "total_cost": total_cost,
+            "cache_stats": cache_stats,
+            "retries": retries,
+            "failovers": failovers,
+            "hedge_stats": hedge_stats,
+            "claim_stats": claim_stats
+        }
+    
+    def _build_metadata(
+        self,
+        run: Dict[str, Any],
+        quality_score: Dict[str, float],
+        processing_time: float
+    ) -> GenerationMetadata:
+        """Generation metadata from a finished pipeline graph run"""
+        hedge_stats = run["hedge_stats"]
+        return GenerationMetadata(
+            model_used=self.primary_model,
+            tokens_used=run["total_tokens"],
+            input_tokens=run["token_split"]["input"],
+            output_tokens=run["token_split"]["output"],
+            cached_input_tokens=run["token_split"]["cached"],
+            processing_time_seconds=processing_time,
+            cost_usd=run["total_cost"],
+            price_table_version=self.price_table.version,
+            quality_score=int(quality_score.get("overall_score", 85)),
+            steps_completed=run["steps_completed"],
+            cache_hits=run["cache_stats"]["hits"],
+            cache_misses=run["cache_stats"]["misses"],
+            step_timings=run["timings"],
+            critical_path_seconds=run["critical_path_seconds"],
+            retries=run["retries"],
+            failovers=run["failovers"],
+            hedged_requests=hedge_stats["hedged"],
+            hedge_wins=hedge_stats["wins"],
+            hedge_rate=round(hedge_stats["hedged"] / hedge_stats["model_steps"], 3) if hedge_stats["model_steps"] else 0.0,
+            hedge_win_rate=round(hedge_stats["wins"] / hedge_stats["hedged"], 3) if hedge_stats["hedged"] else 0.0,
+            hedge_extra_cost_usd=round(hedge_stats["extra_cost"], 6),
+            fact_check_claims=run["claim_stats"]["total"],
+            fact_check_claims_cached=run["claim_stats"]["cached"],
+            resumed_steps=run["restored"],
+            timestamp=datetime.now()
+        )
+    
+    async def _save_checkpoint(self, session_id: int, step: str, result: Dict[str, Any]):
+        """Persist a finished step's outputs and usage; a failed write only costs resumability"""
+        if not self.checkpoint_store or session_id is None:
+            return
+        # "content" repeats raw_content / the model text, which restores do not need
+        checkpoint = {key: value for key, value in result.items() if key != "content"}
+        try:
+            await self.checkpoint_store.save_checkpoint(session_id, step, checkpoint)
+        except Exception as e:
+            logger.warning(f"Could not checkpoint step {step} of session {session_id}: {str(e)}")
+    
+    async def _load_checkpoints(self, session_id: int) -> Dict[str, Dict[str, Any]]:
+        """Step results saved by earlier runs of a session"""
+        if not self.checkpoint_store or session_id is None:
+            return {}
+        try:
+            return await self.checkpoint_store.get_checkpoints(session_id)
+        except Exception as e:
+            logger.warning(f"Could not load checkpoints for session {session_id}, running every step: {str(e)}")
+            return {}
+    
+    async def _report_step(self, progress_callback, step: str):
+        """Notify a job/stream listener that a pipeline step finished"""
+        if progress_callback:
+            await progress_callback("step", {"step": step})
+    
+    def _token_forwarder(self, progress_callback, step: str):
+        """on_token callback publishing streamed text as 'token' progress events"""
+        if not progress_callback:
+            return None
+        
+        async def on_token(text: str):
+            await progress_callback("token", {"step": step, "text": text})
+        
+        return on_token
+    
+    async def _generate_content(
+        self,
+        topic: str,
+        options: GenerationOptions,
+        use_cache: bool = True,
+        on_token: Callable[[str], Awaitable[None]] = None
+    ) -> Dict[str, Any]:
         """Step 1: Generate comprehensive article content"""
         try:
             prompt = self.prompts.get_content_generation_prompt(topic, options)
-            
-            if self.primary_model.startswith("gpt"):
-                response = self.openai_client.chat.completions.create(
-                    model=self.primary_model,
-                    messages=[
-                        {"role": "system", "content": "You are an expert nutrition writer."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=3000,
-                    temperature=0.7
-                )
-                
-                content = response.choices[0].message.content
-                tokens_used = response.usage.total_tokens
-                cost = self._calculate_openai_cost(tokens_used, self.primary_model)
-                
-            else:  # Anthropic Claude
-                message = self.anthropic_client.messages.create(
-                    model="claude-3-sonnet-20240229",
-                    max_tokens=3000,
-                    temperature=0.7,
-                    messages=[
-                        {"role": "user", "content": prompt}
-                    ]
-                )
-                
-                content = message.content[0].text
-                tokens_used = message.usage.input_tokens + message.usage.output_tokens
-                cost = self._calculate_anthropic_cost(tokens_used)
+            target_words = options.target_length if options else DEFAULT_TARGET_WORDS
+            
+            result = await self._call_with_failover(
+                "content_generation",
+                self._failover_chain(self.primary_model),
+                prompt,
+                system=self.prompts.get_content_generation_system(),
+                max_tokens=self.output_budget.max_tokens(self.primary_model, target_words, CONTENT_EXTRA_TOKENS),
+                temperature=0.7,
+                use_cache=use_cache,
+                on_token=on_token,
+                stop_after_words=self.output_budget.stop_words(target_words)
+            )
+            await self._learn_output_ratio(result)
             
             return {
-                "content": content,
-                "tokens_used": tokens_used,
-                "cost": cost
+                "content": result["content"],
+                **self._call_stats(result)
             }
             
         except Exception as e:
             logger.error(f"Content generation failed: {str(e)}")
             raise e
     
-    async def _generate_recipe_content(self, topic: str, options: GenerationOptions) -> Dict[str, Any]:
+    async def _generate_recipe_content(
+        self,
+        topic: str,
+        options: GenerationOptions,
+        use_cache: bool = True,
+        on_token: Callable[[str], Awaitable[None]] = None
+    ) -> Dict[str, Any]:
         """Step 1: Generate comprehensive recipe content"""
         try:
             prompt = self.prompts.get_recipe_generation_prompt(topic, options)
-            
-            if self.primary_model.startswith("gpt"):
-                response = self.openai_client.chat.completions.create(
-                    model=self.primary_model,
-                    messages=[
-                        {"role": "system", "content": "You are a professional chef and nutrition expert specializing in plant-based cooking."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=3000,
-                    temperature=0.7
-                )
-                
-                content = response.choices[0].message.content
-                tokens_used = response.usage.total_tokens
-                cost = self._calculate_openai_cost(tokens_used, self.primary_model)
-                
-            else:  # Anthropic Claude
-                message = self.anthropic_client.messages.create(
-                    model="claude-3-sonnet-20240229",
-                    max_tokens=3000,
-                    temperature=0.7,
-                    messages=[
-                        {"role": "user", "content": prompt}
-                    ]
-                )
-                
-                content = message.content[0].text
-                tokens_used = message.usage.input_tokens + message.usage.output_tokens
-                cost = self._calculate_anthropic_cost(tokens_used)
+            target_words = options.target_length if options else DEFAULT_TARGET_WORDS
+            
+            result = await self._call_with_failover(
+                "content_generation",
+                self._failover_chain(self.primary_model),
+                prompt,
+                system=self.prompts.get_recipe_generation_system(),
+                max_tokens=self.output_budget.max_tokens(self.primary_model, target_words, CONTENT_EXTRA_TOKENS),
+                temperature=0.7,
+                use_cache=use_cache,
+                on_token=on_token,
+                stop_after_words=self.output_budget.stop_words(target_words)
+            )
+            await self._learn_output_ratio(result)
             
             return {
-                "content": content,
-                "tokens_used": tokens_used,
-                "cost": cost
+                "content": result["content"],
+                **self._call_stats(result)
             }
             
         except Exception as e:
             logger.error(f"Recipe generation failed: {str(e)}")
             raise e
     
-    async def _fact_check_content(self, content: str, topic: str) -> Dict[str, Any]:
+    async def _fact_check_content(
+        self,
+        content: str,
+        topic: str,
+        use_cache: bool = True,
+        chunked: bool = False,
+        claim_level: bool = False,
+        filtered: bool = False
+    ) -> Dict[str, Any]:
         """Step 2: Fact-check content and add citations"""
         try:
+            if claim_level:
+                return await self._fact_check_claims(content, topic, use_cache=use_cache)
+            if filtered:
+                return await self._fact_check_filtered(content, topic, use_cache=use_cache)
+            if chunked:
+                return await self._fact_check_chunked(content, topic, use_cache=use_cache)
+            
             prompt = self.prompts.get_fact_checking_prompt(content, topic)
             
-            if self.primary_model.startswith("gpt"):
-                response = self.openai_client.chat.completions.create(
-                    model=self.primary_model,
-                    messages=[
-                        {"role": "system", "content": "You are a fact-checking expert with access to scientific literature."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=2000,
-                    temperature=0.3
-                )
-                
-                result = response.choices[0].message.content
-                tokens_used = response.usage.total_tokens
-                cost = self._calculate_openai_cost(tokens_used, self.primary_model)
-                
-            else:  # Anthropic Claude
-                message = self.anthropic_client.messages.create(
-                    model="claude-3-sonnet-20240229",
-                    max_tokens=2000,
-                    temperature=0.3,
-                    messages=[
-                        {"role": "user", "content": prompt}
-                    ]
-                )
-                
-                result = message.content[0].text
-                tokens_used = message.usage.input_tokens + message.usage.output_tokens
-                cost = self._calculate_anthropic_cost(tokens_used)
+            result = await self._call_with_failover(
+                "fact_checking",
+                self._failover_chain(self.primary_model),
+                prompt,
+                system=self.prompts.get_fact_checking_system(),
+                max_tokens=self.output_budget.max_tokens(
+                    self.primary_model, len(content.split()), FACT_CHECK_NOTES_TOKENS
+                ),
+                temperature=0.3,
+                use_cache=use_cache
+            )
             
             # Parse fact-checking result
-            enhanced_content, fact_check_notes = self._parse_fact_check_result(result)
+            enhanced_content, fact_check_notes = self._parse_fact_check_result(result["content"])
             
             return {
                 "enhanced_content": enhanced_content,
                 "fact_check_notes": fact_check_notes,
-                "tokens_used": tokens_used,
-                "cost": cost
+                **self._call_stats(result)
             }
             
         except Exception as e:
             logger.error(f"Fact-checking failed: {str(e)}")
             raise e
     
-    async def _create_summary(self, content: str, topic: str) -> Dict[str, Any]:
-        """Step 3: Create summary and key points using Gemini"""
+    async def _fact_check_section(self, section: str, topic: str, use_cache: bool = True) -> Dict[str, Any]:
+        """Fact-check one "## " section of a longer text"""
+        prompt = self.prompts.get_section_fact_checking_prompt(section, topic)
+        
+        result = await self._call_with_failover(
+            "fact_checking",
+            self._failover_chain(self.primary_model),
+            prompt,
+            system=self.prompts.get_section_fact_checking_system(),
+            max_tokens=max(500, min(2000, len(section) // 2)),
+            temperature=0.3,
+            use_cache=use_cache
+        )
+        
+        enhanced_content, fact_check_notes = self._parse_fact_check_result(result["content"])
+        
+        return {
+            "enhanced_content": enhanced_content,
+            "fact_check_notes": fact_check_notes,
+            **self._call_stats(result)
+        }
+    
+    async def _generate_and_fact_check_pipelined(
+        self,
+        generate: Callable[..., Awaitable[Dict[str, Any]]],
+        topic: str,
+        options: GenerationOptions,
+        use_cache: bool = True,
+        on_token: Callable[[str], Awaitable[None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Steps 1+2 overlapped: stream the generation, send each "## " section to
+        fact-checking as soon as the next heading arrives, and reassemble the
+        checked sections in their original order.
+        """
+        splitter = SectionSplitter()
+        checks = []
+        
+        def check(sections: List[str]):
+            for section in sections:
+                checks.append(asyncio.create_task(self._fact_check_section(section, topic, use_cache)))
+        
+        async def on_delta(text: str):
+            if on_token:
+                await on_token(text)
+            check(splitter.feed(text))
+        
         try:
+            generation = await generate(topic, options, use_cache=use_cache, on_token=on_delta)
+            check(splitter.flush())
+            checked = await asyncio.gather(*checks)
+        except BaseException:
+            for task in checks:
+                task.cancel()
+            await asyncio.gather(*checks, return_exceptions=True)
+            raise
+        
+        logger.info(f"Pipelined fact-check finished {len(checked)} sections")
+        
+        return {
+            "raw_content": generation["content"],
+            **self._merge_section_checks(checked),
+            **self._merge_call_stats([generation] + list(checked))
+        }
+    
+    async def _fact_check_chunked(self, content: str, topic: str, use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Step 2 in chunks: split by headings into bounded-size chunks and check them
+        concurrently (the rate limiter and provider limits pace the calls). Each
+        chunk retries and fails over on its own.
+        """
+        chunks = chunk_sections(content, self.fact_check_chunk_chars)
+        checked = await asyncio.gather(*[
+            self._fact_check_section(chunk, topic, use_cache) for chunk in chunks
+        ])
+        
+        logger.info(f"Chunked fact-check finished {len(chunks)} chunks")
+        
+        return {
+            **self._merge_section_checks(checked),
+            **self._merge_call_stats(list(checked))
+        }
+    
+    async def _fact_check_filtered(self, content: str, topic: str, use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Step 2 on claim-bearing passages only: a local pattern scorer picks the
+        sentences with quantities, health or statistical claims, they are sent
+        with [[P#]] anchors, and the citations in the answer are patched back
+        into the original text after the matching sentence.
+        """
+        claims = extract_claims(content)
+        if not claims:
+            logger.info("Filtered fact-check: no claims found, skipping model call")
+            return {
+                "enhanced_content": content,
+                "fact_check_notes": {},
+                "claims_total": 0,
+                "claims_cached": 0,
+                **self._merge_call_stats([])
+            }
+        
+        anchors = {f"P{i}": claim for i, claim in enumerate(claims, 1)}
+        prompt = self.prompts.get_passage_fact_checking_prompt(
+            [(anchor, claim.text) for anchor, claim in anchors.items()],
+            topic
+        )
+        
+        result = await self._call_with_failover(
+            "fact_checking",
+            self._failover_chain(self.primary_model),
+            prompt,
+            system=self.prompts.get_passage_fact_checking_system(),
+            max_tokens=min(2000, 200 + sum(len(claim.text) for claim in claims) // 2),
+            temperature=0.3,
+            use_cache=use_cache
+        )
+        
+        answer, fact_check_notes = self._parse_fact_check_result(result["content"])
+        markers = {}
+        for anchor, passage in PASSAGE_LINE.findall(answer):
+            claim = anchors.get(anchor)
+            marker = annotations_in(passage)
+            if claim and marker:
+                markers[claim.hash] = marker
+        
+        sent_chars = sum(len(claim.text) for claim in claims)
+        logger.info(
+            f"Filtered fact-check: sent {len(claims)} passages ({sent_chars}/{len(content)} chars), "
+            f"patched {len(markers)}"
+        )
+        
+        return {
+            "enhanced_content": splice(content, claims, markers),
+            "fact_check_notes": fact_check_notes,
+            "claims_total": len(claims),
+            "claims_cached": 0,
+            **self._merge_call_stats([result])
+        }
+    
+    async def _fact_check_claims(self, content: str, topic: str, use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Step 2 at claim level: extract checkable sentences, reuse verifications
+        from the shared claim cache, send only unseen claims to the model, and
+        splice citations/flags in after each claim.
+        """
+        claims = extract_claims(content)
+        
+        cached = {}
+        if claims and self.claim_store and use_cache:
+            try:
+                cached = await self.claim_store.get_claim_verifications([claim.hash for claim in claims])
+            except Exception as e:
+                logger.warning(f"Claim cache lookup failed, verifying all claims: {str(e)}")
+        
+        unseen = [claim for claim in claims if claim.hash not in cached]
+        batches = [
+            unseen[i:i + self.claim_batch_size]
+            for i in range(0, len(unseen), self.claim_batch_size)
+        ]
+        results = await asyncio.gather(*[
+            self._verify_claims(batch, topic, use_cache) for batch in batches
+        ])
+        
+        verifications = dict(cached)
+        fresh = []
+        for batch, (result, batch_verifications) in zip(batches, results):
+            for claim in batch:
+                verification = batch_verifications.get(claim.hash)
+                if verification:
+                    verifications[claim.hash] = verification
+                    fresh.append({
+                        **verification,
+                        "claim_hash": claim.hash,
+                        "claim_text": claim.text,
+                        "model_used": result.get("model")
+                    })
+        
+        if fresh and self.claim_store:
+            try:
+                await self.claim_store.save_claim_verifications(fresh)
+            except Exception as e:
+                logger.warning(f"Failed to store claim verifications: {str(e)}")
+        
+        fact_check_notes = {}
+        for claim in claims:
+            verification = verifications.get(claim.hash)
+            if verification and verification["verdict"] != "supported":
+                note = verification.get("note") or "Requires verification"
+                fact_check_notes[f"note_{len(fact_check_notes)}"] = f"{claim.text} ({verification['verdict']}: {note})"
+        
+        logger.info(f"Claim fact-check: {len(claims)} claims, {len(claims) - len(unseen)} from cache")
+        
+        return {
+            "enhanced_content": annotate(content, claims, verifications),
+            "fact_check_notes": fact_check_notes,
+            "claims_total": len(claims),
+            "claims_cached": len(claims) - len(unseen),
+            **self._merge_call_stats([result for result, _ in results])
+        }
+    
+    async def _verify_claims(self, claims, topic: str, use_cache: bool = True):
+        """One model call verifying a batch of claims; returns (call result, hash -> verification)"""
+        prompt = self.prompts.get_claim_verification_prompt([claim.text for claim in claims], topic)
+        
+        result = await self._call_with_failover(
+            "fact_checking",
+            self._failover_chain(self.primary_model),
+            prompt,
+            system=self.prompts.get_claim_verification_system(),
+            max_tokens=min(2000, 200 + 80 * len(claims)),
+            temperature=0.2,
+            use_cache=use_cache
+        )
+        
+        verifications = {}
+        for item in parse_verifications(result["content"]):
+            try:
+                index = int(item["id"]) - 1
+            except (TypeError, ValueError):
+                continue
+            if not 0 <= index < len(claims):
+                continue
+            verdict = str(item.get("verdict", "uncertain")).lower()
+            verifications[claims[index].hash] = {
+                "verdict": verdict if verdict in ("supported", "unsupported") else "uncertain",
+                "citation": (item.get("citation") or "").strip() or None,
+                "note": (item.get("note") or "").strip() or None
+            }
+        
+        return result, verifications
+    
+    def _merge_section_checks(self, checked: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Reassemble section fact-checks in order with renumbered notes"""
+        fact_check_notes = {}
+        for section in checked:
+            for note in section["fact_check_notes"].values():
+                fact_check_notes[f"note_{len(fact_check_notes)}"] = note
+        
+        return {
+            "enhanced_content": join_sections([section["enhanced_content"] for section in checked]),
+            "fact_check_notes": fact_check_notes
+        }
+    
+    async def _create_summary(
+        self,
+        content: str,
+        topic: str,
+        use_cache: bool = True,
+        mode: str = "llm"
+    ) -> Dict[str, Any]:
+        """
+        Step 3: Create summary and key points using Gemini.
+        
+        mode "digest" sends a TextRank digest of at most AI_SUMMARY_DIGEST_CHARS
+        instead of the full article; "fast" builds the summary locally from the
+        top-ranked sentences and makes no model call.
+        """
+        if mode == "fast":
+            summary_data = extractive_summary(content)
+            logger.info(f"Extractive summary built locally: {len(summary_data['key_points'])} key points")
+            return summary_data
+        
+        try:
+            if mode == "digest":
+                digest = build_digest(content, self.summary_digest_chars)
+                logger.info(f"Summarizing a {len(digest)}-char digest of {len(content)} chars")
+                content = digest
+            
             prompt = self.prompts.get_summarization_prompt(content, topic)
             
-            # Use Gemini for summarization if configured
-            if self.summarization_model.startswith("gemini") and os.getenv("GOOGLE_API_KEY"):
-                try:
-                    model = genai.GenerativeModel(self.summarization_model)
-                    response = model.generate_content(
-                        prompt,
-                        generation_config=genai.types.GenerationConfig(
-                            max_output_tokens=1000,
-                            temperature=0.5,
-                        )
-                    )
-                    
-                    result = response.text
-                    # Estimate tokens for Gemini (roughly 4 chars per token)
-                    tokens_used = len(prompt + result) // 4
-                    cost = self._calculate_gemini_cost(tokens_used)
-                    
-                    logger.info(f"Summary generated using Gemini: {tokens_used} tokens, ${cost:.4f}")
-                    
-                except Exception as gemini_error:
-                    logger.warning(f"Gemini summarization failed, falling back to primary model: {gemini_error}")
-                    return await self._create_summary_fallback(prompt)
-            
-            elif self.primary_model.startswith("gpt"):
-                response = self.openai_client.chat.completions.create(
-                    model=self.primary_model,
-                    messages=[
-                        {"role": "system", "content": "You are an expert at creating concise, actionable summaries."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=1000,
-                    temperature=0.5
-                )
-                
-                result = response.choices[0].message.content
-                tokens_used = response.usage.total_tokens
-                cost = self._calculate_openai_cost(tokens_used, self.primary_model)
-                
-            else:  # Anthropic Claude
-                message = self.anthropic_client.messages.create(
-                    model="claude-3-sonnet-20240229",
-                    max_tokens=1000,
-                    temperature=0.5,
-                    messages=[
-                        {"role": "user", "content": prompt}
-                    ]
-                )
-                
-                result = message.content[0].text
-                tokens_used = message.usage.input_tokens + message.usage.output_tokens
-                cost = self._calculate_anthropic_cost(tokens_used)
+            result = await self._call_with_failover(
+                "summarization",
+                self._summary_models(),
+                prompt,
+                system="You are an expert at creating concise, actionable summaries.",
+                max_tokens=self.output_budget.max_tokens(self._summary_models()[0], SUMMARY_WORDS),
+                temperature=0.5,
+                use_cache=use_cache
+            )
+            
+            logger.info(f"Summary generated using {result['model']}: {result['tokens_used']} tokens, ${result['cost']:.4f}")
             
             # Parse summary result
-            summary_data = self._parse_summary_result(result)
+            summary_data = self._parse_summary_result(result["content"])
             
             return {
                 **summary_data,
-                "tokens_used": tokens_used,
-                "cost": cost
+                **self._call_stats(result)
             }
             
         except Exception as e:
             logger.error(f"Summarization failed: {str(e)}")
             raise e
     
-    async def _create_summary_fallback(self, prompt: str) -> Dict[str, Any]:
-        """Fallback summarization using primary model"""
-        if self.primary_model.startswith("gpt"):
-            response = self.openai_client.chat.completions.create(
-                model=self.fallback_model,
-                messages=[
-                    {"role": "system", "content": "You are an expert at creating concise, actionable summaries."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=1000,
-                temperature=0.5
+    def _call_stats(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Usage and resilience fields every model-calling step reports"""
+        return {
+            "tokens_used": result["tokens_used"],
+            "input_tokens": result["input_tokens"],
+            "output_tokens": result["output_tokens"],
+            "cached_tokens": result["cached_tokens"],
+            "cost": result["cost"],
+            "cache_hit": result["cache_hit"],
+            "retries": result["retries"],
+            "failover_model": result["failover_model"],
+            "hedged": result["hedged"],
+            "hedge_won": result["hedge_won"],
+            "hedge_extra_cost": result["hedge_extra_cost"]
+        }
+    
+    def _merge_call_stats(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Combine the usage of several model calls made by one step"""
+        failover_models = [r["failover_model"] for r in results if r.get("failover_model")]
+        return {
+            "tokens_used": sum(r["tokens_used"] for r in results),
+            "input_tokens": sum(r["input_tokens"] for r in results),
+            "output_tokens": sum(r["output_tokens"] for r in results),
+            "cached_tokens": sum(r["cached_tokens"] for r in results),
+            "cost": sum(r["cost"] for r in results),
+            # No calls at all (no claims, or all from the claim cache) is not a response-cache hit
+            "cache_hit": bool(results) and all(r["cache_hit"] for r in results),
+            "retries": sum(r["retries"] for r in results),
+            "failover_model": failover_models[0] if failover_models else None,
+            "hedged": any(r["hedged"] for r in results),
+            "hedge_won": any(r["hedge_won"] for r in results),
+            "hedge_extra_cost": sum(r["hedge_extra_cost"] for r in results)
+        }
+    
+    def _failover_chain(self, model: str) -> List[str]:
+        """
+        Models to try for a call, in order: the requested model, AI_MODEL_FALLBACK,
+        the cheaper Claude model for Anthropic primaries, then AI_MODEL_FAILOVER.
+        Fallbacks whose provider has no API key are skipped.
+        """
+        candidates = [model, self.fallback_model]
+        if self._provider_for(model).name == "anthropic":
+            candidates.append(ANTHROPIC_FALLBACK_MODEL)
+        candidates.extend(self.failover_models)
+        
+        chain = []
+        for candidate in candidates:
+            if candidate in chain:
+                continue
+            if chain and not self._provider_for(candidate).configured:
+                continue
+            chain.append(candidate)
+        return chain
+    
+    def _summary_models(self) -> List[str]:
+        """Gemini first when configured, then the primary model's fallbacks"""
+        if self.summarization_model.startswith("gemini") and self.providers["gemini"].configured:
+            chain = [self.summarization_model]
+            for model in self._failover_chain(self.primary_model)[1:]:
+                if model not in chain:
+                    chain.append(model)
+            return chain
+        return self._failover_chain(self.primary_model)
+    
+    async def _call_with_failover(
+        self,
+        step: str,
+        models: List[str],
+        prompt: str,
+        system: str = None,
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+        use_cache: bool = True,
+        on_token: Callable[[str], Awaitable[None]] = None,
+        stop_after_words: int = None
+    ) -> Dict[str, Any]:
+        """
+        Call the first healthy model in models, retrying transient errors with
+        jittered backoff and failing over to the next model when a provider
+        keeps failing, times out, rejects our credentials or its circuit is
+        open. Other client errors are raised right away. Each attempt's timeout
+        grows with max_tokens and the whole step is bounded by its latency
+        budget. A streamed call is only retried until its first token has been
+        forwarded.
+        """
+        attempt_timeout = self.retry_policy.timeout_for(max_tokens)
+        budget = self.step_budgets.get(step, 2 * attempt_timeout)
+        deadline = time.monotonic() + budget
+        retries = 0
+        last_error = None
+        streamed = False
+        
+        async def forward_token(text: str):
+            nonlocal streamed
+            streamed = True
+            await on_token(text)
+        
+        for index, model in enumerate(models):
+            breaker = self.circuit_breakers[self._provider_for(model).name]
+            hedge_model = models[index + 1] if index + 1 < len(models) else None
+            
+            for attempt in range(self.retry_policy.max_attempts):
+                if not breaker.allow():
+                    last_error = last_error or CircuitOpenError(f"Circuit open for provider {breaker.name}")
+                    break
+                
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise StepBudgetExceededError(
+                        f"{step} exceeded its {budget:g}s latency budget"
+                    ) from last_error
+                
+                try:
+                    result = await asyncio.wait_for(
+                        self._call_hedged(
+                            step,
+                            model,
+                            hedge_model,
+                            prompt,
+                            system=system,
+                            max_tokens=max_tokens,
+                            temperature=temperature,
+                            use_cache=use_cache,
+                            on_token=forward_token if on_token else None,
+                            stop_after_words=stop_after_words
+                        ),
+                        timeout=min(remaining, attempt_timeout)
+                    )
+                except Exception as e:
+                    last_error = e
+                    retryable = is_retryable(e)
+                    if retryable:
+                        breaker.record_failure()
+                    else:
+                        # Bad request or auth errors are ours, not the provider's: keep the circuit closed
+                        breaker.release()
+                    logger.warning(f"{step} call to {model} failed (attempt {attempt + 1}): {type(e).__name__}: {e}")
+                    if streamed or not should_fail_over(e):
+                        # Partial output already reached the client, or the request itself
+                        # is at fault (400, content policy): no other model would help
+                        raise
+                    if not retryable or is_timeout(e):
+                        # A timed-out model is slow right now: spend the rest of the budget on the next one
+                        break
+                    if attempt + 1 < self.retry_policy.max_attempts:
+                        retries += 1
+                        delay = self.retry_policy.delay(attempt)
+                        await asyncio.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+                    continue
+                
+                if result["hedge_won"]:
+                    # _call_hedged already reported the primary, which lost the race
+                    breaker.release()
+                else:
+                    breaker.record_success()
+                # A winning hedge is not a failover: the first choice was still healthy
+                if model != models[0]:
+                    logger.warning(f"{step} served by failover model {model}")
+                return {
+                    **result,
+                    "retries": retries,
+                    "failover_model": model if model != models[0] else None
+                }
+        
+        raise last_error
+    
+    async def _call_hedged(
+        self,
+        step: str,
+        model: str,
+        hedge_model: str,
+        prompt: str,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Call model; if hedging is on and it has not answered within its observed
+        latency percentile for this step, race a duplicate request on hedge_model
+        (unless its circuit is open). The first successful answer wins and the
+        other call is cancelled. The hedge's outcome is recorded on its own
+        provider's breaker; the caller records the primary's unless the hedge won.
+        """
+        delay = None
+        # Streamed calls are never hedged: their tokens are already on the wire
+        if self.hedging_enabled and hedge_model and not kwargs.get("on_token"):
+            delay = self.latency_tracker.percentile(step, model, self.hedge_percentile)
+        
+        start = time.monotonic()
+        primary = asyncio.create_task(self._call_model(model, prompt, **kwargs))
+        hedge = None
+        hedge_breaker = None
+        hedge_start = None
+        
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait({primary}, timeout=delay)
+                if not done:
+                    hedge_breaker = self.circuit_breakers[self._provider_for(hedge_model).name]
+                    if hedge_breaker.allow():
+                        logger.info(f"Hedging {step}: {model} slower than {delay:.2f}s, racing {hedge_model}")
+                        hedge_start = time.monotonic()
+                        hedge = asyncio.create_task(self._call_model(hedge_model, prompt, **kwargs))
+            
+            if hedge is None:
+                result = await primary
+                winner_model = model
+            else:
+                winner, result = await first_successful([primary, hedge])
+                winner_model = hedge_model if winner is hedge else model
+                if winner is hedge:
+                    # The primary may have failed before the hedge answered
+                    self._record_outcome(self.circuit_breakers[self._provider_for(model).name], primary)
+        finally:
+            for task in (primary, hedge):
+                if task and not task.done():
+                    task.cancel()
+            if hedge is not None:
+                # Also when the race itself was cancelled (attempt timeout): frees a half-open probe
+                self._record_outcome(hedge_breaker, hedge)
+        
+        finished = time.monotonic()
+        elapsed = finished - start
+        if not result["cache_hit"]:
+            # When the hedge wins this is a lower bound on the primary's latency,
+            # which keeps slow tails in the window instead of dropping them
+            self.latency_tracker.record(step, model, elapsed)
+        
+        hedge_extra_cost = 0.0
+        if hedge is not None:
+            # Both calls ran until the winner answered
+            hedge_elapsed = finished - hedge_start
+            if winner_model == hedge_model:
+                loser_model, loser_seconds, winner_seconds = model, elapsed, hedge_elapsed
+            else:
+                loser_model, loser_seconds, winner_seconds = hedge_model, hedge_elapsed, elapsed
+            hedge_extra_cost = self._hedge_loser_cost(
+                loser_model, prompt, kwargs.get("system"), result, loser_seconds, winner_seconds
             )
-            
-            result = response.choices[0].message.content
-            tokens_used = response.usage.total_tokens
-            cost = self._calculate_openai_cost(tokens_used, self.fallback_model)
-            
+            self.hedge_stats["hedged"] += 1
+            self.hedge_stats["extra_cost_usd"] += hedge_extra_cost
+            if winner_model == hedge_model:
+                self.hedge_stats["hedge_wins"] += 1
+        
+        return {
+            **result,
+            "hedged": hedge is not None,
+            "hedge_won": winner_model == hedge_model and hedge is not None,
+            "hedge_extra_cost": hedge_extra_cost
+        }
+    
+    def _record_outcome(self, breaker: CircuitBreaker, task: asyncio.Task):
+        """Report a racer's result to its provider's breaker; a cancelled racer says nothing"""
+        if not task.done() or task.cancelled():
+            breaker.release()
+        elif task.exception() is None:
+            breaker.record_success()
+        elif is_retryable(task.exception()):
+            breaker.record_failure()
         else:
-            message = self.anthropic_client.messages.create(
-                model="claude-3-haiku-20240307",  # Faster/cheaper model for fallback
-                max_tokens=1000,
-                temperature=0.5,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
+            breaker.release()
+    
+    def _hedge_loser_cost(
+        self,
+        loser_model: str,
+        prompt: str,
+        system: Optional[str],
+        result: Dict[str, Any],
+        loser_seconds: float,
+        winner_seconds: float
+    ) -> float:
+        """
+        Estimated bill for the cancelled racer: its own prompt tokens at its own
+        price, plus output at the winner's rate for as long as it ran (capped at
+        the winner's output).
+        """
+        if result["cache_hit"]:
+            return 0.0
+        api_model = self._api_model(loser_model)
+        input_tokens = count_prompt_tokens(api_model, prompt, system)
+        share = min(1.0, loser_seconds / winner_seconds) if winner_seconds > 0 else 1.0
+        return self._model_cost(api_model, input_tokens, int(result["output_tokens"] * share))
+    
+    def hedging_metrics(self) -> Dict[str, Any]:
+        """Process-wide hedge counters and observed latency percentiles"""
+        return {
+            "enabled": self.hedging_enabled,
+            "percentile": self.hedge_percentile,
+            "hedged_requests": self.hedge_stats["hedged"],
+            "hedge_wins": self.hedge_stats["hedge_wins"],
+            "extra_cost_usd": round(self.hedge_stats["extra_cost_usd"], 6),
+            "latency": self.latency_tracker.metrics()
+        }
+    
+    def _api_model(self, model: str) -> str:
+        """Non-Claude model names on the Anthropic path map to the default Claude model"""
+        if self._provider_for(model).name == "anthropic" and not model.startswith("claude"):
+            return ANTHROPIC_DEFAULT_MODEL
+        return model
+    
+    def _provider_for(self, model: str):
+        """Select the provider that serves a model name"""
+        if model.startswith("gpt"):
+            return self.providers["openai"]
+        if model.startswith("gemini"):
+            return self.providers["gemini"]
+        if model.startswith("fake"):
+            return self.providers["fake"]
+        return self.providers["anthropic"]
+    
+    async def _call_model(
+        self,
+        model: str,
+        prompt: str,
+        system: str = None,
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+        use_cache: bool = True,
+        on_token: Callable[[str], Awaitable[None]] = None,
+        stop_after_words: int = None
+    ) -> Dict[str, Any]:
+        """
+        Run one completion on the provider serving this model without blocking the event loop.
+        Identical requests are served from the response cache unless use_cache is False;
+        a bypassed call still refreshes the cached entry. With on_token the provider's
+        streaming API is used and each text delta is forwarded as it arrives. A call
+        with stop_after_words is always streamed, forwarding or not, so it can end at
+        the next "## " heading once that many words are written.
+        """
+        provider = self._provider_for(model)
+        api_model = self._api_model(model)
+        
+        request = self._build_request(provider.name, api_model, prompt, system, max_tokens, temperature)
+        max_tokens = request["max_tokens"]
+        
+        cache_key = None
+        if self.response_cache:
+            cache_key = LLMResponseCache.make_key(
+                provider.name, api_model, prompt, temperature, max_tokens, system
             )
-            
-            result = message.content[0].text
-            tokens_used = message.usage.input_tokens + message.usage.output_tokens
-            cost = self._calculate_anthropic_cost(tokens_used)
+            if use_cache:
+                cached = await self.response_cache.get(cache_key)
+                if cached:
+                    if on_token:
+                        await on_token(cached["content"])
+                    # Cache hits are not billed
+                    return {
+                        **cached,
+                        "input_tokens": 0,
+                        "output_tokens": 0,
+                        "cached_tokens": 0,
+                        "tokens_used": 0,
+                        "cost": 0.0,
+                        "cache_hit": True
+                    }
+        
+        # Wait for RPM/TPM quota before taking a provider concurrency slot
+        estimated_tokens = await self.rate_limiter.acquire(api_model, request["prompt_tokens"], max_tokens)
+        
+        try:
+            async with self.provider_limits[provider.name]:
+                if on_token or stop_after_words:
+                    result = await self._collect_stream(
+                        provider.stream(api_model, prompt, **request["kwargs"]),
+                        on_token,
+                        api_model=api_model,
+                        prompt_tokens=request["prompt_tokens"],
+                        stop_after_words=stop_after_words
+                    )
+                else:
+                    result = await provider.complete(api_model, prompt, **request["kwargs"])
+        except Exception as e:
+            retry_after = rate_limit_retry_after(e)
+            if retry_after is not None:
+                self.rate_limiter.penalize(api_model, retry_after)
+            raise
+        
+        self.rate_limiter.reconcile(api_model, estimated_tokens, result["tokens_used"])
+        
+        cost = self._model_cost(api_model, result["input_tokens"], result["output_tokens"], result["cached_tokens"])
+        self._count_prompt_cache(request, result)
         
-        summary_data = self._parse_summary_result(result)
+        if cache_key:
+            await self.response_cache.set(cache_key, {
+                "content": result["content"],
+                "model": api_model
+            })
         
         return {
-            **summary_data,
-            "tokens_used": tokens_used,
-            "cost": cost
+            **result,
+            "model": api_model,
+            "cost": cost,
+            "cache_hit": False
         }
     
+    async def _collect_stream(
+        self,
+        stream,
+        on_token: Optional[Callable[[str], Awaitable[None]]],
+        api_model: str = None,
+        prompt_tokens: int = 0,
+        stop_after_words: int = None
+    ) -> Dict[str, Any]:
+        """
+        Forward streamed deltas (if on_token is set) and assemble them into a complete() style result.
+        Past stop_after_words the text is cut before the next "## " heading and the
+        stream is closed; usage is then counted locally. The marker is searched in
+        the joined text, so a heading split across deltas is still found, and a
+        possible start of it is held back until the next delta shows what it is.
+        """
+        if on_token is None:
+            async def on_token(text: str):
+                pass
+        
+        content = ""
+        forwarded = 0
+        usage = {"input_tokens": 0, "output_tokens": 0, "cached_tokens": 0}
+        words = 0
+        stop_from = None
+        async for event in stream:
+            if event["type"] == "usage":
+                usage = event
+                continue
+            
+            text = event["text"]
+            words += len(text.split())
+            content += text
+            end = len(content)
+            
+            if stop_after_words and words >= stop_after_words:
+                if stop_from is None:
+                    # Only a heading after the word that met the target ends the text
+                    needed = stop_after_words - (words - len(text.split()))
+                    crossing = list(re.finditer(r"\S+", text))[needed - 1]
+                    stop_from = end - len(text) + crossing.end()
+                cut = content.find(SECTION_MARKER, stop_from)
+                if cut != -1:
+                    content = content[:cut + 1]
+                    if len(content) > forwarded:
+                        await on_token(content[forwarded:])
+                    await stream.aclose()
+                    logger.info(f"Stopped {api_model} after {words} words, target met")
+                    usage = {
+                        "input_tokens": prompt_tokens,
+                        "output_tokens": count_tokens(content, api_model),
+                        "cached_tokens": 0
+                    }
+                    break
+                end -= partial_marker(content)
+            
+            if end > forwarded:
+                await on_token(content[forwarded:end])
+                forwarded = end
+        else:
+            if len(content) > forwarded:
+                await on_token(content[forwarded:])
+        
+        return {
+            "content": content,
+            "input_tokens": usage["input_tokens"],
+            "output_tokens": usage["output_tokens"],
+            "cached_tokens": usage.get("cached_tokens", 0),
+            "tokens_used": usage["input_tokens"] + usage["output_tokens"]
+        }
+    
+    def _build_request(
+        self,
+        provider_name: str,
+        api_model: str,
+        prompt: str,
+        system: str,
+        max_tokens: int,
+        temperature: float
+    ) -> Dict[str, Any]:
+        """
+        Provider call arguments plus pre-flight token counts. The pre-flight
+        count sizes the request for the context window and the TPM budget;
+        a system prompt long enough for the provider's prefix cache is marked
+        cacheable (only Anthropic needs the explicit breakpoint).
+        """
+        prompt_tokens = count_prompt_tokens(api_model, prompt, system)
+        prefix_tokens = count_tokens(system, api_model)
+        cacheable = bool(system) and prefix_tokens >= PROMPT_CACHE_MIN_TOKENS.get(provider_name, 1024)
+        max_tokens = fit_max_tokens(api_model, prompt_tokens, max_tokens)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "prefix_tokens": prefix_tokens,
+            "cacheable": cacheable,
+            "max_tokens": max_tokens,
+            "kwargs": {
+                "system": system,
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+                "cache_prefix": cacheable
+            }
+        }
+    
+    def _count_prompt_cache(self, request: Dict[str, Any], result: Dict[str, Any]):
+        self.prompt_cache_stats["requests"] += 1
+        self.prompt_cache_stats["cacheable_requests"] += 1 if request["cacheable"] else 0
+        self.prompt_cache_stats["input_tokens"] += result["input_tokens"]
+        self.prompt_cache_stats["cached_tokens"] += result["cached_tokens"]
+    
+    def prompt_cache_metrics(self) -> Dict[str, Any]:
+        """Process-wide provider prompt-cache counters for /api/ai/metrics"""
+        stats = self.prompt_cache_stats
+        return {
+            **stats,
+            "cached_token_rate": round(stats["cached_tokens"] / stats["input_tokens"], 3) if stats["input_tokens"] else 0.0
+        }
+    
+    def _model_cost(self, model: str, input_tokens: int, output_tokens: int, cached_tokens: int = 0) -> float:
+        """Price of a completion from the per-model price table"""
+        if self._provider_for(model).name == "fake":
+            return 0.0
+        return self.price_table.cost(model, input_tokens, output_tokens, cached_tokens)
+    
+    async def _learn_output_ratio(self, result: Dict[str, Any]):
+        """Fold a fresh completion's tokens-per-word into the output budget and its store"""
+        if result["cache_hit"] or not result["output_tokens"]:
+            return
+        words = len(result["content"].split())
+        self.output_budget.observe(result["model"], result["output_tokens"], words)
+        if self.output_stats_store:
+            try:
+                await self.output_stats_store.record_output_stats(result["model"], result["output_tokens"], words)
+            except Exception as e:
+                logger.warning(f"Could not record output stats for {result['model']}: {str(e)}")
+    
+    async def load_output_stats(self):
+        """Seed tokens-per-word ratios from past sessions"""
+        if not self.output_stats_store:
+            return
+        try:
+            self.output_budget.load(await self.output_stats_store.get_output_stats())
+        except Exception as e:
+            logger.warning(f"Could not load output stats, using default ratios: {str(e)}")
+    
+    def _count_cache_result(self, cache_stats: Dict[str, int], step_result: Dict[str, Any]):
+        """Tally response cache hits and misses for generation metadata"""
+        if not self.response_cache:
+            return
+        if step_result.get("cache_hit"):
+            cache_stats["hits"] += 1
+        else:
+            cache_stats["misses"] += 1
+    
     async def _format_for_cms(
         self, 
         content: str, 
@@ -541,16 +1541,13 @@ class AIProcessor:
     
     async def _format_recipe_for_cms(
         self, 
-        content: str, 
+        recipe_data: Dict[str, Any], 
         summary_data: Dict[str, Any], 
         topic: str,
         options: GenerationOptions
     ) -> Dict[str, Any]:
-        """Step 4: Format recipe for CMS database structure"""
+        """Step 4: Format parsed recipe for CMS database structure"""
         try:
-            # Parse recipe content into structured format
-            recipe_data = self._parse_recipe_content(content, topic)
-            
             # Generate slug
             slug = slugify(recipe_data["title"])
             
@@ -775,43 +1772,3 @@ class AIProcessor:
         except Exception as e:
             logger.error(f"Failed to parse summary result: {str(e)}")
             return {"summary": result[:200], "key_points": [], "title": ""}
-    
-    def _calculate_openai_cost(self, tokens: int, model: str) -> float:
-        """Calculate cost for OpenAI API usage"""
-        # Pricing as of 2024 (per 1K tokens)
-        pricing = {
-            "gpt-4": {"input": 0.03, "output": 0.06},
-            "gpt-3.5-turbo": {"input": 0.0015, "output": 0.002}
-        }
-        
-        model_key = "gpt-4" if model.startswith("gpt-4") else "gpt-3.5-turbo"
-        # Simplified calculation - assume 70% input, 30% output
-        input_tokens = int(tokens * 0.7)
-        output_tokens = int(tokens * 0.3)
-        
-        cost = (input_tokens / 1000 * pricing[model_key]["input"] + 
-                output_tokens / 1000 * pricing[model_key]["output"])
-        
-        return round(cost, 4)
-    
-    def _calculate_anthropic_cost(self, tokens: int) -> float:
-        """Calculate cost for Anthropic API usage"""
-        # Claude pricing (per 1K tokens) - simplified
-        cost_per_1k = 0.008  # Average cost
-        return round((tokens / 1000) * cost_per_1k, 4)
-    
-    def _calculate_gemini_cost(self, tokens: int) -> float:
-        """Calculate cost for Google Gemini API usage"""
-        # Gemini Pro pricing (as of 2024)
-        # Free tier: 15 RPM, 32K TPM, 1M tokens per day
-        # Paid tier: $0.0005 per 1K tokens (input), $0.0015 per 1K tokens (output)
-        
-        # Simplified calculation - assume 70% input, 30% output
-        input_tokens = int(tokens * 0.7)
-        output_tokens = int(tokens * 0.3)
-        
-        input_cost = (input_tokens / 1000) * 0.0005
-        output_cost = (output_tokens / 1000) * 0.0015
-        
-        total_cost = input_cost + output_cost
-        return round(total_cost, 4)
\ No newline at end of file
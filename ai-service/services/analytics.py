@@ -0,0 +1,187 @@
+"""
+Analytics Event Writer
+Bounded in-process queue of generation events written to the database in batches
+"""
+
+import os
+import time
+import asyncio
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+def generation_event(
+    session_id: int,
+    content_type: str,
+    result: Dict[str, Any] = None,
+    error: Exception = None
+) -> Dict[str, Any]:
+    """One ai_generation_events row for a finished generation (result) or a failed one (error)"""
+    event = {
+        "session_id": session_id,
+        "event_type": "failed" if error is not None else "completed",
+        "content_type": content_type,
+        "occurred_at": datetime.now(),
+        "data": {}
+    }
+    if error is not None:
+        event["data"]["error"] = str(error)
+        return event
+
+    metadata = result["metadata"]
+    article = result["article"]
+    event.update({
+        "model_used": metadata.model_used,
+        "quality_score": metadata.quality_score,
+        "tokens_used": metadata.tokens_used,
+        "input_tokens": metadata.input_tokens,
+        "output_tokens": metadata.output_tokens,
+        "cached_input_tokens": metadata.cached_input_tokens,
+        "cost_usd": metadata.cost_usd,
+        "processing_time_seconds": metadata.processing_time_seconds,
+        "cache_hits": metadata.cache_hits,
+        "cache_misses": metadata.cache_misses,
+        "retries": metadata.retries
+    })
+    event["data"].update({
+        "quality_metrics": article.quality_metrics,
+        "step_timings": metadata.step_timings,
+        "failovers": metadata.failovers,
+        "resumed_steps": metadata.resumed_steps
+    })
+    return event
+
+class AnalyticsEventWriter:
+    """
+    Collects analytics events without blocking the caller.
+
+    record() only enqueues; a background flusher writes batches with one
+    multi-row INSERT once batch_size events are waiting or flush_seconds
+    have passed since the first of them. When the queue is full the event
+    is dropped and counted rather than slowing down a generation.
+    """
+
+    def __init__(
+        self,
+        store,
+        max_queue_size: int = 10000,
+        batch_size: int = 200,
+        flush_seconds: float = 2.0
+    ):
+        self.store = store
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._task: Optional[asyncio.Task] = None
+        self._batch: List[Dict[str, Any]] = []  # Being filled by the flusher
+        self._flushing: Optional[asyncio.Future] = None
+
+        self.recorded = 0
+        self.dropped = 0  # Queue full
+        self.written = 0
+        self.failed = 0  # Lost with a failed batch write
+        self.batches = 0
+        self.max_queue_depth = 0
+        self.last_flush_ms = 0.0
+
+    @classmethod
+    def from_env(cls, store) -> "AnalyticsEventWriter":
+        return cls(
+            store,
+            max_queue_size=int(os.getenv("AI_ANALYTICS_QUEUE_SIZE", 10000)),
+            batch_size=int(os.getenv("AI_ANALYTICS_BATCH_SIZE", 200)),
+            flush_seconds=float(os.getenv("AI_ANALYTICS_FLUSH_SECONDS", 2.0))
+        )
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run(), name="analytics-writer")
+        logger.info(f"Analytics writer started (batch {self.batch_size}, every {self.flush_seconds}s)")
+
+    async def stop(self):
+        """Stop the flusher and write whatever is still queued"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        # A write in progress is shielded from the cancel; let it finish, then drain
+        if self._flushing:
+            await self._flushing
+        batch, self._batch = self._batch, []
+        await self._flush(batch)
+        while not self._queue.empty():
+            await self._flush(self._take(self.batch_size))
+        logger.info("Analytics writer stopped")
+
+    def record(self, event: Dict[str, Any]) -> bool:
+        """Queue an event; False (and counted as dropped) when the queue is full"""
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning(f"Analytics queue full, {self.dropped} events dropped so far")
+            return False
+
+        self.recorded += 1
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        return True
+
+    def _take(self, limit: int) -> List[Dict[str, Any]]:
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._batch = batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_seconds
+
+            # Fill the batch until it is full or the first event has waited flush_seconds
+            while len(batch) < self.batch_size:
+                batch.extend(self._take(self.batch_size - len(batch)))
+                remaining = deadline - loop.time()
+                if len(batch) >= self.batch_size or remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            self._batch = []
+            self._flushing = asyncio.ensure_future(self._flush(batch))
+            await asyncio.shield(self._flushing)
+
+    async def _flush(self, batch: List[Dict[str, Any]]):
+        if not batch:
+            return
+        start = time.perf_counter()
+        try:
+            await self.store.insert_generation_events(batch)
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f"Failed to write {len(batch)} analytics events: {str(e)}")
+        self.last_flush_ms = round((time.perf_counter() - start) * 1000, 2)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_queue_size": self.max_queue_size,
+            "max_queue_depth": self.max_queue_depth,
+            "recorded": self.recorded,
+            "written": self.written,
+            "batches": self.batches,
+            "average_batch_size": round(self.written / self.batches, 1) if self.batches else 0.0,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "last_flush_ms": self.last_flush_ms
+        }
@@ -0,0 +1,165 @@
+"""
+Claim Extraction
+Sentence-level factual claims with stable hashes for the shared fact-check cache
+"""
+
+import re
+import json
+import hashlib
+from typing import Dict, List, Any, Optional
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Sentence runs to . ! ? followed by whitespace (so "1.5" stays whole) or to a line break
+SENTENCE = re.compile(r"(?:[^\n.!?]|[.!?](?=\S))+[.!?]*")
+
+# Inline citations and flags added by earlier fact-checks
+ANNOTATION = re.compile(r"\s*\[(?:Source|FACT-CHECK)[^\]]*\]", re.IGNORECASE)
+
+HEALTH_TERMS = re.compile(
+    r"\b(protein|fib(?:er|re)|vitamin|mineral|iron|calcium|magnesium|zinc|folate|potassium|"
+    r"calorie|kcal|carbohydrate|glycemic|gluten|cholesterol|blood sugar|diabetes|heart|"
+    r"antioxidant|nutrient|digest|immune|weight|study|studies|research|percent)\b",
+    re.IGNORECASE
+)
+NUMBER = re.compile(r"\d")
+QUANTITY = re.compile(
+    r"\d+(?:\.\d+)?\s*(?:%|percent|g|grams?|mg|mcg|kcal|calories|kg|times|x)\b",
+    re.IGNORECASE
+)
+STATISTIC_TERMS = re.compile(
+    r"\b(study|studies|research|trial|survey|according to|evidence|linked to|associated with|"
+    r"reduces?|increases?|lowers?|raises?|risk|higher|lower|more than|less than|rich in|"
+    r"source of|daily value|recommended)\b",
+    re.IGNORECASE
+)
+
+# Minimum score for a sentence to count as a checkable claim
+CLAIM_MIN_SCORE = 2
+
+UNIT_SYNONYMS = [
+    (re.compile(r"\bgrams?\b"), "g"),
+    (re.compile(r"\bmilligrams?\b"), "mg"),
+    (re.compile(r"\bmicrograms?\b"), "mcg"),
+    (re.compile(r"\bkilocalories\b|\bcalories\b"), "kcal"),
+    (re.compile(r"\bpercent\b"), "%"),
+    (re.compile(r"\bfibre\b"), "fiber"),
+    (re.compile(r"\b(about|approximately|around|roughly|nearly|up to)\b|~"), ""),
+]
+
+class Claim:
+    """One checkable sentence and its position in the source text"""
+
+    def __init__(self, text: str, start: int, end: int):
+        self.text = text
+        self.start = start
+        self.end = end
+        self.normalized = normalize_claim(text)
+        self.hash = claim_hash(self.normalized)
+
+def normalize_claim(text: str) -> str:
+    """Canonical form so rephrasings of the same fact share a cache entry"""
+    text = ANNOTATION.sub("", text).lower()
+    text = re.sub(r"^\s*(?:[-*+]|\d+[.)])\s+", "", text)  # List markers
+    text = re.sub(r"[*_`#>]", "", text)
+    for pattern, replacement in UNIT_SYNONYMS:
+        text = pattern.sub(replacement, text)
+    text = re.sub(r"(\d)\s+(g|mg|mcg|kcal|%)", r"\1\2", text)
+    text = re.sub(r"[^\w%.\s-]", " ", text)
+    return re.sub(r"\s+", " ", text).strip(" .")
+
+def claim_hash(normalized: str) -> str:
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+def score_sentence(sentence: str) -> int:
+    """
+    How claim-like a sentence is: quantities with units weigh most, then
+    health/nutrition terms and statistical language, then bare numbers.
+    """
+    plain = ANNOTATION.sub("", sentence).strip()
+    if len(plain) < 20 or plain.startswith("#"):
+        return 0
+
+    score = 0
+    if QUANTITY.search(plain):
+        score += 3
+    elif NUMBER.search(plain):
+        score += 1
+    if HEALTH_TERMS.search(plain):
+        score += 2
+    if STATISTIC_TERMS.search(plain):
+        score += 1
+    return score
+
+def is_claim(sentence: str, min_score: int = CLAIM_MIN_SCORE) -> bool:
+    """A sentence is worth checking when it states a quantity or a health/nutrition fact"""
+    return score_sentence(sentence) >= min_score
+
+def extract_claims(text: str, min_score: int = CLAIM_MIN_SCORE) -> List[Claim]:
+    """Checkable sentences in text order, one per distinct claim"""
+    claims = []
+    seen = set()
+    for match in SENTENCE.finditer(text):
+        sentence = match.group(0)
+        stripped = sentence.strip()
+        # Sentences that already carry a citation or flag were checked before
+        if not stripped or ANNOTATION.search(stripped) or not is_claim(stripped, min_score):
+            continue
+        start = match.start() + sentence.index(stripped)
+        claim = Claim(stripped, start, start + len(stripped))
+        if claim.hash in seen:
+            continue
+        seen.add(claim.hash)
+        claims.append(claim)
+    return claims
+
+def parse_verifications(result: str) -> List[Dict[str, Any]]:
+    """Pull the JSON array of verdicts out of a model answer"""
+    start, end = result.find("["), result.rfind("]")
+    if start == -1 or end <= start:
+        return []
+    try:
+        items = json.loads(result[start:end + 1])
+    except ValueError as e:
+        logger.warning(f"Could not parse claim verifications: {str(e)}")
+        return []
+    return [item for item in items if isinstance(item, dict) and "id" in item]
+
+def annotate(text: str, claims: List[Claim], verifications: Dict[str, Dict[str, Any]]) -> str:
+    """
+    Splice citations and flags in after each claim. verifications maps claim
+    hash to {"verdict", "citation", "note"}; claims without one are left as is.
+    """
+    markers = {}
+    for claim in claims:
+        verification = verifications.get(claim.hash)
+        marker = citation_marker(verification) if verification else None
+        if marker:
+            markers[claim.hash] = marker
+    return splice(text, claims, markers)
+
+def splice(text: str, claims: List[Claim], markers: Dict[str, str]) -> str:
+    """Insert markers (claim hash -> text) right after each claim's sentence"""
+    pieces = []
+    cursor = 0
+    for claim in sorted(claims, key=lambda c: c.start):
+        marker = markers.get(claim.hash)
+        if not marker:
+            continue
+        pieces.append(text[cursor:claim.end])
+        pieces.append(marker)
+        cursor = claim.end
+    pieces.append(text[cursor:])
+    return "".join(pieces)
+
+def annotations_in(text: str) -> str:
+    """The [Source: ...] / [FACT-CHECK: ...] markers found in text, joined"""
+    return "".join(" " + match.group(0).strip() for match in ANNOTATION.finditer(text))
+
+def citation_marker(verification: Dict[str, Any]) -> Optional[str]:
+    if verification.get("verdict") == "supported":
+        citation = (verification.get("citation") or "").strip()
+        return f" [Source: {citation}]" if citation else None
+    return " [FACT-CHECK: Requires verification]"
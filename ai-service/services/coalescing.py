@@ -0,0 +1,121 @@
+"""
+Request Coalescing
+Singleflight sharing of one in-flight generation between identical concurrent requests
+"""
+
+import re
+import json
+import asyncio
+import hashlib
+from typing import Dict, Any, Optional
+
+from models import ContentGenerationRequest, GenerationOptions
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+def normalize_topic(topic: str) -> str:
+    """Case, surrounding punctuation and whitespace do not make a topic different"""
+    return re.sub(r"\s+", " ", topic).strip(" .!?").casefold()
+
+def request_fingerprint(request: ContentGenerationRequest, user_id: int) -> str:
+    """Hash of everything that determines a generation: user, topic, content type and options"""
+    options = (request.options or GenerationOptions()).dict()
+    payload = json.dumps(
+        [user_id, normalize_topic(request.topic), request.content_type, options],
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class FlightAbandonedError(Exception):
+    """The leading request was cancelled before its generation finished"""
+    pass
+
+class Flight:
+    """One in-flight generation that identical requests can wait on"""
+
+    def __init__(self, key: str):
+        loop = asyncio.get_running_loop()
+        self.key = key
+        self.session_id: Optional[int] = None
+        self.started = asyncio.Event()  # Set once session_id is known
+        self._outcome = loop.create_future()
+        self.followers = 0
+
+    async def wait(self) -> Any:
+        """The leader's result; its error is raised for followers too"""
+        ok, value = await asyncio.shield(self._outcome)
+        if not ok:
+            raise value
+        return value
+
+    async def wait_started(self) -> int:
+        await self.started.wait()
+        if self.session_id is None:
+            await self.wait()  # Session creation failed: raise its error
+        return self.session_id
+
+class SingleFlight:
+    """
+    Registry of in-flight generations by request fingerprint.
+
+    The first request for a key leads: it claims the key before any await, so
+    requests arriving while it creates its session still join it. Followers
+    wait for the leader's result instead of starting their own pipeline.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, Flight] = {}
+        self._by_session: Dict[int, Flight] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def join_or_lead(self, key: str):
+        """(flight, leader): an existing flight to follow, or a new one to lead"""
+        flight = self._flights.get(key)
+        if flight is not None:
+            flight.followers += 1
+            self.coalesced += 1
+            logger.info(f"Coalesced request into in-flight session {flight.session_id}")
+            return flight, False
+
+        flight = Flight(key)
+        self._flights[key] = flight
+        self.leaders += 1
+        return flight, True
+
+    def started(self, flight: Flight, session_id: int):
+        flight.session_id = session_id
+        self._by_session[session_id] = flight
+        flight.started.set()
+
+    def get(self, session_id: int) -> Optional[Flight]:
+        return self._by_session.get(session_id)
+
+    def resolve(self, flight: Optional[Flight], result: Any = None, error: Exception = None):
+        """Publish the leader's outcome and retire the flight; later requests start afresh"""
+        if flight is None or flight._outcome.done():
+            return
+        if self._flights.get(flight.key) is flight:
+            del self._flights[flight.key]
+        self._by_session.pop(flight.session_id, None)
+        flight._outcome.set_result((error is None, error if error is not None else result))
+        flight.started.set()
+
+    def resolve_session(self, session_id: int, result: Any = None, error: Exception = None):
+        self.resolve(self._by_session.get(session_id), result, error)
+
+    def abandon(self, flight: Optional[Flight]):
+        """Fail a flight whose leader was cancelled so followers stop waiting on it"""
+        self.resolve(flight, error=FlightAbandonedError("The generation this request joined was cancelled"))
+
+    def abandon_session(self, session_id: int):
+        self.abandon(self._by_session.get(session_id))
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._flights),
+            "leaders": self.leaders,
+            "coalesced_requests": self.coalesced
+        }
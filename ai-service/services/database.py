@@ -7,180 +7,169 @@ import os
 import json
 from typing import Dict, List, Optional, Any
 from datetime import datetime
-import psycopg2
-from psycopg2.extras import RealDictCursor
 from slugify import slugify
+import psycopg2
 
-from models import GenerationSession, PerformanceAnalytics
+from models import GenerationSession, PerformanceAnalytics, AIModelPerformance
+from services.db_pool import AsyncConnectionPool
+from services.migrations import MigrationError, latest_version
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Card slots per category page that AI article drafts are placed in: L1-L6 and M1-M6
+# are the article positions allowed by valid_cms_article_card_assignment
+CARD_SLOTS_PER_PAGE = 6
+
+# Session statuses that end an attempt and are counted in the analytics rollups
+FINISHED_STATUSES = ("completed", "failed")
+
+# Session columns the rollup upserts read from a finished session's RETURNING
+ROLLUP_SOURCE_COLUMNS = (
+    "created_at, model_used, content_type, topic_input, status, "
+    "total_cost, total_tokens, processing_time_seconds, quality_score"
+)
+
+ROLLUP_TABLES = (
+    ("hourly_rollup", "ai_generation_rollups_hourly", "date_trunc('hour', created_at)"),
+    ("daily_rollup", "ai_generation_rollups_daily", "created_at::date")
+)
+
+def rollup_ctes(source: str, subtract: bool = False) -> str:
+    """
+    CTEs adding the finished session returned by CTE source to the hourly,
+    daily and topic rollups, for appending to a WITH clause. With subtract,
+    they take a session counted earlier back out (it is being resumed).
+    """
+    sign = "-" if subtract else ""
+    ctes = [f"""
+            {name} AS (
+                INSERT INTO {table} (
+                    bucket, model_used, content_type, generations, completed, failed,
+                    total_cost, total_tokens, total_processing_seconds, quality_sum, quality_count
+                )
+                SELECT
+                    {bucket}, COALESCE(model_used, 'unknown'), COALESCE(content_type, 'article'), {sign}1,
+                    {sign}(status = 'completed')::int, {sign}(status = 'failed')::int,
+                    {sign}COALESCE(total_cost, 0), {sign}COALESCE(total_tokens, 0),
+                    {sign}COALESCE(processing_time_seconds, 0),
+                    {sign}COALESCE(quality_score, 0), {sign}(quality_score IS NOT NULL)::int
+                FROM {source}
+                ON CONFLICT (bucket, model_used, content_type) DO UPDATE SET
+                    generations = {table}.generations + EXCLUDED.generations,
+                    completed = {table}.completed + EXCLUDED.completed,
+                    failed = {table}.failed + EXCLUDED.failed,
+                    total_cost = {table}.total_cost + EXCLUDED.total_cost,
+                    total_tokens = {table}.total_tokens + EXCLUDED.total_tokens,
+                    total_processing_seconds = {table}.total_processing_seconds + EXCLUDED.total_processing_seconds,
+                    quality_sum = {table}.quality_sum + EXCLUDED.quality_sum,
+                    quality_count = {table}.quality_count + EXCLUDED.quality_count,
+                    updated_at = NOW()
+            )""" for name, table, bucket in ROLLUP_TABLES]
+    
+    # Same topic normalisation as request coalescing: case, spacing and trailing punctuation
+    ctes.append(f"""
+            topic_rollup AS (
+                INSERT INTO ai_topic_rollups (topic_key, content_type, topic, generations, completed, last_generated_at)
+                SELECT
+                    lower(regexp_replace(btrim(topic_input, ' .!?'), '\\s+', ' ', 'g')),
+                    COALESCE(content_type, 'article'), topic_input, {sign}1, {sign}(status = 'completed')::int, created_at
+                FROM {source}
+                ON CONFLICT (topic_key, content_type) DO UPDATE SET
+                    topic = EXCLUDED.topic,
+                    generations = ai_topic_rollups.generations + EXCLUDED.generations,
+                    completed = ai_topic_rollups.completed + EXCLUDED.completed,
+                    last_generated_at = GREATEST(ai_topic_rollups.last_generated_at, EXCLUDED.last_generated_at)
+            )""")
+    return ",".join(ctes)
+
 class DatabaseService:
     def __init__(self):
         self.connection_string = os.getenv("DATABASE_URL")
-        self.connection = None
+        self.pool = None
     
     async def connect(self):
-        """Establish database connection"""
+        """Open the database connection pool"""
         try:
-            self.connection = psycopg2.connect(
+            self.pool = AsyncConnectionPool(
                 self.connection_string,
-                cursor_factory=RealDictCursor
+                min_size=int(os.getenv("DB_POOL_MIN_SIZE", 1)),
+                max_size=int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+                acquire_timeout=float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", 30)),
+                health_check_interval=float(os.getenv("DB_POOL_HEALTH_CHECK_INTERVAL", 30))
             )
-            logger.info("Database connection established")
+            await self.pool.open()
+            logger.info("Database connection pool established")
             
-            # Ensure tables exist
-            await self._create_tables_if_not_exist()
+            await self._check_schema_version()
             
         except Exception as e:
             logger.error(f"Database connection failed: {str(e)}")
             raise e
     
     async def disconnect(self):
-        """Close database connection"""
-        if self.connection:
-            self.connection.close()
-            logger.info("Database connection closed")
+        """Close database connection pool"""
+        if self.pool:
+            await self.pool.close()
+            logger.info("Database connection pool closed")
+    
+    def get_pool_metrics(self) -> Dict[str, Any]:
+        """Connection pool size and saturation metrics"""
+        if not self.pool:
+            return {"status": "disconnected"}
+        return self.pool.metrics()
     
-    async def _create_tables_if_not_exist(self):
-        """Create AI-related tables if they don't exist"""
+    async def _check_schema_version(self):
+        """
+        Fail fast when the database is behind this build's migrations. One
+        primary-key lookup; the DDL itself runs once per deploy via migrate.py.
+        """
+        expected = latest_version()
         try:
-            cursor = self.connection.cursor()
-            
-            # Create AI generation sessions table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS ai_generation_sessions (
-                    id SERIAL PRIMARY KEY,
-                    topic_input TEXT NOT NULL,
-                    user_id INTEGER NOT NULL,
-                    content_type VARCHAR(10) DEFAULT 'article', -- 'article' or 'recipe'
-                    session_timestamp TIMESTAMP DEFAULT NOW(),
-                    status VARCHAR(20) DEFAULT 'processing',
-                    
-                    model_used VARCHAR(50),
-                    total_tokens INTEGER,
-                    total_cost DECIMAL(8,4),
-                    processing_time_seconds INTEGER,
-                    quality_score INTEGER,
-                    
-                    generated_data JSONB, -- Store the complete generated content
-                    cms_article_id INTEGER,
-                    cms_recipe_id INTEGER,
-                    error_message TEXT,
-                    
-                    created_at TIMESTAMP DEFAULT NOW(),
-                    updated_at TIMESTAMP DEFAULT NOW()
-                );
-            """)
-            
-            # Add AI metadata columns to articles table if they don't exist
-            cursor.execute("""
-                DO $$
-                BEGIN
-                    IF NOT EXISTS (SELECT 1 FROM information_schema.columns 
-                                  WHERE table_name='articles' AND column_name='ai_generated') THEN
-                        ALTER TABLE articles ADD COLUMN ai_generated BOOLEAN DEFAULT FALSE;
-                    END IF;
-                    
-                    IF NOT EXISTS (SELECT 1 FROM information_schema.columns 
-                                  WHERE table_name='articles' AND column_name='generation_prompt') THEN
-                        ALTER TABLE articles ADD COLUMN generation_prompt TEXT;
-                    END IF;
-                    
-                    IF NOT EXISTS (SELECT 1 FROM information_schema.columns 
-                                  WHERE table_name='articles' AND column_name='ai_model_used') THEN
-                        ALTER TABLE articles ADD COLUMN ai_model_used VARCHAR(50);
-                    END IF;
-                    
-                    IF NOT EXISTS (SELECT 1 FROM information_schema.columns 
-                                  WHERE table_name='articles' AND column_name='generation_timestamp') THEN
-                        ALTER TABLE articles ADD COLUMN generation_timestamp TIMESTAMP;
-                    END IF;
-                    
-                    IF NOT EXISTS (SELECT 1 FROM information_schema.columns 
-                                  WHERE table_name='articles' AND column_name='fact_check_notes') THEN
-                        ALTER TABLE articles ADD COLUMN fact_check_notes JSONB;
-                    END IF;
-                    
-                    IF NOT EXISTS (SELECT 1 FROM information_schema.columns 
-                                  WHERE table_name='articles' AND column_name='ai_quality_score') THEN
-                        ALTER TABLE articles ADD COLUMN ai_quality_score INTEGER;
-                    END IF;
-                    
-                    IF NOT EXISTS (SELECT 1 FROM information_schema.columns 
-                                  WHERE table_name='articles' AND column_name='generation_cost') THEN
-                        ALTER TABLE articles ADD COLUMN generation_cost DECIMAL(8,4);
-                    END IF;
-                END
-                $$;
-            """)
-            
-            # Add AI metadata columns to recipes table if they don't exist
-            cursor.execute("""
-                DO $$
-                BEGIN
-                    IF NOT EXISTS (SELECT 1 FROM information_schema.columns 
-                                  WHERE table_name='recipes' AND column_name='ai_generated') THEN
-                        ALTER TABLE recipes ADD COLUMN ai_generated BOOLEAN DEFAULT FALSE;
-                    END IF;
-                    
-                    IF NOT EXISTS (SELECT 1 FROM information_schema.columns 
-                                  WHERE table_name='recipes' AND column_name='generation_prompt') THEN
-                        ALTER TABLE recipes ADD COLUMN generation_prompt TEXT;
-                    END IF;
-                    
-                    IF NOT EXISTS (SELECT 1 FROM information_schema.columns 
-                                  WHERE table_name='recipes' AND column_name='ai_model_used') THEN
-                        ALTER TABLE recipes ADD COLUMN ai_model_used VARCHAR(50);
-                    END IF;
-                    
-                    IF NOT EXISTS (SELECT 1 FROM information_schema.columns 
-                                  WHERE table_name='recipes' AND column_name='generation_timestamp') THEN
-                        ALTER TABLE recipes ADD COLUMN generation_timestamp TIMESTAMP;
-                    END IF;
-                    
-                    IF NOT EXISTS (SELECT 1 FROM information_schema.columns 
-                                  WHERE table_name='recipes' AND column_name='ai_quality_score') THEN
-                        ALTER TABLE recipes ADD COLUMN ai_quality_score INTEGER;
-                    END IF;
-                    
-                    IF NOT EXISTS (SELECT 1 FROM information_schema.columns 
-                                  WHERE table_name='recipes' AND column_name='generation_cost') THEN
-                        ALTER TABLE recipes ADD COLUMN generation_cost DECIMAL(8,4);
-                    END IF;
-                END
-                $$;
-            """)
-            
-            self.connection.commit()
-            cursor.close()
-            logger.info("Database tables verified/created successfully")
-            
-        except Exception as e:
-            logger.error(f"Failed to create database tables: {str(e)}")
-            raise e
+            async with self.pool.transaction() as cursor:
+                await cursor.execute("SELECT MAX(version) AS version FROM ai_schema_migrations")
+                current = (await cursor.fetchone())['version'] or 0
+        except psycopg2.errors.UndefinedTable:
+            current = 0
+        
+        if current < expected:
+            raise MigrationError(
+                f"Database schema is at version {current} but this build needs {expected}; run `python migrate.py`"
+            )
+        logger.info(f"Database schema version {current} verified")
     
     async def create_generation_session(
         self, 
         topic: str, 
         user_id: int, 
         options: Dict[str, Any] = None,
-        content_type: str = 'article'
-    ) -> GenerationSession:
-        """Create a new generation session"""
+        content_type: str = 'article',
+        idempotency_key: str = None,
+        request_fingerprint: str = None
+    ) -> Optional[GenerationSession]:
+        """
+        Create a new generation session. Returns None when idempotency_key is
+        already held by another of the user's sessions.
+        """
         try:
-            cursor = self.connection.cursor()
-            
-            cursor.execute("""
-                INSERT INTO ai_generation_sessions (topic_input, user_id, content_type, status)
-                VALUES (%s, %s, %s, %s)
-                RETURNING id, topic_input, user_id, content_type, session_timestamp, status
-            """, (topic, user_id, content_type, 'processing'))
+            async with self.pool.transaction() as cursor:
+                await cursor.execute("""
+                    INSERT INTO ai_generation_sessions
+                        (topic_input, user_id, content_type, status, generation_options,
+                         idempotency_key, request_fingerprint)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    ON CONFLICT (user_id, idempotency_key) WHERE idempotency_key IS NOT NULL DO NOTHING
+                    RETURNING id, topic_input, user_id, content_type, session_timestamp, status
+                """, (
+                    topic, user_id, content_type, 'processing', json.dumps(options or {}, default=str),
+                    idempotency_key, request_fingerprint
+                ))
+                
+                result = await cursor.fetchone()
             
-            result = cursor.fetchone()
-            self.connection.commit()
-            cursor.close()
+            if not result:
+                logger.info(f"Idempotency key already used by user {user_id}")
+                return None
             
             session = GenerationSession(
                 id=result['id'],
@@ -197,6 +186,58 @@ class DatabaseService:
             logger.error(f"Failed to create generation session: {str(e)}")
             raise e
     
+    async def create_generation_sessions(
+        self,
+        items: List[Dict[str, Any]],
+        user_id: int
+    ) -> List[GenerationSession]:
+        """Create sessions for a batch in one multi-row INSERT; returned in input order"""
+        try:
+            # RETURNING order is unspecified, so ids are drawn per item up front and each
+            # created row is matched back to its item's index (numbered is evaluated once)
+            async with self.pool.transaction() as cursor:
+                rows = await cursor.execute_values("""
+                    WITH item (item_index, topic_input, user_id, content_type, generation_options) AS (
+                        VALUES %s
+                    ),
+                    numbered AS (
+                        SELECT nextval(pg_get_serial_sequence('ai_generation_sessions', 'id')) AS id, *
+                        FROM item
+                    ),
+                    created AS (
+                        INSERT INTO ai_generation_sessions (id, topic_input, user_id, content_type, status, generation_options)
+                        SELECT id, topic_input, user_id, content_type, 'processing', generation_options
+                        FROM numbered
+                        RETURNING id, topic_input, user_id, content_type, session_timestamp, status
+                    )
+                    SELECT created.*, numbered.item_index
+                    FROM created JOIN numbered USING (id)
+                """, [
+                    (
+                        index, item["topic"], user_id, item.get("content_type", "article"),
+                        json.dumps(item.get("options") or {}, default=str)
+                    )
+                    for index, item in enumerate(items)
+                ], template="(%s, %s, %s, %s, %s::jsonb)", fetch=True)
+            
+            sessions = [
+                GenerationSession(
+                    id=row['id'],
+                    topic_input=row['topic_input'],
+                    user_id=row['user_id'],
+                    session_timestamp=row['session_timestamp'],
+                    status=row['status']
+                )
+                for row in sorted(rows, key=lambda r: r['item_index'])
+            ]
+            
+            logger.info(f"Created {len(sessions)} generation sessions for user {user_id}")
+            return sessions
+            
+        except Exception as e:
+            logger.error(f"Failed to create generation sessions: {str(e)}")
+            raise e
+    
     async def update_generation_session(
         self, 
         session_id: int, 
@@ -206,8 +247,6 @@ class DatabaseService:
     ):
         """Update generation session with results"""
         try:
-            cursor = self.connection.cursor()
-            
             update_fields = ["status = %s", "updated_at = NOW()"]
             values = [status]
             
@@ -233,15 +272,44 @@ class DatabaseService:
             
             values.append(session_id)
             
+            finishing = status in FINISHED_STATUSES
+            if finishing:
+                # Only the first finish counts: a finished session changes again only via resume
+                values.append(FINISHED_STATUSES)
+            
             query = f"""
                 UPDATE ai_generation_sessions 
                 SET {', '.join(update_fields)}
-                WHERE id = %s
+                WHERE id = %s{" AND status NOT IN %s" if finishing else ""}
             """
             
-            cursor.execute(query, values)
-            self.connection.commit()
-            cursor.close()
+            if finishing:
+                # Count the finished session in the analytics rollups in the same statement
+                query = f"""
+                    WITH finished AS ({query} RETURNING {ROLLUP_SOURCE_COLUMNS}),{rollup_ctes("finished")}
+                    SELECT 1
+                """
+            else:
+                # Reopening a finished session (resume) takes its outcome back out of the
+                # rollups; the row lock keeps concurrent resumes from subtracting it twice
+                query = f"""
+                    WITH reopened AS (
+                        SELECT {ROLLUP_SOURCE_COLUMNS} FROM ai_generation_sessions
+                        WHERE id = %s AND status IN %s
+                        FOR UPDATE
+                    ),
+                    updated AS ({query}),{rollup_ctes("reopened", subtract=True)}
+                    SELECT 1
+                """
+                values = [session_id, FINISHED_STATUSES] + values
+            
+            async with self.pool.transaction() as cursor:
+                await cursor.execute(query, values)
+                if status == "completed":
+                    # Finished sessions are never resumed
+                    await cursor.execute(
+                        "DELETE FROM ai_generation_checkpoints WHERE session_id = %s", (session_id,)
+                    )
             
             logger.info(f"Updated generation session {session_id} with status {status}")
             
@@ -249,18 +317,124 @@ class DatabaseService:
             logger.error(f"Failed to update generation session {session_id}: {str(e)}")
             raise e
     
+    async def save_checkpoint(self, session_id: int, step: str, result: Dict[str, Any]):
+        """Store a finished pipeline step's result for the session"""
+        async with self.pool.transaction() as cursor:
+            await cursor.execute("""
+                INSERT INTO ai_generation_checkpoints (session_id, step, result)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (session_id, step) DO UPDATE SET
+                    result = EXCLUDED.result,
+                    created_at = NOW()
+            """, (session_id, step, json.dumps(result, default=str)))
+    
+    async def get_checkpoints(self, session_id: int) -> Dict[str, Dict[str, Any]]:
+        """Checkpointed step results for a session, by step name"""
+        async with self.pool.transaction() as cursor:
+            await cursor.execute("""
+                SELECT step, result FROM ai_generation_checkpoints WHERE session_id = %s
+            """, (session_id,))
+            rows = await cursor.fetchall()
+        
+        return {
+            row['step']: json.loads(row['result']) if isinstance(row['result'], str) else row['result']
+            for row in rows
+        }
+    
+    async def get_claim_verifications(self, claim_hashes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Cached verifications for the given claim hashes, marking them as used"""
+        if not claim_hashes:
+            return {}
+        
+        async with self.pool.transaction() as cursor:
+            await cursor.execute("""
+                UPDATE ai_fact_check_claims
+                SET hit_count = hit_count + 1, last_used_at = NOW()
+                WHERE claim_hash = ANY(%s)
+                  AND verified_at > NOW() - make_interval(days => %s)
+                RETURNING claim_hash, verdict, citation, note
+            """, (list(claim_hashes), int(os.getenv("AI_CLAIM_CACHE_TTL_DAYS", 180))))
+            rows = await cursor.fetchall()
+        
+        return {
+            row['claim_hash']: {
+                "verdict": row['verdict'],
+                "citation": row['citation'],
+                "note": row['note']
+            }
+            for row in rows
+        }
+    
+    async def save_claim_verifications(self, verifications: List[Dict[str, Any]]):
+        """Upsert fresh claim verifications into the shared cache"""
+        if not verifications:
+            return
+        
+        async with self.pool.transaction() as cursor:
+            await cursor.execute_values("""
+                INSERT INTO ai_fact_check_claims (claim_hash, claim_text, verdict, citation, note, model_used)
+                VALUES %s
+                ON CONFLICT (claim_hash) DO UPDATE SET
+                    verdict = EXCLUDED.verdict,
+                    citation = EXCLUDED.citation,
+                    note = EXCLUDED.note,
+                    model_used = EXCLUDED.model_used,
+                    verified_at = NOW(),
+                    last_used_at = NOW()
+            """, [
+                (v["claim_hash"], v["claim_text"], v["verdict"], v.get("citation"), v.get("note"), v.get("model_used"))
+                for v in verifications
+            ])
+        
+        logger.info(f"Cached {len(verifications)} claim verifications")
+    
+    async def get_output_stats(self) -> List[Dict[str, Any]]:
+        """Output token and word totals per model, for seeding the output budget"""
+        async with self.pool.transaction() as cursor:
+            await cursor.execute("SELECT model, output_tokens, words, samples FROM ai_model_output_stats")
+            return [dict(row) for row in await cursor.fetchall()]
+    
+    async def record_output_stats(self, model: str, output_tokens: int, words: int):
+        """Add one completion to a model's output totals"""
+        async with self.pool.transaction() as cursor:
+            await cursor.execute("""
+                INSERT INTO ai_model_output_stats (model, output_tokens, words, samples)
+                VALUES (%s, %s, %s, 1)
+                ON CONFLICT (model) DO UPDATE SET
+                    output_tokens = ai_model_output_stats.output_tokens + EXCLUDED.output_tokens,
+                    words = ai_model_output_stats.words + EXCLUDED.words,
+                    samples = ai_model_output_stats.samples + 1,
+                    updated_at = NOW()
+            """, (model, output_tokens, words))
+    
+    async def get_session_by_idempotency_key(self, user_id: int, idempotency_key: str) -> Optional[Dict[str, Any]]:
+        """The user's session created with this Idempotency-Key, if any"""
+        async with self.pool.transaction() as cursor:
+            await cursor.execute("""
+                SELECT * FROM ai_generation_sessions
+                WHERE user_id = %s AND idempotency_key = %s
+            """, (user_id, idempotency_key))
+            result = await cursor.fetchone()
+        
+        return dict(result) if result else None
+    
+    async def release_idempotency_key(self, session_id: int):
+        """Detach the key from a failed session so a retry can start a new generation"""
+        async with self.pool.transaction() as cursor:
+            await cursor.execute("""
+                UPDATE ai_generation_sessions SET idempotency_key = NULL WHERE id = %s
+            """, (session_id,))
+    
     async def get_generation_session(self, session_id: int, user_id: int) -> Optional[Dict[str, Any]]:
         """Retrieve generation session by ID"""
         try:
-            cursor = self.connection.cursor()
-            
-            cursor.execute("""
-                SELECT * FROM ai_generation_sessions 
-                WHERE id = %s AND user_id = %s
-            """, (session_id, user_id))
-            
-            result = cursor.fetchone()
-            cursor.close()
+            async with self.pool.transaction() as cursor:
+                await cursor.execute("""
+                    SELECT * FROM ai_generation_sessions 
+                    WHERE id = %s AND user_id = %s
+                """, (session_id, user_id))
+                
+                result = await cursor.fetchone()
             
             if result:
                 return dict(result)
@@ -278,16 +452,15 @@ class DatabaseService:
     ) -> int:
         """Save generated content as CMS draft (article or recipe)"""
         try:
-            cursor = self.connection.cursor()
-            
             content_type = session.get('content_type', 'article')
             
-            if content_type == 'article':
-                return await self._save_article_draft(cursor, session, generated_content, user_id)
-            elif content_type == 'recipe':
-                return await self._save_recipe_draft(cursor, session, generated_content, user_id)
-            else:
+            if content_type not in ('article', 'recipe'):
                 raise ValueError(f"Unsupported content type: {content_type}")
+            
+            async with self.pool.transaction() as cursor:
+                if content_type == 'article':
+                    return await self._save_article_draft(cursor, session, generated_content, user_id)
+                return await self._save_recipe_draft(cursor, session, generated_content, user_id)
                 
         except Exception as e:
             logger.error(f"Failed to save CMS draft for session {session['id']}: {str(e)}")
@@ -300,66 +473,59 @@ class DatabaseService:
         article_data: Dict[str, Any],
         user_id: int
     ) -> int:
-        """Save generated article as draft"""
-        try:
-            # Determine category from topic or use default
-            category = self._infer_category_from_topic(session['topic_input'])
-            
-            # Create factoid data if this is educational content
-            factoid_data = self._create_factoid_data(article_data, category)
-            
-            cursor.execute("""
-                INSERT INTO articles (
-                    title, slug, content, excerpt, author, category, 
-                    factoid_data, meta_title, meta_description, tags, status,
-                    ai_generated, generation_prompt, ai_model_used, 
-                    generation_timestamp, fact_check_notes, ai_quality_score, generation_cost,
-                    created_at, updated_at
-                ) VALUES (
-                    %s, %s, %s, %s, %s, %s,
-                    %s, %s, %s, %s, %s,
-                    %s, %s, %s, %s, %s, %s, %s,
-                    NOW(), NOW()
-                )
-                RETURNING id
-            """, (
-                article_data.get('title', f"AI Generated: {session['topic_input']}"),
-                article_data.get('slug', slugify(session['topic_input'])),
-                article_data.get('content', ''),
-                article_data.get('excerpt', ''),
-                'AI Assistant',
-                category,
-                json.dumps(factoid_data) if factoid_data else None,
-                article_data.get('meta_title', ''),
-                article_data.get('meta_description', ''),
-                article_data.get('tags', []),
-                'draft',
-                True,
-                session['topic_input'],
-                session.get('model_used'),
-                session.get('session_timestamp'),
-                json.dumps(article_data.get('fact_check_notes', {})),
-                session.get('quality_score'),
-                session.get('total_cost')
-            ))
-            
-            article_id = cursor.fetchone()['id']
-            
-            # Update session with CMS article ID
-            cursor.execute("""
-                UPDATE ai_generation_sessions 
-                SET cms_article_id = %s, generated_data = %s
-                WHERE id = %s
-            """, (article_id, json.dumps(article_data), session['id']))
-            
-            self.connection.commit()
-            
-            logger.info(f"Saved session {session['id']} as article draft {article_id}")
-            return article_id
-            
-        except Exception as e:
-            self.connection.rollback()
-            raise e
+        """Save generated article as draft (commit/rollback is owned by the caller's transaction)"""
+        # Determine category from topic or use default
+        category = self._infer_category_from_topic(session['topic_input'])
+        
+        # Create factoid data if this is educational content
+        factoid_data = self._create_factoid_data(article_data, category)
+        
+        await cursor.execute("""
+            INSERT INTO articles (
+                title, slug, content, excerpt, author, category, 
+                factoid_data, meta_title, meta_description, tags, status,
+                ai_generated, generation_prompt, ai_model_used, 
+                generation_timestamp, fact_check_notes, ai_quality_score, generation_cost,
+                created_at, updated_at
+            ) VALUES (
+                %s, %s, %s, %s, %s, %s,
+                %s, %s, %s, %s, %s,
+                %s, %s, %s, %s, %s, %s, %s,
+                NOW(), NOW()
+            )
+            RETURNING id
+        """, (
+            article_data.get('title', f"AI Generated: {session['topic_input']}"),
+            article_data.get('slug', slugify(session['topic_input'])),
+            article_data.get('content', ''),
+            article_data.get('excerpt', ''),
+            'AI Assistant',
+            category,
+            json.dumps(factoid_data) if factoid_data else None,
+            article_data.get('meta_title', ''),
+            article_data.get('meta_description', ''),
+            article_data.get('tags', []),
+            'draft',
+            True,
+            session['topic_input'],
+            session.get('model_used'),
+            session.get('session_timestamp'),
+            json.dumps(article_data.get('fact_check_notes', {})),
+            session.get('quality_score'),
+            session.get('total_cost')
+        ))
+            
+        article_id = (await cursor.fetchone())['id']
+            
+        # Update session with CMS article ID
+        await cursor.execute("""
+            UPDATE ai_generation_sessions 
+            SET cms_article_id = %s, generated_data = %s
+            WHERE id = %s
+        """, (article_id, json.dumps(article_data), session['id']))
+            
+        logger.info(f"Saved session {session['id']} as article draft {article_id}")
+        return article_id
     
     async def _save_recipe_draft(
         self, 
@@ -368,75 +534,68 @@ class DatabaseService:
         recipe_data: Dict[str, Any],
         user_id: int
     ) -> int:
-        """Save generated recipe as draft"""
-        try:
-            # Determine category from topic
-            category = self._infer_category_from_topic(session['topic_input'])
-            
-            cursor.execute("""
-                INSERT INTO recipes (
-                    title, slug, description, prep_time, cook_time, servings, difficulty,
-                    ingredients, instructions, category, meal_type, dietary_tags,
-                    calories_per_serving, protein_grams, fiber_grams,
-                    nutritional_highlights, health_benefits, meta_title, meta_description, status,
-                    ai_generated, generation_prompt, ai_model_used, 
-                    generation_timestamp, ai_quality_score, generation_cost,
-                    created_at, updated_at
-                ) VALUES (
-                    %s, %s, %s, %s, %s, %s, %s,
-                    %s, %s, %s, %s, %s,
-                    %s, %s, %s,
-                    %s, %s, %s, %s, %s,
-                    %s, %s, %s, %s, %s, %s,
-                    NOW(), NOW()
-                )
-                RETURNING id
-            """, (
-                recipe_data.get('title', f"AI Generated: {session['topic_input']}"),
-                recipe_data.get('slug', slugify(session['topic_input'])),
-                recipe_data.get('description', ''),
-                recipe_data.get('prep_time'),
-                recipe_data.get('cook_time'),
-                recipe_data.get('servings', 4),
-                recipe_data.get('difficulty', 'easy'),
-                json.dumps(recipe_data.get('ingredients', [])),
-                json.dumps(recipe_data.get('instructions', [])),
-                category,
-                recipe_data.get('meal_type', 'dinner'),
-                recipe_data.get('dietary_tags', []),
-                recipe_data.get('calories_per_serving'),
-                recipe_data.get('protein_grams'),
-                recipe_data.get('fiber_grams'),
-                recipe_data.get('nutritional_highlights', []),
-                recipe_data.get('health_benefits', []),
-                recipe_data.get('meta_title', ''),
-                recipe_data.get('meta_description', ''),
-                'draft',
-                True,
-                session['topic_input'],
-                session.get('model_used'),
-                session.get('session_timestamp'),
-                session.get('quality_score'),
-                session.get('total_cost')
-            ))
-            
-            recipe_id = cursor.fetchone()['id']
-            
-            # Update session with CMS recipe ID
-            cursor.execute("""
-                UPDATE ai_generation_sessions 
-                SET cms_recipe_id = %s, generated_data = %s
-                WHERE id = %s
-            """, (recipe_id, json.dumps(recipe_data), session['id']))
-            
-            self.connection.commit()
-            
-            logger.info(f"Saved session {session['id']} as recipe draft {recipe_id}")
-            return recipe_id
-            
-        except Exception as e:
-            self.connection.rollback()
-            raise e
+        """Save generated recipe as draft (commit/rollback is owned by the caller's transaction)"""
+        # Determine category from topic
+        category = self._infer_category_from_topic(session['topic_input'])
+        
+        await cursor.execute("""
+            INSERT INTO recipes (
+                title, slug, description, prep_time, cook_time, servings, difficulty,
+                ingredients, instructions, category, meal_type, dietary_tags,
+                calories_per_serving, protein_grams, fiber_grams,
+                nutritional_highlights, health_benefits, meta_title, meta_description, status,
+                ai_generated, generation_prompt, ai_model_used, 
+                generation_timestamp, ai_quality_score, generation_cost,
+                created_at, updated_at
+            ) VALUES (
+                %s, %s, %s, %s, %s, %s, %s,
+                %s, %s, %s, %s, %s,
+                %s, %s, %s,
+                %s, %s, %s, %s, %s,
+                %s, %s, %s, %s, %s, %s,
+                NOW(), NOW()
+            )
+            RETURNING id
+        """, (
+            recipe_data.get('title', f"AI Generated: {session['topic_input']}"),
+            recipe_data.get('slug', slugify(session['topic_input'])),
+            recipe_data.get('description', ''),
+            recipe_data.get('prep_time'),
+            recipe_data.get('cook_time'),
+            recipe_data.get('servings', 4),
+            recipe_data.get('difficulty', 'easy'),
+            json.dumps(recipe_data.get('ingredients', [])),
+            json.dumps(recipe_data.get('instructions', [])),
+            category,
+            recipe_data.get('meal_type', 'dinner'),
+            recipe_data.get('dietary_tags', []),
+            recipe_data.get('calories_per_serving'),
+            recipe_data.get('protein_grams'),
+            recipe_data.get('fiber_grams'),
+            recipe_data.get('nutritional_highlights', []),
+            recipe_data.get('health_benefits', []),
+            recipe_data.get('meta_title', ''),
+            recipe_data.get('meta_description', ''),
+            'draft',
+            True,
+            session['topic_input'],
+            session.get('model_used'),
+            session.get('session_timestamp'),
+            session.get('quality_score'),
+            session.get('total_cost')
+        ))
+            
+        recipe_id = (await cursor.fetchone())['id']
+            
+        # Update session with CMS recipe ID
+        await cursor.execute("""
+            UPDATE ai_generation_sessions 
+            SET cms_recipe_id = %s, generated_data = %s
+            WHERE id = %s
+        """, (recipe_id, json.dumps(recipe_data), session['id']))
+            
+        logger.info(f"Saved session {session['id']} as recipe draft {recipe_id}")
+        return recipe_id
     
     def _infer_category_from_topic(self, topic: str) -> str:
         """Infer content category from topic"""
@@ -477,77 +636,159 @@ class DatabaseService:
         
         return None
     
-    async def get_performance_analytics(self) -> Dict[str, Any]:
-        """Get AI model performance analytics"""
+    async def get_performance_analytics(self) -> PerformanceAnalytics:
+        """
+        AI model performance analytics, read from the hourly, daily and topic
+        rollups only; cost grows with days and models, not with sessions.
+        """
         try:
-            cursor = self.connection.cursor()
-            
-            # Get total generations
-            cursor.execute("SELECT COUNT(*) as total FROM ai_generation_sessions")
-            total_generations = cursor.fetchone()['total']
-            
-            # Get model performance stats
-            cursor.execute("""
-                SELECT 
-                    model_used,
-                    COUNT(*) as total_generations,
-                    AVG(quality_score) as avg_quality,
-                    AVG(total_cost) as avg_cost,
-                    AVG(processing_time_seconds) as avg_time,
-                    COUNT(CASE WHEN status = 'completed' THEN 1 END)::float / COUNT(*) as success_rate
-                FROM ai_generation_sessions 
-                WHERE model_used IS NOT NULL
-                GROUP BY model_used
-            """)
-            
-            model_stats = cursor.fetchall()
-            
-            # Get cost summary
-            cursor.execute("""
-                SELECT 
-                    SUM(total_cost) as total_cost,
-                    AVG(total_cost) as avg_cost_per_article,
-                    DATE(created_at) as date,
-                    SUM(total_cost) as daily_cost
-                FROM ai_generation_sessions 
-                WHERE total_cost IS NOT NULL
-                    AND created_at >= NOW() - INTERVAL '30 days'
-                GROUP BY DATE(created_at)
-                ORDER BY date DESC
-                LIMIT 30
-            """)
-            
-            cost_data = cursor.fetchall()
-            
-            cursor.close()
-            
-            return {
-                "total_generations": total_generations,
-                "model_performance": [dict(row) for row in model_stats],
-                "cost_trends": [dict(row) for row in cost_data],
-                "last_updated": datetime.now()
-            }
+            async with self.pool.transaction() as cursor:
+                # Per-model totals
+                await cursor.execute("""
+                    SELECT
+                        model_used,
+                        SUM(generations) AS generations,
+                        SUM(completed) AS completed,
+                        SUM(total_cost) AS total_cost,
+                        SUM(total_processing_seconds) AS processing_seconds,
+                        SUM(quality_sum) AS quality_sum,
+                        SUM(quality_count) AS quality_count,
+                        MAX(updated_at) AS last_updated
+                    FROM ai_generation_rollups_daily
+                    GROUP BY model_used
+                    ORDER BY generations DESC
+                """)
+                model_rows = await cursor.fetchall()
+                
+                # Daily cost and quality per model over the last 30 days
+                await cursor.execute("""
+                    SELECT
+                        bucket AS date,
+                        model_used,
+                        SUM(generations) AS generations,
+                        SUM(total_cost) AS daily_cost,
+                        SUM(quality_sum) AS quality_sum,
+                        SUM(quality_count) AS quality_count
+                    FROM ai_generation_rollups_daily
+                    WHERE bucket > CURRENT_DATE - 30
+                    GROUP BY bucket, model_used
+                    ORDER BY bucket
+                """)
+                daily_rows = await cursor.fetchall()
+                
+                # Last 24 hours
+                await cursor.execute("""
+                    SELECT
+                        COALESCE(SUM(generations), 0) AS generations,
+                        COALESCE(SUM(total_cost), 0) AS total_cost
+                    FROM ai_generation_rollups_hourly
+                    WHERE bucket > date_trunc('hour', NOW()) - INTERVAL '24 hours'
+                """)
+                last_day = await cursor.fetchone()
+                
+                await cursor.execute("""
+                    SELECT topic, content_type, generations, completed, last_generated_at
+                    FROM ai_topic_rollups
+                    ORDER BY generations DESC, last_generated_at DESC
+                    LIMIT %s
+                """, (int(os.getenv("AI_ANALYTICS_TOP_TOPICS", 10)),))
+                topic_rows = await cursor.fetchall()
+            
+            models = [
+                AIModelPerformance(
+                    model_name=row['model_used'],
+                    total_generations=row['generations'],
+                    average_quality_score=round(row['quality_sum'] / row['quality_count'], 2) if row['quality_count'] else 0.0,
+                    average_cost=round(float(row['total_cost']) / row['completed'], 4) if row['completed'] else 0.0,
+                    average_processing_time=round(row['processing_seconds'] / row['completed'], 2) if row['completed'] else 0.0,
+                    success_rate=round(row['completed'] / row['generations'], 3) if row['generations'] else 0.0,
+                    last_updated=row['last_updated']
+                )
+                for row in model_rows
+            ]
+            
+            total_generations = sum(row['generations'] for row in model_rows)
+            total_completed = sum(row['completed'] for row in model_rows)
+            total_cost = sum(float(row['total_cost']) for row in model_rows)
+            
+            cost_by_day: Dict[str, Dict[str, Any]] = {}
+            quality_by_day: Dict[str, Dict[str, List[int]]] = {}
+            for row in daily_rows:
+                date = row['date'].isoformat()
+                day = cost_by_day.setdefault(date, {"date": date, "generations": 0, "daily_cost": 0.0})
+                day["generations"] += row['generations']
+                day["daily_cost"] += float(row['daily_cost'])
+                if row['quality_count']:
+                    for key in ("overall", row['model_used']):
+                        totals = quality_by_day.setdefault(key, {}).setdefault(date, [0, 0])
+                        totals[0] += row['quality_sum']
+                        totals[1] += row['quality_count']
+            
+            return PerformanceAnalytics(
+                total_generations=total_generations,
+                models=models,
+                cost_summary={
+                    "total_cost": round(total_cost, 4),
+                    "average_cost_per_generation": round(total_cost / total_completed, 4) if total_completed else 0.0,
+                    "last_30_days_cost": round(sum(day["daily_cost"] for day in cost_by_day.values()), 4),
+                    "last_24_hours_cost": round(float(last_day['total_cost']), 4),
+                    "last_24_hours_generations": float(last_day['generations'])
+                },
+                # Average quality per day with scored generations, oldest first
+                quality_trends={
+                    key: [
+                        {"date": date, "average_quality": round(total / count, 2)}
+                        for date, (total, count) in days.items()
+                    ]
+                    for key, days in quality_by_day.items()
+                },
+                popular_topics=[dict(row) for row in topic_rows],
+                cost_trends=[
+                    {**day, "daily_cost": round(day["daily_cost"], 4)}
+                    for day in sorted(cost_by_day.values(), key=lambda day: day["date"], reverse=True)
+                ],
+                last_updated=datetime.now()
+            )
             
         except Exception as e:
             logger.error(f"Failed to retrieve performance analytics: {str(e)}")
             raise e
     
-    async def track_analytics(
-        self, 
-        session_id: int, 
-        model_performance: Dict[str, Any], 
-        quality_metrics: Dict[str, Any]
-    ):
-        """Track analytics data for performance monitoring"""
-        try:
-            # This would be expanded to track detailed analytics
-            # For now, we'll just log the data
-            logger.info(f"Analytics tracked for session {session_id}: "
-                       f"Quality score: {quality_metrics.get('overall_score', 'N/A')}, "
-                       f"Model: {model_performance.get('model_used', 'N/A')}")
-            
-        except Exception as e:
-            logger.error(f"Failed to track analytics for session {session_id}: {str(e)}")
+    async def insert_generation_events(self, events: List[Dict[str, Any]]):
+        """Write a batch of analytics events in one multi-row INSERT"""
+        async with self.pool.transaction() as cursor:
+            await cursor.execute_values("""
+                INSERT INTO ai_generation_events (
+                    session_id, event_type, content_type, model_used, quality_score,
+                    tokens_used, input_tokens, output_tokens, cached_input_tokens, cost_usd,
+                    processing_time_seconds, cache_hits, cache_misses, retries, data, occurred_at
+                )
+                VALUES %s
+            """, [
+                (
+                    e["session_id"], e["event_type"], e.get("content_type"), e.get("model_used"),
+                    e.get("quality_score"), e.get("tokens_used"), e.get("input_tokens"),
+                    e.get("output_tokens"), e.get("cached_input_tokens"), e.get("cost_usd"),
+                    e.get("processing_time_seconds"), e.get("cache_hits"), e.get("cache_misses"),
+                    e.get("retries"), json.dumps(e.get("data") or {}, default=str), e["occurred_at"]
+                )
+                for e in events
+            ])
+    
+    async def complete_generation_session(
+        self,
+        session_id: int,
+        content_type: str,
+        content_data: Dict[str, Any],
+        metadata
+    ) -> int:
+        """
+        Finish a session in one transaction and one round trip: session metrics,
+        status and generated_data, the CMS draft row, checkpoint cleanup and
+        the analytics rollups.
+        Returns the CMS article or recipe ID.
+        """
+        return await self._save_to_cms(session_id, content_type, content_data, metadata, completed=True)
     
     async def save_article_to_cms(
         self,
@@ -557,98 +798,7 @@ class DatabaseService:
         card_position: str = None
     ) -> int:
         """Save generated article to CMS cms_articles table"""
-        try:
-            cursor = self.connection.cursor()
-            
-            # Determine category from article content or metadata
-            category = "lentils"  # Default
-            if "millet" in article_data.get("title", "").lower():
-                category = "millets"
-            
-            # Auto-assign card position if not provided
-            if not card_position:
-                if category == "lentils":
-                    # Find next available lentil position (L1-L8)
-                    cursor.execute("""
-                        SELECT card_position FROM cms_articles 
-                        WHERE card_position LIKE 'L%' 
-                        ORDER BY card_position
-                    """)
-                    used_positions = [row['card_position'] for row in cursor.fetchall()]
-                    for i in range(1, 9):  # L1-L8
-                        pos = f"L{i}"
-                        if pos not in used_positions:
-                            card_position = pos
-                            break
-                    # Fallback if all positions are taken
-                    if not card_position:
-                        card_position = f"L{len(used_positions) + 1}"
-                else:
-                    # Find next available millet position (M1-M8)
-                    cursor.execute("""
-                        SELECT card_position FROM cms_articles 
-                        WHERE card_position LIKE 'M%' 
-                        ORDER BY card_position
-                    """)
-                    used_positions = [row['card_position'] for row in cursor.fetchall()]
-                    for i in range(1, 9):  # M1-M8
-                        pos = f"M{i}"
-                        if pos not in used_positions:
-                            card_position = pos
-                            break
-                    # Fallback if all positions are taken
-                    if not card_position:
-                        card_position = f"M{len(used_positions) + 1}"
-            
-            # Insert article into cms_articles table
-            cursor.execute("""
-                INSERT INTO cms_articles (
-                    title, slug, content, excerpt, author, category, 
-                    card_position, meta_title, meta_description, 
-                    status, published_at, created_at, updated_at
-                ) VALUES (
-                    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW()
-                )
-                RETURNING id
-            """, (
-                article_data.get("title"),
-                article_data.get("slug"),
-                article_data.get("content"),
-                article_data.get("excerpt"),
-                "AI Assistant",  # Author
-                category,
-                card_position,
-                article_data.get("meta_title"),
-                article_data.get("meta_description"),
-                "draft",  # Status - save as draft initially
-                None  # published_at - will be set when published
-            ))
-            
-            cms_article_id = cursor.fetchone()['id']
-            
-            # Update the generation session with the CMS article ID
-            cursor.execute("""
-                UPDATE ai_generation_sessions 
-                SET cms_article_id = %s, 
-                    generated_data = %s,
-                    updated_at = NOW()
-                WHERE id = %s
-            """, (cms_article_id, json.dumps({
-                "article": article_data,
-                "metadata": metadata
-            }, default=str), session_id))
-            
-            self.connection.commit()
-            cursor.close()
-            
-            logger.info(f"Saved article to CMS: Article ID {cms_article_id}, Card Position {card_position}")
-            return cms_article_id
-            
-        except Exception as e:
-            if cursor:
-                cursor.close()
-            logger.error(f"Failed to save article to CMS: {str(e)}")
-            raise e
+        return await self._save_to_cms(session_id, "article", article_data, metadata, card_position=card_position)
     
     async def save_recipe_to_cms(
         self,
@@ -657,58 +807,174 @@ class DatabaseService:
         metadata: Dict[str, Any]
     ) -> int:
         """Save generated recipe to CMS cms_recipes table"""
+        return await self._save_to_cms(session_id, "recipe", recipe_data, metadata)
+    
+    async def _save_to_cms(
+        self,
+        session_id: int,
+        content_type: str,
+        content_data: Dict[str, Any],
+        metadata,
+        completed: bool = False,
+        card_position: str = None
+    ) -> int:
+        """
+        Insert the CMS row and link it to the session with data-modifying CTEs.
+        With completed, the same statement also records the session's metrics
+        (metadata is then a GenerationMetadata), drops its checkpoints and adds
+        the session to the analytics rollups.
+        """
+        metadata_dict = metadata.dict() if hasattr(metadata, 'dict') else metadata
+        key = "recipe" if content_type == "recipe" else "article"
+        
+        if content_type == "recipe":
+            lock = ""
+            insert, params = self._recipe_insert(content_data)
+        else:
+            lock, insert, params = self._article_insert(content_data, card_position)
+        
+        session_fields = [
+            f"cms_{key}_id = (SELECT id FROM cms)",
+            "generated_data = %(generated_data)s",
+            "updated_at = NOW()"
+        ]
+        params["session_id"] = session_id
+        params["generated_data"] = json.dumps({key: content_data, "metadata": metadata_dict}, default=str)
+        
+        finish_ctes = ""
+        if completed:
+            session_fields.extend([
+                "status = 'completed'",
+                "model_used = %(model_used)s",
+                "total_tokens = %(total_tokens)s",
+                "total_cost = %(total_cost)s",
+                "processing_time_seconds = %(processing_time_seconds)s",
+                "quality_score = %(quality_score)s"
+            ])
+            params.update({
+                "finished_statuses": FINISHED_STATUSES,
+                "model_used": metadata.model_used,
+                "total_tokens": metadata.tokens_used,
+                "total_cost": metadata.cost_usd,
+                "processing_time_seconds": int(metadata.processing_time_seconds),
+                "quality_score": metadata.quality_score
+            })
+            # Finished sessions are never resumed
+            finish_ctes = """,
+            checkpoints AS (
+                DELETE FROM ai_generation_checkpoints WHERE session_id = %(session_id)s
+            ),""" + rollup_ctes("linked_session")
+        
+        query = f"""{lock}
+            WITH cms AS (
+                {insert}
+            ),
+            linked_session AS (
+                UPDATE ai_generation_sessions
+                SET {', '.join(session_fields)}
+                WHERE id = %(session_id)s{" AND status NOT IN %(finished_statuses)s" if completed else ""}
+                RETURNING {ROLLUP_SOURCE_COLUMNS}
+            ){finish_ctes}
+            SELECT id, card_position FROM cms
+        """
+        
         try:
-            cursor = self.connection.cursor()
+            async with self.pool.transaction() as cursor:
+                await cursor.execute(query, params)
+                row = await cursor.fetchone()
             
-            # Insert recipe into cms_recipes table
-            cursor.execute("""
-                INSERT INTO cms_recipes (
+            if content_type == "recipe":
+                logger.info(f"Saved recipe to CMS: Recipe ID {row['id']}")
+            else:
+                if row['card_position'] is None and not card_position:
+                    logger.warning(f"All card positions on the {params['category']} page are taken, saved article unassigned")
+                logger.info(f"Saved article to CMS: Article ID {row['id']}, Card Position {row['card_position']}")
+            if completed:
+                logger.info(f"Updated generation session {session_id} with status completed")
+            return row['id']
+            
+        except Exception as e:
+            logger.error(f"Failed to save {content_type} to CMS: {str(e)}")
+            raise e
+    
+    def _article_insert(self, article_data: Dict[str, Any], card_position: str = None):
+        """(lock statement, INSERT for the cms CTE, params) for an AI article draft"""
+        # Determine category from article content or metadata
+        category = "lentils"  # Default
+        if "millet" in article_data.get("title", "").lower():
+            category = "millets"
+        
+        # Lock the category's card slots, then pick the lowest free one while inserting.
+        # Recipes share L4-L6 / M4-M6, so a slot held by either table is taken.
+        # The INSERT is a separate statement in the same round trip, run once the lock
+        # is granted, so it sees slots taken by saves that committed meanwhile.
+        lock = """
+            SELECT pg_advisory_xact_lock(hashtext('cms_articles.card_position'), hashtext(%(prefix)s));"""
+        insert = """INSERT INTO cms_articles (
+                    title, slug, content, excerpt, author, category, 
+                    card_position, meta_title, meta_description, 
+                    status, published_at, created_at, updated_at
+                )
+                SELECT
+                    %(title)s, %(slug)s, %(content)s, %(excerpt)s, %(author)s, %(category)s,
+                    COALESCE(%(card_position)s, (
+                        SELECT %(prefix)s || slot
+                        FROM generate_series(1, %(slots)s) AS slot
+                        WHERE NOT EXISTS (
+                            SELECT 1 FROM cms_articles WHERE card_position = %(prefix)s || slot
+                        )
+                        AND NOT EXISTS (
+                            SELECT 1 FROM cms_recipes WHERE card_position = %(prefix)s || slot
+                        )
+                        ORDER BY slot
+                        LIMIT 1
+                    )),
+                    %(meta_title)s, %(meta_description)s, %(status)s, %(published_at)s, NOW(), NOW()
+                RETURNING id, card_position"""
+        params = {
+            "prefix": "L" if category == "lentils" else "M",
+            "slots": CARD_SLOTS_PER_PAGE,
+            "title": article_data.get("title"),
+            "slug": article_data.get("slug"),
+            "content": article_data.get("content"),
+            "excerpt": article_data.get("excerpt"),
+            "author": "AI Assistant",
+            "category": category,
+            "card_position": card_position,  # Explicit position, or None to allocate
+            "meta_title": article_data.get("meta_title"),
+            "meta_description": article_data.get("meta_description"),
+            "status": "draft",  # Status - save as draft initially
+            "published_at": None  # published_at - will be set when published
+        }
+        return lock, insert, params
+    
+    def _recipe_insert(self, recipe_data: Dict[str, Any]):
+        """(INSERT for the cms CTE, params) for an AI recipe draft"""
+        insert = """INSERT INTO cms_recipes (
                     title, slug, description, prep_time, cook_time, 
                     servings, difficulty, ingredients, instructions,
                     nutritional_highlights, dietary_tags, author,
                     status, created_at, updated_at
                 ) VALUES (
-                    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW()
+                    %(title)s, %(slug)s, %(description)s, %(prep_time)s, %(cook_time)s,
+                    %(servings)s, %(difficulty)s, %(ingredients)s, %(instructions)s,
+                    %(nutritional_highlights)s, %(dietary_tags)s, %(author)s,
+                    %(status)s, NOW(), NOW()
                 )
-                RETURNING id
-            """, (
-                recipe_data.get("title"),
-                recipe_data.get("slug"),
-                recipe_data.get("excerpt", ""),
-                recipe_data.get("prep_time", 15),
-                recipe_data.get("cook_time", 30),
-                recipe_data.get("servings", 4),
-                recipe_data.get("difficulty", "easy"),
-                json.dumps(recipe_data.get("ingredients", [])),
-                json.dumps(recipe_data.get("instructions", [])),
-                json.dumps(recipe_data.get("nutritional_highlights", [])),
-                json.dumps(recipe_data.get("dietary_tags", ["plant-based"])),
-                "AI Assistant",
-                "draft"
-            ))
-            
-            cms_recipe_id = cursor.fetchone()['id']
-            
-            # Update the generation session with the CMS recipe ID
-            cursor.execute("""
-                UPDATE ai_generation_sessions 
-                SET cms_recipe_id = %s,
-                    generated_data = %s,
-                    updated_at = NOW()
-                WHERE id = %s
-            """, (cms_recipe_id, json.dumps({
-                "recipe": recipe_data,
-                "metadata": metadata
-            }, default=str), session_id))
-            
-            self.connection.commit()
-            cursor.close()
-            
-            logger.info(f"Saved recipe to CMS: Recipe ID {cms_recipe_id}")
-            return cms_recipe_id
-            
-        except Exception as e:
-            if cursor:
-                cursor.close()
-            logger.error(f"Failed to save recipe to CMS: {str(e)}")
-            raise e
\ No newline at end of file
+                RETURNING id, card_position"""
+        params = {
+            "title": recipe_data.get("title"),
+            "slug": recipe_data.get("slug"),
+            "description": recipe_data.get("excerpt", ""),
+            "prep_time": recipe_data.get("prep_time", 15),
+            "cook_time": recipe_data.get("cook_time", 30),
+            "servings": recipe_data.get("servings", 4),
+            "difficulty": recipe_data.get("difficulty", "easy"),
+            "ingredients": json.dumps(recipe_data.get("ingredients", [])),
+            "instructions": json.dumps(recipe_data.get("instructions", [])),
+            "nutritional_highlights": json.dumps(recipe_data.get("nutritional_highlights", [])),
+            "dietary_tags": json.dumps(recipe_data.get("dietary_tags", ["plant-based"])),
+            "author": "AI Assistant",
+            "status": "draft"
+        }
+        return insert, params
\ No newline at end of file
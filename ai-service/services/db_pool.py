@@ -0,0 +1,327 @@
+"""
+Async Connection Pool
+Bounded pool of psycopg2 connections for use from asyncio code
+"""
+
+import time
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Dict, Any, Optional, Sequence
+
+import psycopg2
+from psycopg2.extras import RealDictCursor, execute_values
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes available within the acquire timeout"""
+    pass
+
+class AsyncCursor:
+    """Cursor wrapper whose blocking calls run on the pool's executor"""
+
+    def __init__(self, pool: "AsyncConnectionPool", cursor):
+        self._pool = pool
+        self._cursor = cursor
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    async def execute(self, query: str, params: Optional[Sequence[Any]] = None):
+        await self._pool._run(self._cursor.execute, query, params)
+
+    async def execute_values(
+        self,
+        query: str,
+        argslist: Sequence[Sequence[Any]],
+        template: Optional[str] = None,
+        fetch: bool = False
+    ) -> Optional[list]:
+        """Multi-row VALUES statement sent as a single round trip"""
+        return await self._pool._run(
+            partial(
+                execute_values,
+                self._cursor,
+                query,
+                argslist,
+                template=template,
+                page_size=max(len(argslist), 1),
+                fetch=fetch
+            )
+        )
+
+    async def fetchone(self) -> Optional[Dict[str, Any]]:
+        return await self._pool._run(self._cursor.fetchone)
+
+    async def fetchall(self) -> list:
+        return await self._pool._run(self._cursor.fetchall)
+
+class AsyncConnectionPool:
+    """
+    Connection pool with per-checkout transactions.
+
+    Every blocking psycopg2 call runs on a dedicated thread pool sized to the
+    connection limit, so database work never blocks the event loop and each
+    request gets its own connection and transaction.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        min_size: int = 1,
+        max_size: int = 10,
+        acquire_timeout: float = 30.0,
+        health_check_interval: float = 30.0
+    ):
+        if min_size > max_size:
+            raise ValueError("min_size cannot exceed max_size")
+
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.health_check_interval = health_check_interval
+
+        self._idle = deque()  # (connection, last_used_monotonic)
+        self._size = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._semaphore = asyncio.Semaphore(max_size)
+        self._executor = ThreadPoolExecutor(max_workers=max_size, thread_name_prefix="db-pool")
+        self._executor_stopped = False
+        self._closed = False
+
+        # Saturation metrics
+        self._total_checkouts = 0
+        self._total_wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+        self._timeouts = 0
+        self._discarded = 0
+        self._failed_health_checks = 0
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args))
+
+    def _connect(self):
+        return psycopg2.connect(self.dsn, cursor_factory=RealDictCursor)
+
+    def _ping(self, connection) -> bool:
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            connection.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _close_quietly(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _cancel_quietly(self, connection):
+        """Ask the server to stop the connection's running query; safe from any thread"""
+        try:
+            connection.cancel()
+        except Exception:
+            pass
+
+    async def open(self):
+        """Open the minimum number of connections"""
+        for _ in range(self.min_size):
+            connection = await self._run(self._connect)
+            self._idle.append((connection, time.monotonic()))
+            self._size += 1
+        logger.info(f"Database pool opened (min={self.min_size}, max={self.max_size})")
+
+    async def close(self, drain_timeout: Optional[float] = None):
+        """
+        Stop new checkouts, wait up to drain_timeout (default acquire_timeout)
+        for checked-out connections to be released, then close every idle
+        connection and stop the executor. Connections released later are
+        closed inline.
+        """
+        self._closed = True
+        deadline = time.monotonic() + (self.acquire_timeout if drain_timeout is None else drain_timeout)
+        while self._in_use and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        if self._in_use:
+            logger.warning(f"Closing database pool with {self._in_use} connections still checked out")
+
+        while self._idle:
+            connection, _ = self._idle.popleft()
+            await self._run(self._close_quietly, connection)
+            self._size -= 1
+        self._executor_stopped = True
+        self._executor.shutdown(wait=False)
+        logger.info("Database pool closed")
+
+    async def _acquire(self):
+        if self._closed:
+            raise PoolTimeoutError("Connection pool is closed")
+
+        wait_start = time.monotonic()
+        self._waiting += 1
+        # Wait on the semaphore as a task so a permit granted just as the wait
+        # times out or is cancelled can be handed back instead of leaking
+        permit = asyncio.ensure_future(self._semaphore.acquire())
+        try:
+            await asyncio.wait({permit}, timeout=self.acquire_timeout)
+        except BaseException:
+            if permit.done() and not permit.cancelled():
+                self._semaphore.release()
+            else:
+                permit.cancel()
+            raise
+        finally:
+            self._waiting -= 1
+        if not permit.done():
+            permit.cancel()
+            self._timeouts += 1
+            raise PoolTimeoutError(
+                f"No database connection available within {self.acquire_timeout}s"
+            )
+
+        waited = time.monotonic() - wait_start
+        self._total_checkouts += 1
+        self._total_wait_seconds += waited
+        self._max_wait_seconds = max(self._max_wait_seconds, waited)
+
+        connection = None
+        try:
+            while self._idle:
+                connection, last_used = self._idle.pop()
+                if connection.closed:
+                    connection = None
+                    self._discard_counted()
+                    continue
+                # Only ping connections that sat idle long enough to have gone stale
+                if time.monotonic() - last_used > self.health_check_interval:
+                    if not await self._run(self._ping, connection):
+                        stale, connection = connection, None
+                        self._failed_health_checks += 1
+                        self._discard_counted()
+                        await self._run(self._close_quietly, stale)
+                        continue
+                self._in_use += 1
+                return connection
+
+            connection = await self._open_connection()
+            self._size += 1
+            self._in_use += 1
+            return connection
+
+        except BaseException:
+            # Includes cancellation (hedge loser, wait_for, client disconnect) mid
+            # health check: the popped connection is no longer tracked, so close it
+            if connection is not None:
+                self._discard_counted()
+                self._close_later(connection)
+            self._semaphore.release()
+            raise
+
+    async def _open_connection(self):
+        """New connection; if cancelled while connecting, it is closed once it arrives"""
+        future = asyncio.get_running_loop().run_in_executor(self._executor, self._connect)
+        try:
+            return await asyncio.shield(future)
+        except BaseException:
+            future.add_done_callback(self._close_abandoned)
+            raise
+
+    def _close_abandoned(self, future):
+        if not future.cancelled() and future.exception() is None:
+            self._close_quietly(future.result())
+
+    def _close_later(self, connection):
+        """Close without waiting; an executor thread may still be using the connection"""
+        if self._executor_stopped:
+            self._close_quietly(connection)
+        else:
+            self._executor.submit(self._close_quietly, connection)
+
+    def _discard_counted(self):
+        self._size -= 1
+        self._discarded += 1
+
+    async def _release(self, connection, discard: bool = False):
+        self._in_use -= 1
+        try:
+            if self._executor_stopped:
+                self._close_quietly(connection)
+                self._discard_counted()
+            elif discard or connection.closed or self._closed:
+                await self._run(self._close_quietly, connection)
+                self._discard_counted()
+            else:
+                self._idle.append((connection, time.monotonic()))
+        finally:
+            self._semaphore.release()
+
+    @asynccontextmanager
+    async def transaction(self):
+        """
+        Check out a connection and yield a cursor inside its own transaction.
+        Commits on success, rolls back on error; broken connections are discarded,
+        and so are connections whose task was cancelled mid-transaction.
+        """
+        connection = await self._acquire()
+        cursor = None
+        discard = False
+        try:
+            cursor = connection.cursor()
+            yield AsyncCursor(self, cursor)
+            await self._run(connection.commit)
+        except Exception as e:
+            # Connection-level failures poison the connection, so never reuse it
+            if isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError)):
+                discard = True
+            try:
+                await self._run(connection.rollback)
+            except Exception:
+                discard = True
+            raise
+        except BaseException:
+            # Cancelled (hedge loser, wait_for, client disconnect): the transaction is still
+            # open and an executor thread may still be running a query on this connection
+            discard = True
+            await asyncio.get_running_loop().run_in_executor(None, self._cancel_quietly, connection)
+            raise
+        finally:
+            if cursor is not None and not discard:
+                try:
+                    await self._run(cursor.close)
+                except Exception:
+                    discard = True
+            if connection.closed:
+                discard = True
+            await self._release(connection, discard=discard)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Pool size and saturation metrics"""
+        return {
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "size": self._size,
+            "in_use": self._in_use,
+            "idle": len(self._idle),
+            "waiting": self._waiting,
+            "utilization": round(self._in_use / self.max_size, 3),
+            "total_checkouts": self._total_checkouts,
+            "average_wait_ms": round(
+                self._total_wait_seconds / self._total_checkouts * 1000, 2
+            ) if self._total_checkouts else 0.0,
+            "max_wait_ms": round(self._max_wait_seconds * 1000, 2),
+            "acquire_timeouts": self._timeouts,
+            "discarded_connections": self._discarded,
+            "failed_health_checks": self._failed_health_checks
+        }
@@ -0,0 +1,154 @@
+"""
+Extractive Summarization
+TextRank-style sentence ranking over article markdown, used to shrink the
+summarization input or to summarize without a model
+"""
+
+import re
+import math
+from typing import Dict, List, Any, Optional
+
+from services.claims import SENTENCE, ANNOTATION, score_sentence
+
+WORD = re.compile(r"[a-z0-9]+")
+MARKDOWN = re.compile(r"[*_`>]|\[([^\]]*)\]\([^)]*\)")
+LIST_MARKER = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s+")
+LABEL_LINE = re.compile(r"^(TITLE|SUMMARY|KEY POINTS|QUICK TIPS|META DESCRIPTION):", re.IGNORECASE)
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "can", "for", "from", "has", "have",
+    "in", "into", "is", "it", "its", "of", "on", "or", "that", "the", "their", "them", "these",
+    "they", "this", "to", "was", "were", "which", "while", "with", "you", "your", "also", "more"
+}
+
+class Sentence:
+    """One plain-text sentence, its position in the article and its rank"""
+
+    def __init__(self, text: str, position: int, heading: Optional[str]):
+        self.text = text
+        self.position = position
+        self.heading = heading
+        self.words = {w for w in WORD.findall(text.lower()) if w not in STOPWORDS}
+        self.score = 0.0
+
+def split_sentences(markdown: str) -> List[Sentence]:
+    """Distinct plain-text sentences with the heading line they sit under"""
+    sentences = []
+    seen = set()
+    heading = None
+    for line in markdown.splitlines():
+        stripped = line.strip()
+        if not stripped or LABEL_LINE.match(stripped):
+            continue
+        if stripped.startswith("#"):
+            heading = stripped
+            continue
+        plain = MARKDOWN.sub(lambda m: m.group(1) or "", ANNOTATION.sub("", LIST_MARKER.sub("", stripped)))
+        for match in SENTENCE.finditer(plain):
+            text = match.group(0).strip()
+            if len(text) >= 20 and text.lower() not in seen:
+                seen.add(text.lower())
+                sentences.append(Sentence(text, len(sentences), heading))
+    return sentences
+
+def _redundant(sentence: Sentence, chosen: List[Sentence], threshold: float = 0.6) -> bool:
+    """Whether sentence mostly repeats the words of one already picked"""
+    for other in chosen:
+        union = sentence.words | other.words
+        if union and len(sentence.words & other.words) / len(union) >= threshold:
+            return True
+    return False
+
+def _similarity(a: Sentence, b: Sentence) -> float:
+    # TextRank overlap: shared words normalised by sentence lengths
+    if len(a.words) < 2 or len(b.words) < 2:
+        return 0.0
+    common = len(a.words & b.words)
+    return common / (math.log(len(a.words)) + math.log(len(b.words))) if common else 0.0
+
+def rank_sentences(sentences: List[Sentence], damping: float = 0.85, iterations: int = 30) -> List[Sentence]:
+    """Score sentences with weighted PageRank over the similarity graph"""
+    count = len(sentences)
+    if count == 0:
+        return []
+
+    weights = [[0.0] * count for _ in range(count)]
+    for i in range(count):
+        for j in range(i + 1, count):
+            weights[i][j] = weights[j][i] = _similarity(sentences[i], sentences[j])
+    totals = [sum(row) for row in weights]
+
+    scores = [1.0] * count
+    for _ in range(iterations):
+        scores = [
+            (1 - damping) + damping * sum(
+                weights[j][i] / totals[j] * scores[j]
+                for j in range(count) if weights[j][i] and totals[j]
+            )
+            for i in range(count)
+        ]
+
+    for sentence, score in zip(sentences, scores):
+        # Nudge factual sentences up: they make better key points
+        sentence.score = score * (1 + 0.1 * min(score_sentence(sentence.text), 5))
+    return sorted(sentences, key=lambda s: s.score, reverse=True)
+
+def _render_digest(chosen: List[Sentence]) -> str:
+    lines = []
+    heading = None
+    for sentence in sorted(chosen, key=lambda s: s.position):
+        if sentence.heading != heading and sentence.heading:
+            lines.append(f"\n{sentence.heading}")
+        heading = sentence.heading
+        lines.append(sentence.text)
+    return "\n".join(lines).strip()
+
+def build_digest(markdown: str, max_chars: int) -> str:
+    """
+    Top-ranked sentences, in article order under their headings, within max_chars
+    (heading lines included). Text already within the limit is returned unchanged.
+    """
+    if len(markdown) <= max_chars:
+        return markdown
+
+    chosen = []
+    digest = ""
+    for sentence in rank_sentences(split_sentences(markdown)):
+        if len(digest) + len(sentence.text) > max_chars or _redundant(sentence, chosen):
+            continue
+        # A sentence under a heading not shown yet also brings its heading line
+        candidate = _render_digest(chosen + [sentence])
+        if len(candidate) > max_chars:
+            continue
+        chosen.append(sentence)
+        digest = candidate
+    return digest
+
+def extractive_summary(markdown: str, key_points: int = 5, summary_words: int = 120) -> Dict[str, Any]:
+    """TITLE/SUMMARY/KEY POINTS equivalent built without a model"""
+    title_match = re.search(r"^(?:TITLE:\s*|#\s+)(.+)$", markdown, re.MULTILINE)
+    ranked = rank_sentences(split_sentences(markdown))
+
+    summary_sentences = []
+    words = 0
+    for sentence in ranked:
+        if words >= summary_words:
+            break
+        if _redundant(sentence, summary_sentences):
+            continue
+        summary_sentences.append(sentence)
+        words += len(sentence.text.split())
+
+    points = []
+    for sentence in ranked:
+        if len(points) == key_points:
+            break
+        if _redundant(sentence, points):
+            continue
+        points.append(sentence)
+
+    return {
+        "title": title_match.group(1).strip() if title_match else "",
+        "summary": " ".join(s.text for s in sorted(summary_sentences, key=lambda s: s.position)),
+        "key_points": [s.text.rstrip(".") for s in points]
+    }
@@ -0,0 +1,65 @@
+"""
+Request Hedging
+Latency percentiles per step/model and first-successful-wins racing of duplicate calls
+"""
+
+import asyncio
+from collections import deque
+from typing import Dict, Any, Optional, Tuple, List
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+class LatencyTracker:
+    """Sliding window of recent call latencies per (step, model)"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[Tuple[str, str], deque] = {}
+
+    def record(self, step: str, model: str, seconds: float):
+        key = (step, model)
+        if key not in self._samples:
+            self._samples[key] = deque(maxlen=self.window)
+        self._samples[key].append(seconds)
+
+    def percentile(self, step: str, model: str, q: float) -> Optional[float]:
+        """Latency at quantile q, or None until min_samples calls were observed"""
+        samples = self._samples.get((step, model))
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(q * len(ordered)))
+        return ordered[index]
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            f"{step}:{model}": {
+                "samples": len(samples),
+                "p50_seconds": round(self.percentile(step, model, 0.5) or 0.0, 3),
+                "p90_seconds": round(self.percentile(step, model, 0.9) or 0.0, 3)
+            }
+            for (step, model), samples in self._samples.items()
+        }
+
+async def first_successful(tasks: List[asyncio.Task]) -> Tuple[asyncio.Task, Any]:
+    """
+    Wait for the first task that completes without raising and cancel the rest.
+    If every task fails, the first task's error is raised.
+    """
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if not task.cancelled() and task.exception() is None:
+                    return task, task.result()
+        # Every racer failed; surface the original request's error
+        return tasks[0], tasks[0].result()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
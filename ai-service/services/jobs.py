@@ -0,0 +1,165 @@
+"""
+Generation Job Manager
+Bounded in-process worker pool for background generation jobs
+"""
+
+import asyncio
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, Optional, Callable, Awaitable, AsyncIterator
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+class JobQueueFullError(Exception):
+    """Raised when the job queue is at capacity"""
+    pass
+
+class GenerationJobManager:
+    """
+    Runs generation jobs on a fixed number of worker tasks.
+
+    The runner is called as runner(session_id, job, report) where report(event, data)
+    publishes progress to pollers and server-sent-event subscribers.
+    """
+
+    def __init__(
+        self,
+        runner: Callable[..., Awaitable[None]],
+        workers: int = 2,
+        max_queue_size: int = 100,
+        max_tracked_jobs: int = 1000
+    ):
+        self.runner = runner
+        self.workers = workers
+        self.max_queue_size = max_queue_size
+        self.max_tracked_jobs = max_tracked_jobs
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+        self._progress: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._subscribers: Dict[int, list] = {}
+
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+
+    async def start(self):
+        """Start the worker tasks"""
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._tasks = [
+            asyncio.create_task(self._worker(i), name=f"generation-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"Generation job workers started ({self.workers} workers)")
+
+    async def stop(self):
+        """Cancel the worker tasks; queued jobs stay 'processing' in the database"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Generation job workers stopped")
+
+    def submit(self, session_id: int, job: Any):
+        """Queue a job without waiting; raises JobQueueFullError at capacity"""
+        try:
+            self._queue.put_nowait((session_id, job))
+        except asyncio.QueueFull:
+            self._rejected += 1
+            raise JobQueueFullError("Generation queue is full, retry later")
+
+        self._submitted += 1
+        self._track(session_id, {
+            "status": "queued",
+            "current_step": None,
+            "steps_completed": [],
+            "queued_at": datetime.now()
+        })
+
+    def get_progress(self, session_id: int) -> Optional[Dict[str, Any]]:
+        """In-memory progress for a job handled by this process"""
+        progress = self._progress.get(session_id)
+        if not progress:
+            return None
+        return {**progress, "steps_completed": list(progress.get("steps_completed", []))}
+
+    async def subscribe(self, session_id: int) -> AsyncIterator[Dict[str, Any]]:
+        """Yield progress events for a job until it completes or fails"""
+        queue = asyncio.Queue()
+        self._subscribers.setdefault(session_id, []).append(queue)
+        try:
+            progress = self.get_progress(session_id)
+            if progress:
+                yield {"event": "status", "data": progress}
+                if progress["status"] in ("completed", "failed"):
+                    return
+
+            while True:
+                event = await queue.get()
+                yield event
+                if event["event"] in ("completed", "failed"):
+                    return
+        finally:
+            self._subscribers[session_id].remove(queue)
+            if not self._subscribers[session_id]:
+                del self._subscribers[session_id]
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth and job counters"""
+        running = sum(1 for p in self._progress.values() if p["status"] == "running")
+        return {
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_queue_size": self.max_queue_size,
+            "running": running,
+            "submitted": self._submitted,
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected
+        }
+
+    def _track(self, session_id: int, progress: Dict[str, Any]):
+        self._progress[session_id] = progress
+        self._progress.move_to_end(session_id)
+        while len(self._progress) > self.max_tracked_jobs:
+            self._progress.popitem(last=False)
+
+    def _publish(self, session_id: int, event: str, data: Dict[str, Any]):
+        for queue in self._subscribers.get(session_id, []):
+            queue.put_nowait({"event": event, "data": data})
+
+    async def _worker(self, worker_id: int):
+        while True:
+            session_id, job = await self._queue.get()
+            try:
+                await self._run_job(session_id, job)
+            finally:
+                self._queue.task_done()
+
+    async def _run_job(self, session_id: int, job: Any):
+        progress = self._progress.get(session_id) or {"steps_completed": []}
+        progress.update({"status": "running", "started_at": datetime.now()})
+        self._track(session_id, progress)
+        self._publish(session_id, "running", {"session_id": session_id})
+
+        async def report(event: str, data: Dict[str, Any] = None):
+            data = data or {}
+            if event == "step":
+                progress["current_step"] = data.get("step")
+                progress["steps_completed"].append(data.get("step"))
+            self._publish(session_id, event, {"session_id": session_id, **data})
+
+        try:
+            await self.runner(session_id, job, report)
+            progress.update({"status": "completed", "current_step": None, "finished_at": datetime.now()})
+            self._completed += 1
+            self._publish(session_id, "completed", {"session_id": session_id})
+
+        except Exception as e:
+            logger.error(f"Generation job for session {session_id} failed: {str(e)}")
+            progress.update({"status": "failed", "error": str(e), "finished_at": datetime.now()})
+            self._failed += 1
+            self._publish(session_id, "failed", {"session_id": session_id, "error": str(e)})
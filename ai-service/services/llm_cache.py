@@ -0,0 +1,219 @@
+"""
+LLM Response Cache
+Content-addressed cache for model completions with an in-memory LRU tier
+and an optional on-disk tier
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+class LLMResponseCache:
+    """
+    Two-tier response cache keyed by a hash of the full request.
+
+    Memory tier: LRU bounded by entry count.
+    Disk tier (optional): one JSON file per entry, evicted by TTL and by
+    total size (oldest files first).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: float = 86400,
+        disk_dir: Optional[str] = None,
+        max_disk_bytes: int = 256 * 1024 * 1024
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._disk_bytes = None  # Computed lazily on first disk write
+        self._disk_lock = threading.Lock()  # Disk writes run on worker threads
+
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.evictions = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> Optional["LLMResponseCache"]:
+        """Build the cache from LLM_CACHE_* settings; None when disabled"""
+        if os.getenv("LLM_CACHE_ENABLED", "true").lower() != "true":
+            return None
+
+        return cls(
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", 512)),
+            ttl_seconds=float(os.getenv("LLM_CACHE_TTL_SECONDS", 86400)),
+            disk_dir=os.getenv("LLM_CACHE_DIR") or None,
+            max_disk_bytes=int(float(os.getenv("LLM_CACHE_MAX_DISK_MB", 256)) * 1024 * 1024)
+        )
+
+    @staticmethod
+    def make_key(
+        provider: str,
+        model: str,
+        prompt: str,
+        temperature: float,
+        max_tokens: int,
+        system: Optional[str] = None
+    ) -> str:
+        """Hash of everything that determines a completion"""
+        payload = json.dumps(
+            [provider, model, system or "", prompt, round(temperature, 4), max_tokens],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._memory.get(key)
+        if entry:
+            stored_at, value = entry
+            if time.time() - stored_at <= self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                self.memory_hits += 1
+                return value
+            del self._memory[key]
+
+        if self.disk_dir:
+            entry = await asyncio.to_thread(self._read_disk, key)
+            if entry:
+                stored_at, value = entry
+                self._remember(key, stored_at, value)
+                self.hits += 1
+                self.disk_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Dict[str, Any]):
+        stored_at = time.time()
+        self._remember(key, stored_at, value)
+
+        if self.disk_dir:
+            try:
+                await asyncio.to_thread(self._write_disk, key, stored_at, value)
+            except OSError as e:
+                logger.warning(f"Failed to write LLM cache entry to disk: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "disk_enabled": bool(self.disk_dir),
+            "disk_bytes": self._disk_bytes or 0
+        }
+
+    def _remember(self, key: str, stored_at: float, value: Dict[str, Any]):
+        self._memory[key] = (stored_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[tuple]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if time.time() - entry["stored_at"] > self.ttl_seconds:
+            self._remove_file(path)
+            return None
+
+        return entry["stored_at"], entry["value"]
+
+    def _write_disk(self, key: str, stored_at: float, value: Dict[str, Any]):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Each write gets its own temp file, so concurrent writes of a key never share one
+        tmp = tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=os.path.dirname(path), suffix=".tmp", delete=False
+        )
+        try:
+            with tmp:
+                json.dump({"stored_at": stored_at, "value": value}, tmp, default=str)
+            size = os.path.getsize(tmp.name)
+
+            # Replacing the file and counting its size is one step for the size limit
+            with self._disk_lock:
+                if self._disk_bytes is None:
+                    self._disk_bytes = sum(file_size for _, _, file_size in self._disk_files())
+                previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+                os.replace(tmp.name, path)
+
+                self._disk_bytes += size - previous_size
+                if self._disk_bytes > self.max_disk_bytes:
+                    self._evict_disk()
+        except BaseException:
+            self._remove_file(tmp.name)
+            raise
+
+    def _disk_files(self):
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_mtime, stat.st_size
+
+    def _evict_disk(self):
+        """
+        Drop expired entries, then oldest entries until under 90% of the size
+        limit. Called with _disk_lock held.
+        """
+        now = time.time()
+        files = sorted(self._disk_files(), key=lambda f: f[1])
+        total = sum(size for _, _, size in files)
+        target = self.max_disk_bytes * 0.9
+
+        for path, mtime, size in files:
+            if total <= target and now - mtime <= self.ttl_seconds:
+                continue
+            if self._remove_file(path):
+                total -= size
+                self.evictions += 1
+
+        self._disk_bytes = total
+
+    def _remove_file(self, path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
@@ -0,0 +1,176 @@
+"""
+Schema Migrations
+Versioned SQL migrations (migrations/NNN_name.sql) recorded with checksums
+"""
+
+import re
+import time
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "migrations"
+
+MIGRATION_FILE = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+# Session advisory lock held while migrating, so concurrent deploys apply each migration once
+MIGRATION_LOCK_KEY = 4_202_301
+
+class MigrationError(Exception):
+    """Raised for a changed, missing or out-of-order migration, or an outdated schema"""
+    pass
+
+class Migration:
+    def __init__(self, version: int, name: str, path: Path):
+        self.version = version
+        self.name = name
+        self.path = path
+        self.sql = path.read_text(encoding="utf-8")
+        self.checksum = hashlib.sha256(self.sql.encode("utf-8")).hexdigest()
+
+def _migration_files(directory: Path) -> Dict[int, Path]:
+    files = {}
+    for path in sorted(directory.glob("*.sql")):
+        match = MIGRATION_FILE.match(path.name)
+        if not match:
+            raise MigrationError(f"Migration file {path.name} does not match NNN_name.sql")
+        version = int(match.group(1))
+        if version in files:
+            raise MigrationError(f"Migrations {files[version].name} and {path.name} share version {version}")
+        files[version] = path
+    return files
+
+def load_migrations(directory: Path = MIGRATIONS_DIR) -> List[Migration]:
+    """Migrations on disk in version order"""
+    return [
+        Migration(version, MIGRATION_FILE.match(path.name).group(2), path)
+        for version, path in sorted(_migration_files(directory).items())
+    ]
+
+def latest_version(directory: Path = MIGRATIONS_DIR) -> int:
+    """Schema version this build expects; reads file names only"""
+    return max(_migration_files(directory), default=0)
+
+class MigrationRunner:
+    """
+    Applies pending migrations in version order, each in its own transaction
+    together with its ai_schema_migrations row. Applied migrations whose file
+    has changed stop the run, since the database no longer matches the files.
+    """
+
+    def __init__(self, connection_string: str, directory: Path = MIGRATIONS_DIR):
+        self.connection_string = connection_string
+        self.directory = directory
+
+    def _connect(self):
+        return psycopg2.connect(self.connection_string, cursor_factory=RealDictCursor)
+
+    def _ensure_table(self, cursor):
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS ai_schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                checksum CHAR(64) NOT NULL, -- sha256 of the migration file
+                execution_ms INTEGER,
+                applied_at TIMESTAMP DEFAULT NOW()
+            );
+        """)
+
+    def _applied(self, cursor) -> Dict[int, Dict[str, Any]]:
+        cursor.execute("SELECT version, name, checksum, applied_at FROM ai_schema_migrations ORDER BY version")
+        return {row['version']: dict(row) for row in cursor.fetchall()}
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Every known migration with its state: applied, pending, changed or missing (applied, file gone)"""
+        migrations = {m.version: m for m in load_migrations(self.directory)}
+        connection = self._connect()
+        try:
+            with connection.cursor() as cursor:
+                self._ensure_table(cursor)
+                applied = self._applied(cursor)
+            connection.commit()
+        finally:
+            connection.close()
+
+        rows = []
+        for version in sorted(set(migrations) | set(applied)):
+            migration, record = migrations.get(version), applied.get(version)
+            if record is None:
+                state = "pending"
+            elif migration is None:
+                state = "missing"
+            elif record['checksum'] != migration.checksum:
+                state = "changed"
+            else:
+                state = "applied"
+            rows.append({
+                "version": version,
+                "name": migration.name if migration else record['name'],
+                "state": state,
+                "applied_at": record['applied_at'] if record else None
+            })
+        return rows
+
+    def migrate(self, target: Optional[int] = None) -> List[Migration]:
+        """Apply pending migrations up to target (default: all); returns the ones applied"""
+        migrations = [m for m in load_migrations(self.directory) if target is None or m.version <= target]
+        connection = self._connect()
+        applied_now = []
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_KEY,))
+                connection.commit()
+                try:
+                    self._ensure_table(cursor)
+                    applied = self._applied(cursor)
+                    connection.commit()
+                    self._verify(migrations, applied)
+
+                    for migration in migrations:
+                        if migration.version in applied:
+                            continue
+                        start = time.perf_counter()
+                        try:
+                            cursor.execute(migration.sql)
+                            cursor.execute("""
+                                INSERT INTO ai_schema_migrations (version, name, checksum, execution_ms)
+                                VALUES (%s, %s, %s, %s)
+                            """, (
+                                migration.version,
+                                migration.name,
+                                migration.checksum,
+                                int((time.perf_counter() - start) * 1000)
+                            ))
+                            connection.commit()
+                        except Exception as e:
+                            connection.rollback()
+                            raise MigrationError(f"Migration {migration.path.name} failed: {str(e)}") from e
+                        logger.info(f"Applied migration {migration.path.name}")
+                        applied_now.append(migration)
+                finally:
+                    cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_KEY,))
+                    connection.commit()
+        finally:
+            connection.close()
+        return applied_now
+
+    def _verify(self, migrations: List[Migration], applied: Dict[int, Dict[str, Any]]):
+        """Applied migrations must be unchanged, and pending ones must come after them"""
+        for migration in migrations:
+            record = applied.get(migration.version)
+            if record and record['checksum'] != migration.checksum:
+                raise MigrationError(
+                    f"Migration {migration.path.name} changed after it was applied; add a new migration instead"
+                )
+        pending = [m.version for m in migrations if m.version not in applied]
+        if pending and applied and min(pending) < max(applied):
+            raise MigrationError(
+                f"Migration {min(pending)} is older than applied migration {max(applied)}; renumber it"
+            )
@@ -0,0 +1,91 @@
+"""
+Output Budget
+Per-step max_tokens from a target word count and each model's learned tokens-per-word ratio
+"""
+
+import os
+import math
+from typing import Dict, Any, List
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Typical English prose tokens per word, used until a model has been observed
+DEFAULT_TOKENS_PER_WORD = 1.35
+
+# Requests are rounded up to this step so small ratio drifts keep the response cache key stable
+ROUNDING_TOKENS = 250
+
+class OutputBudget:
+    """
+    Sizes completions from the words a step is expected to write.
+
+    The tokens-per-word ratio per model is an exponentially weighted average
+    of observed completions, seeded from past sessions at startup.
+    """
+
+    def __init__(
+        self,
+        headroom: float = 1.3,
+        stop_factor: float = 1.15,
+        min_tokens: int = 500,
+        max_tokens: int = 8000,
+        smoothing: float = 0.2
+    ):
+        self.headroom = headroom
+        self.stop_factor = stop_factor
+        self.min_tokens = min_tokens
+        self.max_tokens_cap = max_tokens
+        self.smoothing = smoothing
+        self._ratios: Dict[str, float] = {}
+        self._samples: Dict[str, int] = {}
+
+    @classmethod
+    def from_env(cls) -> "OutputBudget":
+        return cls(
+            headroom=float(os.getenv("AI_OUTPUT_HEADROOM", 1.3)),
+            stop_factor=float(os.getenv("AI_OUTPUT_STOP_FACTOR", 1.15)),
+            min_tokens=int(os.getenv("AI_OUTPUT_MIN_TOKENS", 500)),
+            max_tokens=int(os.getenv("AI_OUTPUT_MAX_TOKENS", 8000))
+        )
+
+    def load(self, rows: List[Dict[str, Any]]):
+        """Seed ratios from stored totals ({"model", "output_tokens", "words", "samples"})"""
+        for row in rows:
+            if row["words"]:
+                self._ratios[row["model"]] = row["output_tokens"] / row["words"]
+                self._samples[row["model"]] = row["samples"]
+        if rows:
+            logger.info(f"Loaded tokens-per-word ratios for {len(self._ratios)} models")
+
+    def tokens_per_word(self, model: str) -> float:
+        return self._ratios.get(model, DEFAULT_TOKENS_PER_WORD)
+
+    def observe(self, model: str, output_tokens: int, words: int):
+        """Fold one completion into the model's ratio"""
+        if output_tokens <= 0 or words <= 0:
+            return
+        ratio = output_tokens / words
+        current = self._ratios.get(model)
+        self._ratios[model] = ratio if current is None else current + self.smoothing * (ratio - current)
+        self._samples[model] = self._samples.get(model, 0) + 1
+
+    def max_tokens(self, model: str, words: int, extra_tokens: int = 0) -> int:
+        """
+        Completion budget for writing about words words, plus extra_tokens for
+        fixed parts (titles, notes), with headroom so the target is not cut short.
+        """
+        estimate = words * self.tokens_per_word(model) * self.headroom + extra_tokens
+        rounded = math.ceil(estimate / ROUNDING_TOKENS) * ROUNDING_TOKENS
+        return max(self.min_tokens, min(self.max_tokens_cap, rounded))
+
+    def stop_words(self, target_words: int) -> int:
+        """Word count after which an article stops at the next section"""
+        return int(target_words * self.stop_factor)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            model: {"tokens_per_word": round(ratio, 3), "samples": self._samples.get(model, 0)}
+            for model, ratio in self._ratios.items()
+        }
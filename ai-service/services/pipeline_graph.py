@@ -0,0 +1,165 @@
+"""
+Pipeline Graph Scheduler
+Runs pipeline steps as a dependency graph, starting every step whose inputs are ready
+"""
+
+import time
+import asyncio
+from typing import Dict, List, Any, Callable, Awaitable, Optional
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+class PipelineStep:
+    """
+    One unit of pipeline work.
+
+    func is awaited with the declared inputs as keyword arguments and must
+    return a dict containing every declared output. Extra keys (tokens_used,
+    cost, cache_hit, ...) are kept as the step's result for accounting.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[..., Awaitable[Dict[str, Any]]],
+        inputs: List[str],
+        outputs: List[str]
+    ):
+        self.name = name
+        self.func = func
+        self.inputs = inputs
+        self.outputs = outputs
+
+class PipelineGraph:
+    def __init__(self, steps: List[PipelineStep]):
+        self.steps = steps
+        self._validate()
+
+    def _validate(self):
+        names = [step.name for step in self.steps]
+        if len(names) != len(set(names)):
+            raise ValueError("Pipeline step names must be unique")
+
+        producers = {}
+        for step in self.steps:
+            for output in step.outputs:
+                if output in producers:
+                    raise ValueError(f"Output '{output}' is produced by both {producers[output]} and {step.name}")
+                producers[output] = step.name
+        self.producers = producers
+
+    def dependencies(self, step: PipelineStep) -> List[str]:
+        """Names of the steps whose outputs this step consumes"""
+        return sorted({self.producers[i] for i in step.inputs if i in self.producers})
+
+    def restorable(self, completed: Dict[str, Dict[str, Any]]) -> List[str]:
+        """
+        Steps that can be taken from earlier results instead of being run:
+        the result has every declared output and every dependency is restored too.
+        """
+        restored = {
+            step.name for step in self.steps
+            if step.name in completed and all(o in completed[step.name] for o in step.outputs)
+        }
+        changed = True
+        while changed:
+            changed = False
+            for step in self.steps:
+                if step.name in restored and not set(self.dependencies(step)) <= restored:
+                    restored.discard(step.name)
+                    changed = True
+        return [step.name for step in self.steps if step.name in restored]
+
+    async def run(
+        self,
+        initial: Dict[str, Any],
+        on_step_complete: Optional[Callable[[str, Dict[str, Any]], Awaitable[None]]] = None,
+        completed: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Execute the graph. Returns the final state plus per-step results,
+        timings and the critical-path latency.
+
+        completed maps step names to results from an earlier, interrupted run
+        (checkpoints); restorable steps are not run again and take no time.
+        """
+        state = dict(initial)
+        results: Dict[str, Dict[str, Any]] = {}
+        timings: Dict[str, float] = {}
+        finished_at: Dict[str, float] = {}
+        pending = {}
+
+        restored = self.restorable(completed or {})
+        for step in self.steps:
+            if step.name in restored:
+                result = completed[step.name]
+                for output in step.outputs:
+                    state[output] = result[output]
+                results[step.name] = result
+                finished_at[step.name] = 0.0
+
+        remaining = [step for step in self.steps if step.name not in restored]
+
+        for step in remaining:
+            missing = [i for i in step.inputs if i not in state and i not in self.producers]
+            if missing:
+                raise ValueError(f"Step {step.name} has unsatisfiable inputs: {missing}")
+
+        try:
+            while remaining or pending:
+                ready = [
+                    step for step in remaining
+                    if all(i in state for i in step.inputs)
+                ]
+                for step in ready:
+                    remaining.remove(step)
+                    kwargs = {i: state[i] for i in step.inputs}
+                    task = asyncio.create_task(self._timed(step, kwargs))
+                    pending[task] = step
+
+                if not pending:
+                    raise ValueError(
+                        f"Pipeline graph is stuck; cyclic steps: {[s.name for s in remaining]}"
+                    )
+
+                done, _ = await asyncio.wait(pending.keys(), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    step = pending.pop(task)
+                    result, elapsed = task.result()
+
+                    missing = [o for o in step.outputs if o not in result]
+                    if missing:
+                        raise ValueError(f"Step {step.name} did not produce outputs: {missing}")
+
+                    for output in step.outputs:
+                        state[output] = result[output]
+                    results[step.name] = result
+                    timings[step.name] = round(elapsed, 3)
+
+                    # Finish time on the critical path = slowest dependency + own duration
+                    deps = self.dependencies(step)
+                    finished_at[step.name] = max((finished_at[d] for d in deps), default=0.0) + elapsed
+
+                    if on_step_complete:
+                        await on_step_complete(step.name, result)
+
+        except BaseException:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending.keys(), return_exceptions=True)
+            raise
+
+        return {
+            "state": state,
+            "results": results,
+            "timings": timings,
+            "restored": restored,
+            "critical_path_seconds": round(max(finished_at.values(), default=0.0), 3)
+        }
+
+    async def _timed(self, step: PipelineStep, kwargs: Dict[str, Any]):
+        start = time.perf_counter()
+        result = await step.func(**kwargs)
+        return result, time.perf_counter() - start
@@ -3,30 +3,23 @@ Prompt Templates for AI Article Generation
 Optimized prompts for nutrition and food content
 """
 
-from typing import Dict, Any
+from typing import Dict, List, Any
 from models import GenerationOptions, ArticleCategory
 
 class PromptTemplates:
     
-    def get_content_generation_prompt(self, topic: str, options: GenerationOptions = None) -> str:
-        """Generate optimized prompt for content creation"""
-        
-        if not options:
-            options = GenerationOptions()
-        
-        category_context = self._get_category_context(options.category)
-        length_guidance = self._get_length_guidance(options.target_length)
+    # Static instructions go in the system prompt and the request-specific part
+    # (topic, options, content) after it, so every request shares one cacheable
+    # prefix with the provider's prompt cache.
+    
+    def get_content_generation_system(self) -> str:
+        """Static instructions for article creation (cacheable prefix)"""
         
-        prompt = f"""You are a nutrition expert writing for health-conscious consumers interested in plant-based proteins and ancient grains.
+        return """You are a nutrition expert writing for health-conscious consumers interested in plant-based proteins and ancient grains.
 
-Topic: {topic}
-Target Length: {length_guidance}
-Category: {options.category.value}
 Brand Voice: Authoritative yet approachable, science-backed but accessible
 
-{category_context}
-
-Create a comprehensive article about "{topic}" that includes:
+Create a comprehensive article about the topic given in the request that includes:
 
 1. **Nutritional Breakdown**: Specific metrics, vitamins, minerals, macronutrients with accurate data
 2. **Health Benefits**: Research-backed benefits with scientific context and studies
@@ -52,26 +45,33 @@ Content Structure:
 - End with a compelling conclusion that motivates action
 
 Focus on providing accurate nutritional information, practical cooking guidance, and inspiring readers to incorporate this food into their healthy lifestyle. Make the content both educational and immediately useful."""
-
-        return prompt
     
-    def get_recipe_generation_prompt(self, topic: str, options: GenerationOptions = None) -> str:
-        """Generate optimized prompt for recipe creation"""
+    def get_content_generation_prompt(self, topic: str, options: GenerationOptions = None) -> str:
+        """Request-specific part of the content creation prompt"""
         
         if not options:
             options = GenerationOptions()
         
         category_context = self._get_category_context(options.category)
+        length_guidance = self._get_length_guidance(options.target_length)
         
-        prompt = f"""You are a professional chef and nutrition expert specializing in plant-based cooking with lentils and millets.
-
-Recipe Topic: {topic}
+        prompt = f"""Topic: {topic}
+Target Length: {length_guidance}
 Category: {options.category.value}
-Brand Voice: Approachable, family-friendly, nutrition-conscious
-
 {category_context}
 
-Create a comprehensive recipe for "{topic}" that includes:
+Write the article about "{topic}" now."""
+
+        return prompt
+    
+    def get_recipe_generation_system(self) -> str:
+        """Static instructions for recipe creation (cacheable prefix)"""
+        
+        return """You are a professional chef and nutrition expert specializing in plant-based cooking with lentils and millets.
+
+Brand Voice: Approachable, family-friendly, nutrition-conscious
+
+Create a comprehensive recipe for the topic given in the request that includes:
 
 **RECIPE STRUCTURE:**
 1. **Recipe Overview**:
@@ -125,16 +125,27 @@ Create a comprehensive recipe for "{topic}" that includes:
 - Mention how this recipe fits into a healthy diet
 
 Format the response as a complete recipe ready for publication on a food website."""
+    
+    def get_recipe_generation_prompt(self, topic: str, options: GenerationOptions = None) -> str:
+        """Request-specific part of the recipe creation prompt"""
+        
+        if not options:
+            options = GenerationOptions()
+        
+        category_context = self._get_category_context(options.category)
+        
+        prompt = f"""Recipe Topic: {topic}
+Category: {options.category.value}
+{category_context}
+
+Write the recipe for "{topic}" now."""
 
         return prompt
     
-    def get_fact_checking_prompt(self, content: str, topic: str) -> str:
-        """Generate prompt for fact-checking and citation"""
+    def get_fact_checking_system(self) -> str:
+        """Static instructions for fact-checking and citation (cacheable prefix)"""
         
-        prompt = f"""You are a fact-checking expert specializing in nutrition and food science. Review the following article about "{topic}" for accuracy and enhance it with credible citations.
-
-Article Content:
-{content}
+        return """You are a fact-checking expert specializing in nutrition and food science. Review the article in the request for accuracy and enhance it with credible citations.
 
 Tasks:
 1. **Verify Health Claims**: Check all nutritional values, health benefits, and scientific statements
@@ -162,6 +173,93 @@ Return the enhanced article with citations integrated naturally into the text, f
 - Number of citations added  
 - Any flags requiring editorial review
 - Overall confidence score (0-100)"""
+    
+    def get_fact_checking_prompt(self, content: str, topic: str) -> str:
+        """Request-specific part of the fact-checking prompt"""
+        
+        prompt = f"""Article Topic: {topic}
+
+Article Content:
+{content}"""
+
+        return prompt
+    
+    def get_section_fact_checking_system(self) -> str:
+        """Static instructions for fact-checking one section (cacheable prefix)"""
+        
+        return """You are a fact-checking expert specializing in nutrition and food science. Review the section of an article given in the request for accuracy and enhance it with credible citations. Other sections are checked separately.
+
+Tasks:
+1. **Verify Health Claims**: Check all nutritional values, health benefits, and scientific statements
+2. **Add Citations**: Include credible sources for key claims using [Source: Publication/Study Name, Year] format
+3. **Flag Uncertainties**: Mark any claims that need editorial review with [FACT-CHECK: Claim needs verification]
+4. **Update Statistics**: Ensure all numbers, percentages, and data points are current and accurate
+
+Guidelines:
+- Only add citations for significant claims, not basic facts
+- Keep the section heading, tone and structure unchanged
+- Do not add an introduction, conclusion or summary of your own
+
+Return only the enhanced section. After it, list each note for the editor on its own line starting with [FACT-CHECK]:"""
+    
+    def get_section_fact_checking_prompt(self, section: str, topic: str) -> str:
+        """Request-specific part of the section fact-checking prompt"""
+        
+        prompt = f"""Article Topic: {topic}
+
+Section Content:
+{section}"""
+
+        return prompt
+    
+    def get_passage_fact_checking_system(self) -> str:
+        """Static instructions for fact-checking claim-bearing passages (cacheable prefix)"""
+        
+        return """You are a fact-checking expert specializing in nutrition and food science. The passages in the request are the factual claims from an article; the rest of the article has no claims to check.
+
+For each passage:
+- Add a citation after significant claims using [Source: Publication/Study Name, Year]
+- Mark claims that need editorial review with [FACT-CHECK: Claim needs verification]
+- Prefer peer-reviewed studies, USDA nutrition data, WHO, FDA and recent research
+
+Return every passage on its own line, starting with its [[anchor]], with your citations or flags added and the wording otherwise unchanged. After the passages, list each note for the editor on its own line starting with [FACT-CHECK]:"""
+    
+    def get_passage_fact_checking_prompt(self, passages: List[tuple], topic: str) -> str:
+        """Request-specific part of the passage fact-checking prompt"""
+        
+        anchored = "\n".join(f"[[{anchor}]] {text}" for anchor, text in passages)
+        
+        prompt = f"""Article Topic: {topic}
+
+Passages:
+{anchored}"""
+
+        return prompt
+    
+    def get_claim_verification_system(self) -> str:
+        """Static instructions for verifying extracted claims (cacheable prefix)"""
+        
+        return """You are a fact-checking expert specializing in nutrition and food science. Verify each numbered claim in the request, taken from an article on the topic given there.
+
+For every claim decide:
+- "supported": accurate, with a credible source (peer-reviewed study, USDA, WHO, FDA, ICMR)
+- "unsupported": inaccurate or contradicted by credible sources
+- "uncertain": cannot be verified with confidence
+
+Respond with only a JSON array, one object per claim, in this exact shape:
+[{"id": 1, "verdict": "supported", "citation": "Publication/Study Name, Year", "note": "short note for the editor"}]
+
+Use an empty citation for claims that are not supported. Keep notes under 25 words."""
+    
+    def get_claim_verification_prompt(self, claims: List[str], topic: str) -> str:
+        """Request-specific part of the claim verification prompt"""
+        
+        numbered_claims = "\n".join(f"{i}. {claim}" for i, claim in enumerate(claims, 1))
+        
+        prompt = f"""Article Topic: {topic}
+
+Claims:
+{numbered_claims}"""
 
         return prompt
     
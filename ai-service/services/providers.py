@@ -0,0 +1,403 @@
+"""
+Model Provider Layer
+Async clients for OpenAI, Anthropic and Google Gemini
+
+complete() returns the whole completion; stream() is an async generator of
+{"type": "text", "text": ...} deltas followed by one
+{"type": "usage", "input_tokens": ..., "output_tokens": ..., "cached_tokens": ...} event.
+cached_tokens is the part of input_tokens read from the provider's prompt
+prefix cache; cache_prefix asks providers with explicit caching to cache the
+system prompt.
+"""
+
+import os
+import time
+import asyncio
+import hashlib
+from typing import Dict, Any, Optional, AsyncIterator
+
+import openai
+from anthropic import AsyncAnthropic
+import google.generativeai as genai
+
+from services.token_accounting import count_tokens, count_prompt_tokens, PROMPT_CACHE_MIN_TOKENS
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Canned answer returned by FakeProvider
+FAKE_COMPLETION = (
+    "TITLE: Fake Article\n\n"
+    "SUMMARY: A short stand-in summary produced without calling a model.\n\n"
+    "KEY POINTS:\n- Lentils contain about 25g of protein per 100g\n- Millets are gluten-free\n\n"
+    "## Nutrition\n\nRed lentils cook in 15 minutes and are rich in fiber.\n\n"
+    "## Cooking Tips\n\nRinse lentils before cooking.\n"
+)
+
+class OpenAIProvider:
+    """Async OpenAI chat completions"""
+    name = "openai"
+
+    def __init__(self):
+        self._client = None
+
+    @property
+    def client(self) -> openai.AsyncOpenAI:
+        # Created lazily so the service can start without every provider key
+        if self._client is None:
+            self._client = openai.AsyncOpenAI(
+                api_key=os.getenv("OPENAI_API_KEY")
+            )
+        return self._client
+
+    @property
+    def configured(self) -> bool:
+        return bool(os.getenv("OPENAI_API_KEY"))
+
+    async def complete(
+        self,
+        model: str,
+        prompt: str,
+        system: Optional[str] = None,
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+        cache_prefix: bool = False
+    ) -> Dict[str, Any]:
+        messages = []
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": prompt})
+
+        response = await self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+
+        # Prefix caching is automatic; hits are reported in prompt_tokens_details
+        details = getattr(response.usage, "prompt_tokens_details", None)
+
+        return {
+            "content": response.choices[0].message.content,
+            "input_tokens": response.usage.prompt_tokens,
+            "output_tokens": response.usage.completion_tokens,
+            "cached_tokens": getattr(details, "cached_tokens", 0) or 0,
+            "tokens_used": response.usage.total_tokens
+        }
+
+    async def stream(
+        self,
+        model: str,
+        prompt: str,
+        system: Optional[str] = None,
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+        cache_prefix: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        messages = []
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": prompt})
+
+        stream = await self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True
+        )
+
+        output = []
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                output.append(delta)
+                yield {"type": "text", "text": delta}
+
+        # Streamed chat completions carry no usage block; count locally
+        yield {
+            "type": "usage",
+            "input_tokens": count_prompt_tokens(model, prompt, system),
+            "output_tokens": count_tokens("".join(output), model),
+            "cached_tokens": 0
+        }
+
+class AnthropicProvider:
+    """Async Anthropic messages"""
+    name = "anthropic"
+
+    def __init__(self):
+        self._client = None
+
+    @property
+    def client(self) -> AsyncAnthropic:
+        if self._client is None:
+            self._client = AsyncAnthropic(
+                api_key=os.getenv("ANTHROPIC_API_KEY")
+            )
+        return self._client
+
+    @property
+    def configured(self) -> bool:
+        return bool(os.getenv("ANTHROPIC_API_KEY"))
+
+    async def complete(
+        self,
+        model: str,
+        prompt: str,
+        system: Optional[str] = None,
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+        cache_prefix: bool = False
+    ) -> Dict[str, Any]:
+        kwargs = self._system_kwargs(system, cache_prefix)
+
+        message = await self.client.messages.create(
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            messages=[
+                {"role": "user", "content": prompt}
+            ],
+            **kwargs
+        )
+
+        input_tokens, cached_tokens = self._input_usage(message.usage)
+
+        return {
+            "content": message.content[0].text,
+            "input_tokens": input_tokens,
+            "output_tokens": message.usage.output_tokens,
+            "cached_tokens": cached_tokens,
+            "tokens_used": input_tokens + message.usage.output_tokens
+        }
+
+    async def stream(
+        self,
+        model: str,
+        prompt: str,
+        system: Optional[str] = None,
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+        cache_prefix: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        kwargs = self._system_kwargs(system, cache_prefix)
+
+        async with self.client.messages.stream(
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            messages=[
+                {"role": "user", "content": prompt}
+            ],
+            **kwargs
+        ) as stream:
+            async for text in stream.text_stream:
+                yield {"type": "text", "text": text}
+            message = await stream.get_final_message()
+
+        input_tokens, cached_tokens = self._input_usage(message.usage)
+        yield {
+            "type": "usage",
+            "input_tokens": input_tokens,
+            "output_tokens": message.usage.output_tokens,
+            "cached_tokens": cached_tokens
+        }
+
+    def _system_kwargs(self, system: Optional[str], cache_prefix: bool) -> Dict[str, Any]:
+        """System prompt, marked as a cache breakpoint when cache_prefix is set"""
+        if not system:
+            return {}
+        if cache_prefix:
+            return {"system": [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}]}
+        return {"system": system}
+
+    def _input_usage(self, usage):
+        """(total input, cache-read) tokens; Anthropic reports cache reads and writes outside input_tokens"""
+        cache_read = getattr(usage, "cache_read_input_tokens", 0) or 0
+        cache_write = getattr(usage, "cache_creation_input_tokens", 0) or 0
+        return usage.input_tokens + cache_read + cache_write, cache_read
+
+class GeminiProvider:
+    """Async Google Gemini content generation"""
+    name = "gemini"
+
+    def __init__(self):
+        google_api_key = os.getenv("GOOGLE_API_KEY")
+        if google_api_key:
+            genai.configure(api_key=google_api_key)
+
+    @property
+    def configured(self) -> bool:
+        return bool(os.getenv("GOOGLE_API_KEY"))
+
+    async def complete(
+        self,
+        model: str,
+        prompt: str,
+        system: Optional[str] = None,
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+        cache_prefix: bool = False
+    ) -> Dict[str, Any]:
+        # The Gemini SDK has no separate system role, so prepend it
+        full_prompt = f"{system}\n\n{prompt}" if system else prompt
+
+        response = await genai.GenerativeModel(model).generate_content_async(
+            full_prompt,
+            generation_config=genai.types.GenerationConfig(
+                max_output_tokens=max_tokens,
+                temperature=temperature,
+            )
+        )
+
+        result = response.text
+        input_tokens, output_tokens, cached_tokens = self._usage(response, model, full_prompt, result)
+
+        return {
+            "content": result,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "cached_tokens": cached_tokens,
+            "tokens_used": input_tokens + output_tokens
+        }
+
+    async def stream(
+        self,
+        model: str,
+        prompt: str,
+        system: Optional[str] = None,
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+        cache_prefix: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        full_prompt = f"{system}\n\n{prompt}" if system else prompt
+
+        response = await genai.GenerativeModel(model).generate_content_async(
+            full_prompt,
+            generation_config=genai.types.GenerationConfig(
+                max_output_tokens=max_tokens,
+                temperature=temperature,
+            ),
+            stream=True
+        )
+
+        output = []
+        async for chunk in response:
+            if chunk.text:
+                output.append(chunk.text)
+                yield {"type": "text", "text": chunk.text}
+
+        input_tokens, output_tokens, cached_tokens = self._usage(response, model, full_prompt, "".join(output))
+        yield {
+            "type": "usage",
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "cached_tokens": cached_tokens
+        }
+
+    def _usage(self, response, model: str, prompt: str, result: str):
+        """
+        (input, output, cached) tokens: reported usage when the SDK exposes it,
+        else counted locally. Gemini caches long prefixes implicitly.
+        """
+        usage = getattr(response, "usage_metadata", None)
+        if usage and getattr(usage, "prompt_token_count", None):
+            cached = getattr(usage, "cached_content_token_count", 0) or 0
+            return usage.prompt_token_count, usage.candidates_token_count, cached
+        return count_tokens(prompt, model), count_tokens(result, model), 0
+
+class FakeProvider:
+    """
+    Local stand-in provider for benchmarks and offline development.
+    Sleeps for a fixed latency and returns canned markdown.
+
+    With prefill_seconds_per_1k_tokens it also simulates prompt processing
+    time and a provider prefix cache: a system prompt seen within
+    prefix_cache_ttl seconds is not processed again, so only the request
+    part adds to the time to first token. Like the real providers it only
+    caches system prompts of at least min_prefix_tokens (by default
+    PROMPT_CACHE_MIN_TOKENS).
+    """
+    name = "fake"
+
+    def __init__(
+        self,
+        latency_seconds: float = 1.0,
+        prefill_seconds_per_1k_tokens: float = 0.0,
+        prefix_cache_ttl: float = 300.0,
+        min_prefix_tokens: int = PROMPT_CACHE_MIN_TOKENS["fake"]
+    ):
+        self.latency_seconds = latency_seconds
+        self.prefill_seconds_per_1k_tokens = prefill_seconds_per_1k_tokens
+        self.prefix_cache_ttl = prefix_cache_ttl
+        self.min_prefix_tokens = min_prefix_tokens
+        self._prefixes: Dict[str, float] = {}
+
+    @property
+    def configured(self) -> bool:
+        return True
+
+    def _prefill(self, model: str, prompt: str, system: Optional[str]):
+        """(input tokens, cached tokens, seconds to process the uncached part)"""
+        input_tokens = count_prompt_tokens(model, prompt, system)
+        cached_tokens = 0
+        if system and count_tokens(system, model) >= self.min_prefix_tokens:
+            now = time.monotonic()
+            key = hashlib.sha256(system.encode("utf-8")).hexdigest()
+            if now - self._prefixes.get(key, float("-inf")) < self.prefix_cache_ttl:
+                cached_tokens = count_tokens(system, model)
+            self._prefixes[key] = now
+        seconds = (input_tokens - cached_tokens) / 1000 * self.prefill_seconds_per_1k_tokens
+        return input_tokens, cached_tokens, seconds
+
+    async def complete(
+        self,
+        model: str,
+        prompt: str,
+        system: Optional[str] = None,
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+        cache_prefix: bool = False
+    ) -> Dict[str, Any]:
+        input_tokens, cached_tokens, prefill = self._prefill(model, prompt, system)
+        await asyncio.sleep(prefill + self.latency_seconds)
+
+        content = FAKE_COMPLETION
+        output_tokens = min(count_tokens(content, model), max_tokens)
+
+        return {
+            "content": content,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "cached_tokens": cached_tokens,
+            "tokens_used": input_tokens + output_tokens
+        }
+
+    async def stream(
+        self,
+        model: str,
+        prompt: str,
+        system: Optional[str] = None,
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+        cache_prefix: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        input_tokens, cached_tokens, prefill = self._prefill(model, prompt, system)
+        await asyncio.sleep(prefill)
+
+        # Same total latency as complete(), spread over the lines of the answer
+        lines = FAKE_COMPLETION.splitlines(keepends=True)
+        for line in lines:
+            await asyncio.sleep(self.latency_seconds / len(lines))
+            yield {"type": "text", "text": line}
+
+        yield {
+            "type": "usage",
+            "input_tokens": input_tokens,
+            "output_tokens": min(count_tokens(FAKE_COMPLETION, model), max_tokens),
+            "cached_tokens": cached_tokens
+        }
@@ -0,0 +1,227 @@
+"""
+Provider Rate Limiter
+Token buckets for per-model requests-per-minute and tokens-per-minute quotas
+"""
+
+import os
+import json
+import time
+import asyncio
+from typing import Dict, Any, Optional
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+def rate_limit_retry_after(error: Exception) -> Optional[float]:
+    """
+    Seconds to back off if error is a provider 429, else None.
+    Uses the Retry-After header when the SDK exposes the response.
+    """
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if status != 429 and type(error).__name__ not in ("RateLimitError", "ResourceExhausted"):
+        return None
+
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return max(float(headers.get("retry-after", 1.0)), 0.0)
+    except (TypeError, ValueError):
+        return 1.0
+
+class TokenBucket:
+    """Bucket holding up to capacity units, refilled continuously over a minute"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.refill_per_second = per_minute / 60.0
+        self.available = float(per_minute)
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    def seconds_until(self, amount: float) -> float:
+        """Time until amount units are available (0 when available now)"""
+        self._refill()
+        # A single request larger than the whole budget waits for a full bucket
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.refill_per_second
+
+    def consume(self, amount: float):
+        self._refill()
+        self.available -= amount
+
+    def drain(self):
+        """Empty the bucket, e.g. after the provider reported a 429"""
+        self._refill()
+        self.available = min(self.available, 0.0)
+
+class ModelRateLimiter:
+    """
+    RPM and TPM buckets for one model.
+
+    Waiters are served strictly in arrival order: asyncio.Lock is FIFO, and
+    the head of the queue holds it while it sleeps for its budget.
+    """
+
+    def __init__(self, model: str, rpm: float = 0, tpm: float = 0):
+        self.model = model
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = TokenBucket(rpm) if rpm else None
+        self._tokens = TokenBucket(tpm) if tpm else None
+        self._lock = asyncio.Lock()
+        self._blocked_until = 0.0
+
+        self.waiting = 0
+        self.total_requests = 0
+        self.total_estimated_tokens = 0
+        self.total_actual_tokens = 0
+        self.throttled_requests = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.provider_rate_limits = 0
+
+    def _seconds_until_ready(self, tokens: int) -> float:
+        wait = max(0.0, self._blocked_until - time.monotonic())
+        if self._requests:
+            wait = max(wait, self._requests.seconds_until(1))
+        if self._tokens:
+            wait = max(wait, self._tokens.seconds_until(tokens))
+        return wait
+
+    async def acquire(self, tokens: int):
+        """Wait in line until the request fits both budgets, then reserve it"""
+        start = time.monotonic()
+        self.waiting += 1
+        try:
+            async with self._lock:
+                while True:
+                    wait = self._seconds_until_ready(tokens)
+                    if wait <= 0:
+                        break
+                    await asyncio.sleep(wait)
+
+                if self._requests:
+                    self._requests.consume(1)
+                if self._tokens:
+                    self._tokens.consume(tokens)
+        finally:
+            self.waiting -= 1
+
+        waited = time.monotonic() - start
+        self.total_requests += 1
+        self.total_estimated_tokens += tokens
+        if waited > 0.001:
+            self.throttled_requests += 1
+        self.total_wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def reconcile(self, estimated_tokens: int, actual_tokens: int):
+        """Correct the TPM bucket once the provider reports real usage"""
+        self.total_actual_tokens += actual_tokens
+        if self._tokens:
+            self._tokens.consume(actual_tokens - estimated_tokens)
+
+    def penalize(self, retry_after: float):
+        """Stop issuing requests for retry_after seconds after a provider 429"""
+        self.provider_rate_limits += 1
+        self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+        if self._requests:
+            self._requests.drain()
+        if self._tokens:
+            self._tokens.drain()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "rpm_limit": self.rpm or None,
+            "tpm_limit": self.tpm or None,
+            "rpm_available": round(self._requests.available, 1) if self._requests else None,
+            "tpm_available": round(self._tokens.available) if self._tokens else None,
+            "waiting": self.waiting,
+            "requests": self.total_requests,
+            "throttled_requests": self.throttled_requests,
+            "estimated_tokens": self.total_estimated_tokens,
+            "actual_tokens": self.total_actual_tokens,
+            "average_wait_ms": round(
+                self.total_wait_seconds / self.total_requests * 1000, 2
+            ) if self.total_requests else 0.0,
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 2),
+            "provider_rate_limits": self.provider_rate_limits
+        }
+
+class RateLimiter:
+    """
+    Shared limiter in front of every provider call.
+
+    Limits are configured per model; models without an explicit entry use
+    the default RPM/TPM (0 means unlimited, calls are still counted).
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Dict[str, float]]] = None,
+        default_rpm: float = 0,
+        default_tpm: float = 0
+    ):
+        self.limits = limits or {}
+        self.default_rpm = default_rpm
+        self.default_tpm = default_tpm
+        self._models: Dict[str, ModelRateLimiter] = {}
+
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        """
+        Build the limiter from AI_RATE_LIMITS, a JSON object such as
+        {"gpt-4": {"rpm": 500, "tpm": 30000}}, plus AI_RATE_LIMIT_DEFAULT_RPM/TPM
+        """
+        limits = {}
+        raw = os.getenv("AI_RATE_LIMITS")
+        if raw:
+            try:
+                limits = json.loads(raw)
+            except ValueError as e:
+                logger.error(f"Ignoring invalid AI_RATE_LIMITS: {str(e)}")
+
+        return cls(
+            limits=limits,
+            default_rpm=float(os.getenv("AI_RATE_LIMIT_DEFAULT_RPM", 0)),
+            default_tpm=float(os.getenv("AI_RATE_LIMIT_DEFAULT_TPM", 0))
+        )
+
+    def for_model(self, model: str) -> ModelRateLimiter:
+        limiter = self._models.get(model)
+        if limiter is None:
+            limit = self.limits.get(model, {})
+            limiter = ModelRateLimiter(
+                model,
+                rpm=limit.get("rpm", self.default_rpm),
+                tpm=limit.get("tpm", self.default_tpm)
+            )
+            self._models[model] = limiter
+        return limiter
+
+    async def acquire(self, model: str, prompt_tokens: int, max_tokens: int = 0) -> int:
+        """
+        Wait for quota and reserve it. Providers count the requested completion
+        budget against TPM, so the estimate is the pre-flight prompt token count
+        + max_tokens. Returns the reserved estimate for reconcile().
+        """
+        estimated = prompt_tokens + max_tokens
+        await self.for_model(model).acquire(estimated)
+        return estimated
+
+    def reconcile(self, model: str, estimated_tokens: int, actual_tokens: int):
+        self.for_model(model).reconcile(estimated_tokens, actual_tokens)
+
+    def penalize(self, model: str, retry_after: float = 1.0):
+        logger.warning(f"Provider rate limit hit for {model}, pausing {retry_after:.1f}s")
+        self.for_model(model).penalize(retry_after)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {model: limiter.metrics() for model, limiter in self._models.items()}
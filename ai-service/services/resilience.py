@@ -0,0 +1,187 @@
+"""
+Provider Resilience
+Retry with jittered exponential backoff and per-provider circuit breakers
+"""
+
+import os
+import time
+import random
+import asyncio
+from typing import Dict, Any
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# SDK exception class names that indicate a transient provider problem
+RETRYABLE_ERROR_NAMES = {
+    "RateLimitError",           # openai / anthropic 429
+    "APITimeoutError",
+    "APIConnectionError",
+    "InternalServerError",
+    "OverloadedError",          # anthropic 529
+    "ResourceExhausted",        # google 429
+    "ServiceUnavailable",
+    "DeadlineExceeded",
+    "TimeoutError",
+}
+
+# Transient errors that mean the model is slow right now, not flaky: fail over instead of retrying
+TIMEOUT_ERROR_NAMES = {"APITimeoutError", "DeadlineExceeded", "TimeoutError"}
+
+# Errors that only say this provider cannot serve us (credentials, plan, model access): another provider may
+PROVIDER_ERROR_NAMES = {
+    "AuthenticationError",      # openai / anthropic 401
+    "PermissionDeniedError",    # openai / anthropic 403
+    "NotFoundError",            # model not available on this provider
+    "Unauthenticated",          # google
+    "PermissionDenied",
+    "NotFound",
+}
+
+class CircuitOpenError(Exception):
+    """Raised when every candidate model sits behind an open circuit"""
+    pass
+
+class StepBudgetExceededError(Exception):
+    """Raised when a pipeline step runs past its latency budget"""
+    pass
+
+def is_retryable(error: Exception) -> bool:
+    """Transient errors worth retrying: timeouts, connection errors, 429 and 5xx"""
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    if type(error).__name__ in RETRYABLE_ERROR_NAMES:
+        return True
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    return isinstance(status, int) and (status == 429 or status >= 500)
+
+def is_timeout(error: Exception) -> bool:
+    return isinstance(error, asyncio.TimeoutError) or type(error).__name__ in TIMEOUT_ERROR_NAMES
+
+def is_provider_error(error: Exception) -> bool:
+    """Auth, quota or model-access errors specific to one provider: 401, 402, 403, 404"""
+    if type(error).__name__ in PROVIDER_ERROR_NAMES:
+        return True
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    return status in (401, 402, 403, 404)
+
+def should_fail_over(error: Exception) -> bool:
+    """
+    Whether another model may succeed where this one failed. Other client errors
+    (bad request, invalid parameters, content policy) would fail the same way
+    everywhere, so they are raised instead of being re-sent to every fallback.
+    """
+    return isinstance(error, CircuitOpenError) or is_retryable(error) or is_provider_error(error)
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter. An attempt may take attempt_timeout
+    seconds (connection and time to first token) plus max_tokens at
+    min_tokens_per_second, so long completions are not cut off.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        attempt_timeout: float = 20.0,
+        min_tokens_per_second: float = 20.0
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.attempt_timeout = attempt_timeout
+        self.min_tokens_per_second = min_tokens_per_second
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        return cls(
+            max_attempts=int(os.getenv("AI_RETRY_MAX_ATTEMPTS", 3)),
+            base_delay=float(os.getenv("AI_RETRY_BASE_DELAY_SECONDS", 0.5)),
+            max_delay=float(os.getenv("AI_RETRY_MAX_DELAY_SECONDS", 8.0)),
+            attempt_timeout=float(os.getenv("AI_ATTEMPT_TIMEOUT_SECONDS", 20.0)),
+            min_tokens_per_second=float(os.getenv("AI_ATTEMPT_MIN_TOKENS_PER_SECOND", 20.0))
+        )
+
+    def timeout_for(self, max_tokens: int) -> float:
+        """Seconds one attempt producing up to max_tokens may take"""
+        return self.attempt_timeout + max_tokens / self.min_tokens_per_second
+
+    def delay(self, attempt: int) -> float:
+        """Sleep before retry number attempt (0-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+class CircuitBreaker:
+    """
+    Per-provider breaker.
+
+    closed: calls flow. After failure_threshold consecutive failures it opens
+    and rejects calls for reset_timeout seconds, then half-opens to let a
+    single probe through; the probe's outcome closes or re-opens it.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.state = "closed"
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+
+        self.total_failures = 0
+        self.times_opened = 0
+        self.rejected_calls = 0
+
+    def allow(self) -> bool:
+        if self.state == "open":
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                self.rejected_calls += 1
+                return False
+            self.state = "half_open"
+            self._probe_in_flight = False
+
+        if self.state == "half_open":
+            # A probe that never reported back (cancelled) stops blocking after reset_timeout
+            if self._probe_in_flight and time.monotonic() - self._probe_started < self.reset_timeout:
+                self.rejected_calls += 1
+                return False
+            self._probe_in_flight = True
+            self._probe_started = time.monotonic()
+
+        return True
+
+    def record_success(self):
+        if self.state != "closed":
+            logger.info(f"Circuit for {self.name} closed")
+        self.state = "closed"
+        self._consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def release(self):
+        """The call got an answer that says nothing about provider health (a 4xx)"""
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.total_failures += 1
+        self._consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == "half_open" or self._consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                self.times_opened += 1
+                logger.warning(f"Circuit for {self.name} opened after {self._consecutive_failures} failures")
+            self.state = "open"
+            self._opened_at = time.monotonic()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._consecutive_failures,
+            "total_failures": self.total_failures,
+            "times_opened": self.times_opened,
+            "rejected_calls": self.rejected_calls
+        }
@@ -0,0 +1,96 @@
+"""
+Markdown Sections
+Split article markdown at level-2 ("## ") headings, in full or incrementally from a stream
+"""
+
+import re
+from typing import List
+
+# Start of a line opening a "## " section (not "###")
+SECTION_BREAK = re.compile(r"\n(?=## )")
+SECTION_MARKER = "\n## "
+
+def partial_marker(text: str) -> int:
+    """Length of the end of text that could be the start of a SECTION_MARKER split across chunks"""
+    for length in range(min(len(SECTION_MARKER) - 1, len(text)), 0, -1):
+        if SECTION_MARKER.startswith(text[-length:]):
+            return length
+    return 0
+
+def split_sections(text: str) -> List[str]:
+    """
+    Split text before every "## " heading. The text before the first heading
+    (title, introduction) is its own section; joining the result gives back text.
+    """
+    sections = []
+    start = 0
+    for match in SECTION_BREAK.finditer(text):
+        end = match.end()
+        if text[start:end].strip():
+            sections.append(text[start:end])
+            start = end
+    if text[start:].strip():
+        sections.append(text[start:])
+    elif sections:
+        sections[-1] += text[start:]
+    return sections
+
+def chunk_sections(text: str, max_chars: int) -> List[str]:
+    """
+    Pack consecutive sections into chunks of at most max_chars. A section that
+    is larger on its own is split at paragraph boundaries (a single paragraph
+    longer than max_chars stays whole).
+    """
+    pieces = []
+    for section in split_sections(text):
+        if len(section) <= max_chars:
+            pieces.append(section)
+            continue
+        paragraph = ""
+        for part in re.split(r"(?<=\n\n)", section):
+            if paragraph and len(paragraph) + len(part) > max_chars:
+                pieces.append(paragraph)
+                paragraph = ""
+            paragraph += part
+        if paragraph:
+            pieces.append(paragraph)
+
+    chunks = []
+    for piece in pieces:
+        if chunks and len(chunks[-1]) + len(piece) <= max_chars:
+            chunks[-1] += piece
+        else:
+            chunks.append(piece)
+    return chunks
+
+def join_sections(sections: List[str]) -> str:
+    """Reassemble processed sections, one blank line between them"""
+    return "\n\n".join(section.strip("\n") for section in sections if section.strip()) + "\n"
+
+class SectionSplitter:
+    """
+    Incremental splitter for streamed text.
+
+    feed() returns every section that is known to be complete, i.e. followed
+    by the next "## " heading; flush() returns whatever is left at the end.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        self._buffer += text
+        completed = []
+        while True:
+            # Skip position 0 so a section's own heading never ends it
+            match = SECTION_BREAK.search(self._buffer, 1)
+            if not match:
+                break
+            section, self._buffer = self._buffer[:match.end()], self._buffer[match.end():]
+            if section.strip():
+                completed.append(section)
+        return completed
+
+    def flush(self) -> List[str]:
+        remainder, self._buffer = self._buffer, ""
+        return [remainder] if remainder.strip() else []
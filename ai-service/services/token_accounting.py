@@ -0,0 +1,160 @@
+"""
+Token Accounting
+Local token counts per provider and a versioned per-model price table
+"""
+
+import os
+import re
+import json
+import math
+from functools import lru_cache
+from typing import Dict, Any, Optional, Tuple
+
+from utils.logging import get_logger
+
+try:
+    import tiktoken
+except ImportError:  # Optional: exact OpenAI counts when installed
+    tiktoken = None
+
+logger = get_logger(__name__)
+
+# Bump when PRICES changes so stored costs can be traced to the table that produced them
+PRICE_TABLE_VERSION = "2024-06-01"
+
+# USD per 1M tokens (input, output), matched on the longest model-name prefix
+PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (5.00, 15.00),
+    "gpt-4-turbo": (10.00, 30.00),
+    "gpt-4-32k": (60.00, 120.00),
+    "gpt-4": (30.00, 60.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "claude-3-5-sonnet": (3.00, 15.00),
+    "claude-3-opus": (15.00, 75.00),
+    "claude-3-sonnet": (3.00, 15.00),
+    "claude-3-haiku": (0.25, 1.25),
+    "claude-2": (8.00, 24.00),
+    "gemini-1.5-pro": (3.50, 10.50),
+    "gemini-1.5-flash": (0.35, 1.05),
+    "gemini-pro": (0.50, 1.50),
+    "fake": (0.0, 0.0),
+}
+
+# Context window per model prefix, in tokens (prompt + completion)
+CONTEXT_WINDOWS: Dict[str, int] = {
+    "gpt-4o": 128000,
+    "gpt-4-turbo": 128000,
+    "gpt-4-32k": 32768,
+    "gpt-4": 8192,
+    "gpt-3.5-turbo": 16385,
+    "claude": 200000,
+    "gemini-1.5": 1000000,
+    "gemini-pro": 30720,
+}
+
+# Characters per token for providers without a local tokenizer here.
+# Claude's tokenizer splits English prose a little finer than OpenAI's.
+CHARS_PER_TOKEN = {"openai": 4.0, "anthropic": 3.5, "gemini": 4.0}
+
+# Share of the input price billed for prompt tokens read from the provider's prefix cache
+CACHED_INPUT_FACTOR = {"openai": 0.5, "anthropic": 0.1, "gemini": 0.25}
+
+# Shortest prefix each provider will cache
+PROMPT_CACHE_MIN_TOKENS = {"openai": 1024, "anthropic": 1024, "gemini": 1024, "fake": 1024}
+
+# Chat formatting overhead per message (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+WORD_OR_SYMBOL = re.compile(r"\w+|[^\w\s]")
+
+def provider_family(model: str) -> str:
+    if model.startswith("gpt"):
+        return "openai"
+    if model.startswith("gemini"):
+        return "gemini"
+    if model.startswith("fake"):
+        return "fake"
+    return "anthropic"
+
+def _longest_prefix(table: Dict[str, Any], model: str) -> Optional[str]:
+    matches = [prefix for prefix in table if model.startswith(prefix)]
+    return max(matches, key=len) if matches else None
+
+@lru_cache(maxsize=16)
+def _encoding(model: str):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+def count_tokens(text: Optional[str], model: str) -> int:
+    """
+    Tokens in text for model: tiktoken for OpenAI models when installed,
+    otherwise a per-provider character ratio, never below the word/symbol count.
+    """
+    if not text:
+        return 0
+    family = provider_family(model)
+    if family == "openai" and tiktoken is not None:
+        return len(_encoding(model).encode(text))
+    ratio = CHARS_PER_TOKEN.get(family, 4.0)
+    return max(math.ceil(len(text) / ratio), len(WORD_OR_SYMBOL.findall(text)) * 3 // 4)
+
+def count_prompt_tokens(model: str, prompt: str, system: Optional[str] = None) -> int:
+    """Input tokens for a request: message text plus chat formatting overhead"""
+    messages = 2 if system else 1
+    return count_tokens(prompt, model) + count_tokens(system, model) + messages * MESSAGE_OVERHEAD_TOKENS
+
+def context_window(model: str) -> Optional[int]:
+    prefix = _longest_prefix(CONTEXT_WINDOWS, model)
+    return CONTEXT_WINDOWS[prefix] if prefix else None
+
+def fit_max_tokens(model: str, prompt_tokens: int, max_tokens: int) -> int:
+    """Clamp a completion budget so prompt + completion fits the model's context window"""
+    window = context_window(model)
+    if window is None or prompt_tokens + max_tokens <= window:
+        return max_tokens
+    fitted = max(window - prompt_tokens, 1)
+    logger.warning(f"max_tokens for {model} reduced from {max_tokens} to {fitted} to fit a {prompt_tokens}-token prompt")
+    return fitted
+
+class PriceTable:
+    """Per-model input/output prices, overridable with AI_MODEL_PRICES"""
+
+    def __init__(self, prices: Dict[str, Tuple[float, float]] = None, version: str = PRICE_TABLE_VERSION):
+        self.prices = dict(PRICES if prices is None else prices)
+        self.version = version
+        self._warned = set()
+
+    @classmethod
+    def from_env(cls) -> "PriceTable":
+        """
+        AI_MODEL_PRICES is a JSON object of model prefix -> [input, output] USD
+        per 1M tokens, e.g. {"gpt-4o": [2.5, 10]}; entries override the built-in
+        table and AI_PRICE_TABLE_VERSION labels the result.
+        """
+        prices = dict(PRICES)
+        raw = os.getenv("AI_MODEL_PRICES")
+        if raw:
+            try:
+                prices.update({prefix: tuple(pair) for prefix, pair in json.loads(raw).items()})
+            except (ValueError, TypeError, AttributeError) as e:
+                logger.error(f"Invalid AI_MODEL_PRICES, using built-in prices: {str(e)}")
+        return cls(prices, os.getenv("AI_PRICE_TABLE_VERSION", PRICE_TABLE_VERSION))
+
+    def price(self, model: str) -> Tuple[float, float]:
+        prefix = _longest_prefix(self.prices, model)
+        if prefix is None:
+            if model not in self._warned:
+                self._warned.add(model)
+                logger.warning(f"No price for model {model}, counting its cost as 0")
+            return (0.0, 0.0)
+        return self.prices[prefix]
+
+    def cost(self, model: str, input_tokens: int, output_tokens: int, cached_tokens: int = 0) -> float:
+        """USD for a call; cached_tokens (part of input_tokens) are billed at the cache-read rate"""
+        input_price, output_price = self.price(model)
+        cached_price = input_price * CACHED_INPUT_FACTOR.get(provider_family(model), 1.0)
+        uncached = input_tokens - cached_tokens
+        return round((uncached * input_price + cached_tokens * cached_price + output_tokens * output_price) / 1_000_000, 6)
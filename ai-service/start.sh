@@ -52,6 +52,10 @@ if [ $? -ne 0 ]; then
     exit 1
 fi
 
+# Apply database migrations
+echo "🗄️  Applying database migrations..."
+python3 migrate.py || exit 1
+
 # Start the service
 echo "🚀 Starting FastAPI service..."
 echo "📍 Service will be available at http://localhost:8000"
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the analytics event writer
+Batching, the flush timer, backpressure and drain-on-stop of
+AnalyticsEventWriter against an in-memory store (no database needed).
+
+Usage: python test_analytics.py
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+from services.analytics import AnalyticsEventWriter
+from services.database import DatabaseService
+
+class MemoryStore:
+    """Collects written batches; optionally slow or failing"""
+
+    def __init__(self, write_seconds: float = 0.0, fail: bool = False):
+        self.write_seconds = write_seconds
+        self.fail = fail
+        self.batches = []
+
+    async def insert_generation_events(self, events):
+        await asyncio.sleep(self.write_seconds)
+        if self.fail:
+            raise ConnectionError("database unavailable")
+        self.batches.append(list(events))
+
+def event(index: int):
+    return {"session_id": index, "event_type": "completed", "occurred_at": datetime.now(), "data": {}}
+
+def test_full_batches_are_written_together():
+    async def run():
+        store = MemoryStore()
+        writer = AnalyticsEventWriter(store, batch_size=3, flush_seconds=10.0)
+        await writer.start()
+        for index in range(7):
+            assert writer.record(event(index))
+        await asyncio.sleep(0.05)
+        assert [len(batch) for batch in store.batches] == [3, 3]
+
+        await writer.stop()
+        assert [len(batch) for batch in store.batches] == [3, 3, 1]
+        assert [e["session_id"] for batch in store.batches for e in batch] == list(range(7))
+        metrics = writer.metrics()
+        assert metrics["written"] == 7 and metrics["batches"] == 3 and metrics["queue_depth"] == 0
+
+    asyncio.run(run())
+
+def test_partial_batch_is_flushed_after_flush_seconds():
+    async def run():
+        store = MemoryStore()
+        writer = AnalyticsEventWriter(store, batch_size=100, flush_seconds=0.05)
+        await writer.start()
+        writer.record(event(1))
+        writer.record(event(2))
+        await asyncio.sleep(0.02)
+        assert store.batches == []
+        await asyncio.sleep(0.1)
+        assert [len(batch) for batch in store.batches] == [2]
+        await writer.stop()
+
+    asyncio.run(run())
+
+def test_full_queue_drops_instead_of_blocking():
+    async def run():
+        writer = AnalyticsEventWriter(MemoryStore(), max_queue_size=2)
+        assert writer.record(event(1))
+        assert writer.record(event(2))
+        assert not writer.record(event(3))
+        metrics = writer.metrics()
+        assert metrics["recorded"] == 2 and metrics["dropped"] == 1
+        assert metrics["max_queue_depth"] == 2
+
+    asyncio.run(run())
+
+def test_failed_write_is_counted_and_the_writer_keeps_going():
+    async def run():
+        store = MemoryStore(fail=True)
+        writer = AnalyticsEventWriter(store, batch_size=2, flush_seconds=0.01)
+        await writer.start()
+        writer.record(event(1))
+        writer.record(event(2))
+        await asyncio.sleep(0.05)
+        assert writer.metrics()["failed"] == 2
+
+        store.fail = False
+        writer.record(event(3))
+        await asyncio.sleep(0.05)
+        assert writer.metrics()["written"] == 1
+        await writer.stop()
+
+    asyncio.run(run())
+
+def test_stop_waits_for_the_write_in_progress_and_drains():
+    async def run():
+        store = MemoryStore(write_seconds=0.05)
+        writer = AnalyticsEventWriter(store, batch_size=2, flush_seconds=10.0)
+        await writer.start()
+        for index in range(5):
+            writer.record(event(index))
+        await asyncio.sleep(0.01)  # First batch is being written
+        await writer.stop()
+        assert sum(len(batch) for batch in store.batches) == 5
+        assert writer.metrics()["written"] == 5
+
+    asyncio.run(run())
+
+class RecordingCursor:
+    def __init__(self, statements):
+        self.statements = statements
+
+    async def execute(self, query, params=None):
+        self.statements.append((query, params))
+
+    async def execute_values(self, query, argslist, template=None, fetch=False):
+        self.statements.append((query, list(argslist)))
+
+class RecordingPool:
+    def __init__(self):
+        self.statements = []
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield RecordingCursor(self.statements)
+
+def test_batch_is_one_insert_statement():
+    async def run():
+        database = DatabaseService()
+        database.pool = RecordingPool()
+        await database.insert_generation_events([event(1), {**event(2), "data": {"error": "boom"}}])
+        assert len(database.pool.statements) == 1
+        query, rows = database.pool.statements[0]
+        assert "INSERT INTO ai_generation_events" in query
+        assert [row[0] for row in rows] == [1, 2]
+        assert rows[1][14] == '{"error": "boom"}'
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
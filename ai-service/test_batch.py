@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Unit tests for batch generation
+The NDJSON stream, per-item failures, the concurrency cap and detached
+item tasks of /api/ai/generate-batch with stubbed database calls and
+pipeline (no models or database needed).
+
+Usage: python test_batch.py
+"""
+
+import asyncio
+import json
+from contextlib import contextmanager
+from datetime import datetime
+from types import SimpleNamespace
+
+from fastapi import HTTPException
+
+import main
+from models import BatchGenerationRequest, ContentGenerationRequest, GeneratedArticle, GenerationMetadata
+
+@contextmanager
+def stubbed(target, **replacements):
+    originals = {name: getattr(target, name) for name in replacements}
+    for name, value in replacements.items():
+        setattr(target, name, value)
+    try:
+        yield
+    finally:
+        for name, value in originals.items():
+            setattr(target, name, value)
+
+def pipeline_result(topic):
+    return {
+        "article": GeneratedArticle(
+            title=topic, slug="slug", content="...", excerpt="...", summary="...", key_points=[]
+        ),
+        "metadata": GenerationMetadata(
+            model_used="fake-model", tokens_used=10, processing_time_seconds=0.1, cost_usd=0.0,
+            quality_score=80, steps_completed=["content_generation"], timestamp=datetime.now()
+        )
+    }
+
+class BatchBackend:
+    """Stub database and pipeline; topics containing "fail" raise"""
+
+    def __init__(self, seconds=0.01):
+        self.seconds = seconds
+        self.running = 0
+        self.peak = 0
+        self.completed = []
+        self.failed = []
+        self.analytics = []
+
+    async def create_generation_sessions(self, items, user_id):
+        return [SimpleNamespace(id=100 + index) for index in range(len(items))]
+
+    async def run_generation_pipeline(self, request, session_id, **kwargs):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.seconds * (session_id % 3 + 1))
+            if "fail" in request.topic:
+                raise RuntimeError(f"{request.topic} failed")
+            return pipeline_result(request.topic)
+        finally:
+            self.running -= 1
+
+    async def complete_generation_session(self, session_id, content_type, result):
+        self.completed.append(session_id)
+
+    async def update_generation_session(self, session_id, status, error_message=None, **kwargs):
+        self.failed.append((session_id, status, error_message))
+
+    def track_generation_analytics(self, session_id, content_type, result=None, error=None):
+        self.analytics.append((session_id, "failed" if error else "completed"))
+
+    @contextmanager
+    def installed(self):
+        with stubbed(
+            main,
+            run_generation_pipeline=self.run_generation_pipeline,
+            complete_generation_session=self.complete_generation_session,
+            track_generation_analytics=self.track_generation_analytics
+        ), stubbed(
+            main.db_service,
+            create_generation_sessions=self.create_generation_sessions,
+            update_generation_session=self.update_generation_session
+        ):
+            yield
+
+def batch(topics, max_concurrency=None):
+    return BatchGenerationRequest(
+        items=[ContentGenerationRequest(topic=topic) for topic in topics],
+        max_concurrency=max_concurrency
+    )
+
+async def read_lines(response):
+    return [json.loads(line) async for line in response.body_iterator]
+
+def test_stream_reports_every_item_and_a_summary():
+    async def run():
+        backend = BatchBackend()
+        with backend.installed():
+            response = await main.generate_batch(
+                batch(["Red lentil soup", "Millet fail bowl", "Chickpea curry"]), current_user={"id": 1}
+            )
+            lines = await read_lines(response)
+
+        assert response.media_type == "application/x-ndjson"
+        assert lines[0] == {"event": "sessions", "session_ids": [100, 101, 102]}
+        results = {line["index"]: line for line in lines[1:-1]}
+        assert sorted(results) == [0, 1, 2] and all(line["event"] == "result" for line in results.values())
+        assert results[0]["success"] and results[0]["session_id"] == 100
+        assert results[0]["article"]["title"] == "Red lentil soup"
+        assert results[1] == {
+            "event": "result", "index": 1, "success": False, "session_id": 101, "error": "Millet fail bowl failed"
+        }
+        assert lines[-1]["event"] == "summary"
+        assert (lines[-1]["total"], lines[-1]["succeeded"], lines[-1]["failed"]) == (3, 2, 1)
+
+        assert sorted(backend.completed) == [100, 102]
+        assert backend.failed == [(101, "failed", "Millet fail bowl failed")]
+        assert sorted(backend.analytics) == [(100, "completed"), (101, "failed"), (102, "completed")]
+
+    asyncio.run(run())
+
+def test_results_stream_in_completion_order():
+    async def run():
+        backend = BatchBackend()
+        with backend.installed():
+            # Items take session_id % 3 + 1 steps: 102 finishes first, then 100, then 101
+            response = await main.generate_batch(
+                batch(["Red lentil soup", "Millet porridge", "Chickpea curry"]), current_user={"id": 1}
+            )
+            lines = await read_lines(response)
+
+        assert [line["session_id"] for line in lines[1:-1]] == [102, 100, 101]
+        assert [line["index"] for line in lines[1:-1]] == [2, 0, 1]
+
+    asyncio.run(run())
+
+def test_max_concurrency_caps_running_items():
+    async def run():
+        backend = BatchBackend()
+        with backend.installed():
+            response = await main.generate_batch(
+                batch([f"Lentil recipe {n}" for n in range(8)], max_concurrency=3), current_user={"id": 1}
+            )
+            lines = await read_lines(response)
+
+        assert backend.peak == 3
+        assert lines[-1]["succeeded"] == 8
+
+    asyncio.run(run())
+
+def test_items_finish_when_the_client_goes_away():
+    async def run():
+        backend = BatchBackend()
+        with backend.installed():
+            await main.generate_batch(batch(["Red lentil soup", "Millet porridge"]), current_user={"id": 1})
+            # The stream is never read
+            await asyncio.sleep(0.1)
+
+        assert sorted(backend.completed) == [100, 101]
+
+    asyncio.run(run())
+
+def test_session_creation_failure_is_a_500():
+    async def run():
+        async def create_generation_sessions(items, user_id):
+            raise ConnectionError("database unavailable")
+
+        backend = BatchBackend()
+        backend.create_generation_sessions = create_generation_sessions
+        with backend.installed():
+            try:
+                await main.generate_batch(batch(["Red lentil soup"]), current_user={"id": 1})
+                raise AssertionError("expected an HTTP error")
+            except HTTPException as e:
+                assert e.status_code == 500 and "database unavailable" in e.detail
+        assert backend.running == 0 and backend.completed == []
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Parallel save test for card position allocation
+Saves several AI articles per category at once and checks that no two
+articles were given the same card position, then fills every free slot and
+checks that the next article is saved unassigned. Needs DATABASE_URL; the
+test articles are deleted afterwards.
+
+Usage: python test_card_positions.py [--saves 12]
+"""
+
+import os
+import sys
+import uuid
+import asyncio
+import argparse
+from collections import Counter
+
+from dotenv import load_dotenv
+
+from services.database import DatabaseService, CARD_SLOTS_PER_PAGE
+
+load_dotenv()
+
+def sample_article(index: int, category: str, run_id: str):
+    title = f"Card position test {index} {'millets' if category == 'millets' else 'lentils'}"
+    return {
+        "title": title,
+        "slug": f"card-position-test-{run_id}-{index}",
+        "content": "Test content",
+        "excerpt": "Test excerpt",
+        "meta_title": title,
+        "meta_description": "Test article for parallel card position allocation"
+    }
+
+async def used_positions(db: DatabaseService, prefix: str):
+    """Card positions on the page held by articles or recipes"""
+    async with db.pool.transaction() as cursor:
+        await cursor.execute("""
+            SELECT card_position FROM cms_articles WHERE card_position LIKE %(prefix)s
+            UNION ALL
+            SELECT card_position FROM cms_recipes WHERE card_position LIKE %(prefix)s
+        """, {"prefix": f"{prefix}%"})
+        return [row['card_position'] for row in await cursor.fetchall()]
+
+def page_slots(prefix: str):
+    return {f"{prefix}{slot}" for slot in range(1, CARD_SLOTS_PER_PAGE + 1)}
+
+async def article_position(db: DatabaseService, article_id: int):
+    async with db.pool.transaction() as cursor:
+        await cursor.execute("SELECT card_position FROM cms_articles WHERE id = %s", (article_id,))
+        return (await cursor.fetchone())['card_position']
+
+async def save_article(db: DatabaseService, index: int, category: str, run_id: str) -> int:
+    return await db.save_article_to_cms(
+        session_id=0,  # No session row: the session update matches nothing
+        article_data=sample_article(index, category, run_id),
+        metadata={}
+    )
+
+async def run_parallel_saves(saves: int) -> bool:
+    db = DatabaseService()
+    await db.connect()
+    run_id = uuid.uuid4().hex[:8]
+    saved_ids = []
+
+    try:
+        ok = True
+        for category, prefix in (("lentils", "L"), ("millets", "M")):
+            before = await used_positions(db, prefix)
+            free = len(page_slots(prefix) - set(before))
+
+            results = await asyncio.gather(*[
+                save_article(db, index, category, run_id) for index in range(saves)
+            ], return_exceptions=True)
+
+            errors = [r for r in results if isinstance(r, Exception)]
+            saved_ids.extend(r for r in results if not isinstance(r, Exception))
+
+            after = await used_positions(db, prefix)
+            # Positions given out by this run that now belong to more than one article
+            added = Counter(after) - Counter(before)
+            duplicates = sorted(pos for pos in added if Counter(after)[pos] > 1)
+            assigned = sum(added.values())
+
+            print(f"{category:<8} {saves} parallel saves: {assigned} positions assigned "
+                  f"({max(free, 0)} were free), {len(errors)} errors, duplicates {duplicates or 'none'}")
+
+            if errors or duplicates or assigned != min(saves, max(free, 0)):
+                for error in errors:
+                    print(f"  ❌ {error}")
+                ok = False
+
+        return ok
+
+    finally:
+        if saved_ids:
+            async with db.pool.transaction() as cursor:
+                await cursor.execute("DELETE FROM cms_articles WHERE id = ANY(%s)", (saved_ids,))
+        await db.disconnect()
+
+async def run_full_page_save() -> bool:
+    """Fill every free slot on each page, then save one more article"""
+    db = DatabaseService()
+    await db.connect()
+    run_id = uuid.uuid4().hex[:8]
+    saved_ids = []
+
+    try:
+        ok = True
+        for category, prefix in (("lentils", "L"), ("millets", "M")):
+            slots = page_slots(prefix)
+            free = len(slots - set(await used_positions(db, prefix)))
+
+            for index in range(free):
+                saved_ids.append(await save_article(db, index, category, run_id))
+            taken = slots & set(await used_positions(db, prefix))
+
+            # The page is full: this one must save without a position, not fail the CHECK
+            saved_ids.append(await save_article(db, free, category, run_id))
+            overflow = await article_position(db, saved_ids[-1])
+
+            print(f"{category:<8} {free} saves filled the page: {len(taken)}/{len(slots)} slots taken, "
+                  f"next article saved {'unassigned' if overflow is None else 'at ' + overflow}")
+
+            if taken != slots or overflow is not None:
+                ok = False
+
+        return ok
+
+    finally:
+        if saved_ids:
+            async with db.pool.transaction() as cursor:
+                await cursor.execute("DELETE FROM cms_articles WHERE id = ANY(%s)", (saved_ids,))
+        await db.disconnect()
+
+def require_database():
+    import pytest
+    if not os.getenv("DATABASE_URL"):
+        pytest.skip("DATABASE_URL not set")
+
+def test_parallel_card_position_saves():
+    """Concurrent saves never share a card position"""
+    require_database()
+    assert asyncio.run(run_parallel_saves(12))
+
+def test_full_page_saves_unassigned():
+    """Once all six slots are taken the next article is saved without a position"""
+    require_database()
+    assert asyncio.run(run_full_page_save())
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--saves", type=int, default=12, help="parallel saves per category")
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        print("❌ DATABASE_URL is not set")
+        sys.exit(1)
+
+    if not asyncio.run(run_parallel_saves(args.saves)):
+        print("❌ Card position allocation failed under concurrency")
+        sys.exit(1)
+    if not asyncio.run(run_full_page_save()):
+        print("❌ A full card page did not save the next article unassigned")
+        sys.exit(1)
+    print("✅ Every saved article got a distinct card position, and full pages save unassigned")
+
+if __name__ == "__main__":
+    main_cli()
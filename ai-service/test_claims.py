@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Unit tests for claim extraction and claim-based fact-checking
+Covers the local claim scorer, normalisation and hashing, splicing
+citations back into the text, and the fact-check modes that may make no
+model call at all (stubbed, no provider keys needed).
+
+Usage: python test_claims.py
+"""
+
+import asyncio
+
+from services.claims import (
+    extract_claims,
+    normalize_claim,
+    claim_hash,
+    parse_verifications,
+    annotate,
+    citation_marker,
+    score_sentence,
+    splice,
+    annotations_in
+)
+from services.ai_processor import AIProcessor
+
+ARTICLE = (
+    "## Nutrition\n\n"
+    "Red lentils contain about 24 grams of protein per 100 grams. "
+    "They taste great in soups!\n"
+    "Finger millet is rich in calcium and iron.\n\n"
+    "## Cooking\n\n"
+    "Rinse them well before cooking.\n"
+)
+
+class CachedClaims:
+    """Claim store that has already verified every claim"""
+
+    async def get_claim_verifications(self, hashes):
+        return {h: {"verdict": "supported", "citation": "USDA FoodData Central, 2023", "note": ""} for h in hashes}
+
+    async def save_claim_verifications(self, verifications):
+        raise AssertionError("nothing new to save")
+
+def test_scorer_prefers_quantities_and_health_terms():
+    assert score_sentence("Red lentils contain about 24 grams of protein per 100 grams.") >= 5
+    assert score_sentence("Finger millet is rich in calcium and iron.") >= 2
+    assert score_sentence("They taste great in soups and stews!") == 0
+    assert score_sentence("## Protein 25g per 100g in lentils") == 0
+    assert score_sentence("Short 5g.") == 0
+
+def test_splice_inserts_markers_after_claims():
+    claims = extract_claims(ARTICLE)
+    markers = {claims[0].hash: " [Source: USDA, 2023]"}
+    spliced = splice(ARTICLE, claims, markers)
+    assert "per 100 grams. [Source: USDA, 2023] They taste" in spliced
+    assert spliced.replace(" [Source: USDA, 2023]", "") == ARTICLE
+
+def test_annotations_in():
+    text = "Lentils have protein [Source: USDA, 2023] and fiber [FACT-CHECK: Requires verification]."
+    assert annotations_in(text) == " [Source: USDA, 2023] [FACT-CHECK: Requires verification]"
+    assert annotations_in("No markers here.") == ""
+
+def test_extract_claims_in_text_order():
+    claims = extract_claims(ARTICLE)
+    assert [claim.text for claim in claims] == [
+        "Red lentils contain about 24 grams of protein per 100 grams.",
+        "Finger millet is rich in calcium and iron."
+    ]
+    assert all(ARTICLE[claim.start:claim.end] == claim.text for claim in claims)
+
+def test_decimals_do_not_end_a_sentence():
+    claims = extract_claims("Pearl millet has 1.5 mg of zinc per serving. Cook it slowly.")
+    assert [claim.text for claim in claims] == ["Pearl millet has 1.5 mg of zinc per serving."]
+
+def test_extract_claims_skips_repeats_and_annotated_sentences():
+    text = (
+        "Lentils provide 25 grams of protein per cup. "
+        "Lentils provide about 25g of protein per cup. "
+        "Millets are high in fiber and magnesium [Source: USDA, 2023]. "
+        "Quinoa has 8 grams of protein per cup [FACT-CHECK: Requires verification]."
+    )
+    claims = extract_claims(text)
+    assert [claim.text for claim in claims] == ["Lentils provide 25 grams of protein per cup."]
+
+def test_rephrased_claims_share_a_hash():
+    assert normalize_claim("Lentils provide 25 grams of protein.") == "lentils provide 25g of protein"
+    assert normalize_claim("- **Lentils** provide about 25g of protein") == "lentils provide 25g of protein"
+    assert normalize_claim("Rich in fibre, 10 percent") == normalize_claim("rich in fiber, 10%")
+    assert claim_hash(normalize_claim("25 grams of protein")) == claim_hash(normalize_claim("about 25g of protein"))
+    assert claim_hash("25g of protein") != claim_hash("26g of protein")
+
+def test_parse_verifications():
+    answer = 'Here are the results:\n[{"id": "1", "verdict": "supported"}, {"verdict": "missing id"}, "text"]\nDone.'
+    assert parse_verifications(answer) == [{"id": "1", "verdict": "supported"}]
+    assert parse_verifications("No JSON here") == []
+    assert parse_verifications("[not json]") == []
+
+def test_citation_marker():
+    assert citation_marker({"verdict": "supported", "citation": "USDA, 2023"}) == " [Source: USDA, 2023]"
+    assert citation_marker({"verdict": "supported", "citation": "  "}) is None
+    assert citation_marker({"verdict": "unsupported"}) == " [FACT-CHECK: Requires verification]"
+
+def test_annotate_marks_verified_claims_only():
+    claims = extract_claims(ARTICLE)
+    verifications = {
+        claims[0].hash: {"verdict": "supported", "citation": "USDA, 2023"},
+        claims[1].hash: {"verdict": "unsupported", "citation": ""}
+    }
+    annotated = annotate(ARTICLE, claims, verifications)
+    assert "per 100 grams. [Source: USDA, 2023]" in annotated
+    assert "calcium and iron. [FACT-CHECK: Requires verification]" in annotated
+    assert annotate(ARTICLE, claims, {}) == ARTICLE
+
+def test_merged_stats_of_no_calls_are_not_a_cache_hit():
+    assert AIProcessor()._merge_call_stats([])["cache_hit"] is False
+
+def test_filtered_mode_without_claims_is_not_a_cache_hit():
+    result = asyncio.run(AIProcessor()._fact_check_filtered("## Cooking\n\nRinse them well before cooking.\n", "Lentils"))
+    assert result["claims_total"] == 0
+    assert result["cache_hit"] is False
+
+def test_claim_mode_served_from_claim_cache_is_not_a_response_cache_hit():
+    processor = AIProcessor(claim_store=CachedClaims())
+    result = asyncio.run(processor._fact_check_claims(ARTICLE, "Lentils"))
+    assert result["claims_total"] == result["claims_cached"] == 2
+    assert result["cache_hit"] is False
+    assert result["enhanced_content"].count("[Source: USDA FoodData Central, 2023]") == 2
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Unit tests for request coalescing
+Fingerprinting of generation requests and SingleFlight sharing of one
+in-flight result (or error) between identical concurrent requests.
+
+Usage: python test_coalescing.py
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from fastapi import HTTPException
+
+import main
+from models import ContentGenerationRequest, GenerationOptions
+from services.coalescing import SingleFlight, FlightAbandonedError, normalize_topic, request_fingerprint
+
+def test_normalize_topic():
+    assert normalize_topic("  Red   Lentil Soup!  ") == "red lentil soup"
+    assert normalize_topic("Red lentil soup.") == normalize_topic("RED LENTIL SOUP")
+
+def test_request_fingerprint():
+    base = request_fingerprint(ContentGenerationRequest(topic="Red lentil soup"), user_id=1)
+    assert request_fingerprint(ContentGenerationRequest(topic="  red LENTIL soup. "), user_id=1) == base
+    # Missing options are the same as the defaults
+    assert request_fingerprint(ContentGenerationRequest(topic="Red lentil soup", options=GenerationOptions()), 1) == base
+    assert request_fingerprint(ContentGenerationRequest(topic="Red lentil soup"), user_id=2) != base
+    assert request_fingerprint(ContentGenerationRequest(topic="Red lentil soup", content_type="recipe"), 1) != base
+    options = GenerationOptions(target_length=2000)
+    assert request_fingerprint(ContentGenerationRequest(topic="Red lentil soup", options=options), 1) != base
+
+def test_followers_share_the_leaders_result():
+    async def run():
+        flights = SingleFlight()
+        calls = 0
+
+        async def generate(key):
+            nonlocal calls
+            flight, leader = flights.join_or_lead(key)
+            if not leader:
+                return await flight.wait_started(), await flight.wait()
+            calls += 1
+            await asyncio.sleep(0.01)  # Requests arriving while the session is created still join
+            flights.started(flight, 42)
+            await asyncio.sleep(0.01)
+            flights.resolve(flight, result={"article": "text"})
+            return 42, await flight.wait()
+
+        results = await asyncio.gather(*[generate("same") for _ in range(5)])
+        assert calls == 1
+        assert all(result == (42, {"article": "text"}) for result in results)
+        assert flights.metrics() == {"in_flight": 0, "leaders": 1, "coalesced_requests": 4}
+
+        # A retired key starts a new flight
+        _, leader = flights.join_or_lead("same")
+        assert leader
+
+    asyncio.run(run())
+
+def test_leader_error_is_raised_for_followers():
+    async def run():
+        flights = SingleFlight()
+        flight, _ = flights.join_or_lead("key")
+        follower, leader = flights.join_or_lead("key")
+        assert follower is flight and not leader
+        assert flight.followers == 1
+
+        # Session creation failed: followers waiting for the start see the error
+        waiting = asyncio.create_task(follower.wait_started())
+        await asyncio.sleep(0)
+        flights.resolve(flight, error=RuntimeError("database unavailable"))
+        try:
+            await waiting
+            raise AssertionError("expected the leader's error")
+        except RuntimeError as e:
+            assert str(e) == "database unavailable"
+
+    asyncio.run(run())
+
+def test_resolve_session():
+    async def run():
+        flights = SingleFlight()
+        flight, _ = flights.join_or_lead("key")
+        flights.started(flight, 7)
+        assert flights.get(7) is flight
+
+        flights.resolve_session(7, result="done")
+        assert await flight.wait() == "done"
+        assert flights.get(7) is None
+        # Resolving again, or an unknown session, is a no-op
+        flights.resolve(flight, error=RuntimeError("late"))
+        flights.resolve_session(8, result="other")
+        assert await flight.wait() == "done"
+
+    asyncio.run(run())
+
+def test_cancelled_follower_does_not_cancel_the_flight():
+    async def run():
+        flights = SingleFlight()
+        flight, _ = flights.join_or_lead("key")
+        follower = asyncio.create_task(flight.wait())
+        await asyncio.sleep(0)
+        follower.cancel()
+        await asyncio.sleep(0)
+        flights.resolve(flight, result="done")
+        assert await flight.wait() == "done"
+
+    asyncio.run(run())
+
+def test_abandoned_flight_releases_followers():
+    async def run():
+        flights = SingleFlight()
+        flight, _ = flights.join_or_lead("key")
+        follower, _ = flights.join_or_lead("key")
+        waiting = asyncio.create_task(follower.wait_started())
+        await asyncio.sleep(0)
+
+        flights.abandon(flight)
+        try:
+            await waiting
+            raise AssertionError("expected the flight to be abandoned")
+        except FlightAbandonedError:
+            pass
+        assert flights.metrics()["in_flight"] == 0
+
+    asyncio.run(run())
+
+def test_cancelled_leader_does_not_strand_followers():
+    async def run():
+        sessions = iter(range(1, 100))
+        pipelines = 0
+
+        async def create_generation_session(**kwargs):
+            await asyncio.sleep(0.01)
+            return SimpleNamespace(id=next(sessions))
+
+        async def update_generation_session(**kwargs):
+            pass
+
+        async def run_generation_pipeline(request, session_id, **kwargs):
+            nonlocal pipelines
+            pipelines += 1
+            await asyncio.sleep(60)
+
+        originals = (
+            main.db_service.create_generation_session,
+            main.db_service.update_generation_session,
+            main.run_generation_pipeline
+        )
+        main.db_service.create_generation_session = create_generation_session
+        main.db_service.update_generation_session = update_generation_session
+        main.run_generation_pipeline = run_generation_pipeline
+        try:
+            request = ContentGenerationRequest(topic="Red lentil soup")
+            user = {"id": 1}
+            for cancel_after in (0.0, 0.05):  # While creating the session, then mid pipeline
+                leader = asyncio.create_task(main.generate(request, "sync", user))
+                await asyncio.sleep(0)
+                follower = asyncio.create_task(main.generate(request, "sync", user))
+                await asyncio.sleep(cancel_after)
+                leader.cancel()
+
+                try:
+                    await asyncio.wait_for(follower, timeout=1.0)
+                    raise AssertionError("the follower must not get a result")
+                except HTTPException as e:
+                    assert e.status_code == 503
+                assert main.generation_flights.metrics()["in_flight"] == 0
+            assert pipelines == 1
+        finally:
+            (
+                main.db_service.create_generation_session,
+                main.db_service.update_generation_session,
+                main.run_generation_pipeline
+            ) = originals
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Unit tests for DatabaseService statements
+Batch session creation, session finalisation, rollup upkeep and the
+analytics read against a recording pool (no database needed). Statements
+are rendered with psycopg2's adapters, so every placeholder must bind.
+
+Usage: python test_database.py
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+
+from psycopg2.extensions import adapt
+
+from models import GenerationMetadata
+from services.database import DatabaseService
+
+def render(query, params):
+    """The SQL psycopg2 would send for query and params"""
+    if isinstance(params, dict):
+        return query % {key: adapt(value).getquoted().decode() for key, value in params.items()}
+    return query % tuple(adapt(value).getquoted().decode() for value in params)
+
+class RecordingCursor:
+    def __init__(self, pool):
+        self.pool = pool
+        self.results = []
+
+    async def execute(self, query, params=None):
+        self.pool.statements.append(render(query, params or ()))
+        self.results = list(self.pool.results.pop(0)) if self.pool.results else []
+
+    async def execute_values(self, query, argslist, template=None, fetch=False):
+        template = template or "(" + ", ".join(["%s"] * len(argslist[0])) + ")"
+        values = ", ".join(render(template, row) for row in argslist)
+        self.pool.statements.append(query.replace("VALUES %s", "VALUES " + values))
+        self.results = list(self.pool.results.pop(0)) if self.pool.results else []
+        return self.results if fetch else None
+
+    async def fetchone(self):
+        return self.results[0] if self.results else None
+
+    async def fetchall(self):
+        return self.results
+
+class RecordingPool:
+    """Records rendered statements; results are returned per statement, in order"""
+
+    def __init__(self, results=()):
+        self.statements = []
+        self.results = list(results)
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield RecordingCursor(self)
+
+def recording_database(results=()):
+    database = DatabaseService()
+    database.pool = RecordingPool(results)
+    return database
+
+def metadata():
+    return GenerationMetadata(
+        model_used="gpt-4", tokens_used=1200, processing_time_seconds=12.7,
+        cost_usd=0.05, quality_score=88, steps_completed=["content_generation"], timestamp=datetime(2024, 5, 2)
+    )
+
+def rollup_targets(statement):
+    return [table for table in ("ai_generation_rollups_hourly", "ai_generation_rollups_daily", "ai_topic_rollups")
+            if f"INSERT INTO {table}" in statement]
+
+def test_completion_is_a_single_statement():
+    async def run():
+        database = recording_database(results=[[{"id": 41, "card_position": "L2"}]])
+        article = {"title": "Red Lentil Dal", "slug": "red-lentil-dal", "content": "...", "excerpt": "..."}
+        cms_id = await database.complete_generation_session(7, "article", article, metadata())
+
+        assert cms_id == 41
+        assert len(database.pool.statements) == 1
+        statement = database.pool.statements[0]
+        assert "INSERT INTO cms_articles" in statement
+        assert "status = 'completed'" in statement and "'gpt-4'" in statement
+        assert "DELETE FROM ai_generation_checkpoints WHERE session_id = 7" in statement
+        assert rollup_targets(statement) == [
+            "ai_generation_rollups_hourly", "ai_generation_rollups_daily", "ai_topic_rollups"
+        ]
+        # A session that is already finished is neither updated nor counted again
+        assert "WHERE id = 7 AND status NOT IN ('completed', 'failed')" in statement
+
+    asyncio.run(run())
+
+def test_draft_save_without_completion_leaves_rollups_alone():
+    async def run():
+        database = recording_database(results=[[{"id": 5, "card_position": None}]])
+        recipe = {"title": "Millet Porridge", "ingredients": [], "instructions": []}
+        assert await database.save_recipe_to_cms(7, recipe, {"model_used": "gpt-4"}) == 5
+
+        statement = database.pool.statements[0]
+        assert "INSERT INTO cms_recipes" in statement
+        assert rollup_targets(statement) == []
+        assert "status = 'completed'" not in statement and "NOT IN" not in statement
+
+    asyncio.run(run())
+
+def test_only_the_first_finish_is_counted():
+    async def run():
+        database = recording_database()
+        await database.update_generation_session(7, "failed", error_message="provider down")
+
+        [statement] = database.pool.statements
+        assert "error_message = 'provider down'" in statement
+        assert "WHERE id = 7 AND status NOT IN ('completed', 'failed')\n" in statement
+        assert rollup_targets(statement) == [
+            "ai_generation_rollups_hourly", "ai_generation_rollups_daily", "ai_topic_rollups"
+        ]
+        assert "FROM finished" in statement and "-1" not in statement
+
+    asyncio.run(run())
+
+def test_completed_update_records_metrics_and_drops_checkpoints():
+    async def run():
+        database = recording_database()
+        await database.update_generation_session(7, "completed", metadata=metadata())
+
+        update, cleanup = database.pool.statements
+        assert "total_cost = 0.05" in update and "processing_time_seconds = 12" in update
+        assert "AND status NOT IN ('completed', 'failed')" in update
+        assert cleanup.strip() == "DELETE FROM ai_generation_checkpoints WHERE session_id = 7"
+
+    asyncio.run(run())
+
+def test_resume_takes_the_earlier_outcome_back_out():
+    async def run():
+        database = recording_database()
+        await database.update_generation_session(7, "processing")
+
+        [statement] = database.pool.statements
+        assert "WHERE id = 7 AND status IN ('completed', 'failed')\n                        FOR UPDATE" in statement
+        assert "SET status = 'processing'" in statement
+        assert rollup_targets(statement) == [
+            "ai_generation_rollups_hourly", "ai_generation_rollups_daily", "ai_topic_rollups"
+        ]
+        assert "FROM reopened" in statement
+        assert "-1,\n                    -(status = 'completed')::int, -(status = 'failed')::int" in statement
+        assert "-COALESCE(total_cost, 0)" in statement and "-(quality_score IS NOT NULL)::int" in statement
+        assert "generations = ai_topic_rollups.generations + EXCLUDED.generations" in statement
+
+    asyncio.run(run())
+
+def test_batch_sessions_are_matched_to_items_by_index():
+    async def run():
+        created = datetime(2024, 5, 2)
+        # Rows come back in any order, with ids unrelated to input order
+        database = recording_database(results=[[
+            {"id": 31, "topic_input": "Millet porridge", "user_id": 9, "content_type": "recipe",
+             "session_timestamp": created, "status": "processing", "item_index": 1},
+            {"id": 30, "topic_input": "Chickpea curry", "user_id": 9, "content_type": "article",
+             "session_timestamp": created, "status": "processing", "item_index": 2},
+            {"id": 32, "topic_input": "Red lentil soup", "user_id": 9, "content_type": "article",
+             "session_timestamp": created, "status": "processing", "item_index": 0},
+        ]])
+        sessions = await database.create_generation_sessions([
+            {"topic": "Red lentil soup"},
+            {"topic": "Millet porridge", "content_type": "recipe", "options": {"target_word_count": 600}},
+            {"topic": "Chickpea curry"},
+        ], user_id=9)
+
+        assert [(s.id, s.topic_input) for s in sessions] == [
+            (32, "Red lentil soup"), (31, "Millet porridge"), (30, "Chickpea curry")
+        ]
+        [statement] = database.pool.statements
+        assert "(0, 'Red lentil soup', 9, 'article', '{}'::jsonb)" in statement
+        assert "(1, 'Millet porridge', 9, 'recipe', '{\"target_word_count\": 600}'::jsonb)" in statement
+        assert "SELECT created.*, numbered.item_index" in statement
+
+    asyncio.run(run())
+
+def test_quality_trends_are_dated_per_model():
+    async def run():
+        updated = datetime(2024, 5, 2, 12)
+        model_rows = [
+            {"model_used": "gpt-4", "generations": 3, "completed": 2, "total_cost": 0.3,
+             "processing_seconds": 40, "quality_sum": 170, "quality_count": 2, "last_updated": updated},
+            {"model_used": "claude-3-sonnet", "generations": 1, "completed": 1, "total_cost": 0.1,
+             "processing_seconds": 10, "quality_sum": 90, "quality_count": 1, "last_updated": updated},
+        ]
+        daily_rows = [
+            {"date": date(2024, 5, 1), "model_used": "gpt-4", "generations": 2, "daily_cost": 0.2,
+             "quality_sum": 80, "quality_count": 1},
+            {"date": date(2024, 5, 2), "model_used": "claude-3-sonnet", "generations": 1, "daily_cost": 0.1,
+             "quality_sum": 90, "quality_count": 1},
+            {"date": date(2024, 5, 2), "model_used": "gpt-4", "generations": 1, "daily_cost": 0.1,
+             "quality_sum": 90, "quality_count": 1},
+            {"date": date(2024, 5, 2), "model_used": "unknown", "generations": 1, "daily_cost": 0,
+             "quality_sum": 0, "quality_count": 0},
+        ]
+        database = recording_database(results=[
+            model_rows, daily_rows, [{"generations": 1, "total_cost": 0.1}], []
+        ])
+        analytics = await database.get_performance_analytics()
+
+        assert analytics.quality_trends == {
+            "overall": [
+                {"date": "2024-05-01", "average_quality": 80.0},
+                {"date": "2024-05-02", "average_quality": 90.0},
+            ],
+            "gpt-4": [
+                {"date": "2024-05-01", "average_quality": 80.0},
+                {"date": "2024-05-02", "average_quality": 90.0},
+            ],
+            "claude-3-sonnet": [{"date": "2024-05-02", "average_quality": 90.0}],
+        }
+        assert [day["generations"] for day in analytics.cost_trends] == [3, 2]
+        assert analytics.total_generations == 4
+        assert all("ai_generation_sessions" not in statement for statement in database.pool.statements)
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
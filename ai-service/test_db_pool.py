@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the async connection pool
+Runs AsyncConnectionPool against stub connections (no database needed).
+
+Usage: python test_db_pool.py
+"""
+
+import time
+import asyncio
+
+from services.db_pool import AsyncConnectionPool, PoolTimeoutError
+
+class StubCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, query, params=None):
+        time.sleep(self.connection.query_seconds)
+
+    def close(self):
+        pass
+
+class StubConnection:
+    def __init__(self, query_seconds: float = 0.0):
+        self.query_seconds = query_seconds
+        self.closed = 0
+        self.commits = 0
+        self.rollbacks = 0
+        self.cancelled = False
+
+    def cursor(self):
+        return StubCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def cancel(self):
+        self.cancelled = True
+
+    def close(self):
+        self.closed = 1
+
+def stub_pool(query_seconds: float = 0.0, connect_seconds: float = 0.0, **kwargs):
+    pool = AsyncConnectionPool("stub", min_size=0, **kwargs)
+    connections = []
+
+    def connect():
+        time.sleep(connect_seconds)
+        connection = StubConnection(query_seconds)
+        connections.append(connection)
+        return connection
+
+    pool._connect = connect
+    return pool, connections
+
+def test_connections_are_reused():
+    async def run():
+        pool, connections = stub_pool(max_size=2)
+        for _ in range(5):
+            async with pool.transaction() as cursor:
+                await cursor.execute("SELECT 1")
+        assert len(connections) == 1
+        assert connections[0].commits == 5
+        await pool.close()
+
+    asyncio.run(run())
+
+def test_error_rolls_back_and_keeps_connection():
+    async def run():
+        pool, connections = stub_pool(max_size=1)
+        try:
+            async with pool.transaction() as cursor:
+                await cursor.execute("SELECT 1")
+                raise ValueError("boom")
+        except ValueError:
+            pass
+        assert connections[0].rollbacks == 1
+        assert pool.metrics()["idle"] == 1
+        await pool.close()
+
+    asyncio.run(run())
+
+def test_cancelled_transaction_discards_connection():
+    async def run():
+        pool, connections = stub_pool(query_seconds=0.3, max_size=1)
+
+        async def slow_query():
+            async with pool.transaction() as cursor:
+                await cursor.execute("SELECT pg_sleep(1)")
+
+        try:
+            await asyncio.wait_for(slow_query(), timeout=0.05)
+        except asyncio.TimeoutError:
+            pass
+
+        metrics = pool.metrics()
+        assert connections[0].cancelled
+        assert connections[0].closed
+        assert connections[0].commits == 0
+        assert metrics["idle"] == 0 and metrics["in_use"] == 0
+        assert metrics["discarded_connections"] == 1
+
+        # The slot is free again and gets a fresh connection
+        connections[0].query_seconds = 0.0
+        async with pool.transaction() as cursor:
+            await cursor.execute("SELECT 1")
+        assert len(connections) == 2
+        await pool.close()
+
+    asyncio.run(run())
+
+def test_close_waits_for_checked_out_connections():
+    async def run():
+        pool, connections = stub_pool(query_seconds=0.2, max_size=2)
+
+        async def query():
+            async with pool.transaction() as cursor:
+                await cursor.execute("SELECT 1")
+
+        task = asyncio.create_task(query())
+        await asyncio.sleep(0.05)
+        await pool.close(drain_timeout=2.0)
+        await task  # Released before the executor stopped: no error
+
+        assert connections[0].commits == 1
+        assert connections[0].closed
+        assert pool.metrics()["in_use"] == 0
+
+    asyncio.run(run())
+
+def test_cancel_while_connecting_frees_the_slot():
+    async def run():
+        pool, connections = stub_pool(connect_seconds=0.2, max_size=2, acquire_timeout=1.0)
+
+        async def query():
+            async with pool.transaction() as cursor:
+                await cursor.execute("SELECT 1")
+
+        for _ in range(2):
+            try:
+                await asyncio.wait_for(query(), timeout=0.05)
+            except asyncio.TimeoutError:
+                pass
+
+        metrics = pool.metrics()
+        assert metrics["size"] == 0 and metrics["in_use"] == 0
+
+        # Both slots are usable again
+        await asyncio.gather(query(), query())
+        assert pool.metrics()["size"] == 2
+        # The connections finished after their callers gave up are closed, not leaked
+        assert sum(1 for connection in connections if connection.closed) == 2
+        await pool.close()
+
+    asyncio.run(run())
+
+def test_cancel_during_health_check_discards_connection():
+    async def run():
+        pool, connections = stub_pool(max_size=1, health_check_interval=0.0)
+        async with pool.transaction() as cursor:
+            await cursor.execute("SELECT 1")
+
+        pool._ping = lambda connection: time.sleep(0.2) or True
+        try:
+            await asyncio.wait_for(pool._acquire(), timeout=0.05)
+        except asyncio.TimeoutError:
+            pass
+        await asyncio.sleep(0.3)
+
+        metrics = pool.metrics()
+        assert connections[0].closed
+        assert metrics["size"] == 0 and metrics["idle"] == 0
+        assert metrics["discarded_connections"] == 1
+
+        pool._ping = lambda connection: True
+        async with pool.transaction() as cursor:
+            await cursor.execute("SELECT 1")
+        assert len(connections) == 2
+        await pool.close()
+
+    asyncio.run(run())
+
+def test_acquire_timeout_keeps_no_permit():
+    async def run():
+        pool, connections = stub_pool(max_size=1, acquire_timeout=0.05)
+        holder = await pool._acquire()
+        for _ in range(3):
+            try:
+                await pool._acquire()
+                raise AssertionError("expected a timeout")
+            except PoolTimeoutError:
+                pass
+        await pool._release(holder)
+
+        assert pool.metrics()["acquire_timeouts"] == 3
+        assert pool.metrics()["waiting"] == 0
+        async with pool.transaction() as cursor:
+            await cursor.execute("SELECT 1")
+        assert pool._semaphore._value == 1
+        await pool.close()
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Unit tests for extractive summarization
+Sentence splitting and ranking, the digest used to shrink summarization
+input, and the model-free summary.
+
+Usage: python test_extractive.py
+"""
+
+from services.extractive import split_sentences, rank_sentences, build_digest, extractive_summary
+
+ARTICLE = (
+    "# Millets for Everyday Cooking\n\n"
+    "## Nutrition\n\n"
+    "Finger millet provides about 344 mg of calcium per 100 grams of grain.\n"
+    "Millets are rich in fiber, which supports steady blood sugar levels.\n"
+    "Pearl millet is a good source of iron and magnesium for vegetarian diets.\n\n"
+    "## Cooking\n\n"
+    "- Rinse millet well and toast it in a dry pan before adding water.\n"
+    "- Simmer one cup of millet in two and a half cups of water for twenty minutes.\n"
+    "Toasted millet has a nutty flavour that works in pilafs and porridge.\n\n"
+    "## Storage\n\n"
+    "Store millet in an airtight jar in a cool, dark cupboard for up to six months.\n"
+    "Millet flour turns rancid faster, so keep it refrigerated and use it quickly.\n"
+)
+
+def test_split_sentences_strips_markdown_and_keeps_headings():
+    sentences = split_sentences(ARTICLE + "Millets are rich in fiber, which supports steady blood sugar levels.\n")
+    assert len(sentences) == 8
+    assert sentences[0].heading == "## Nutrition"
+    assert sentences[3].text.startswith("Rinse millet")
+    assert sentences[3].heading == "## Cooking"
+
+def test_rank_sentences_scores_every_sentence():
+    ranked = rank_sentences(split_sentences(ARTICLE))
+    assert len(ranked) == 8
+    assert all(ranked[i].score >= ranked[i + 1].score for i in range(len(ranked) - 1))
+    assert rank_sentences([]) == []
+
+def test_short_text_is_returned_unchanged():
+    assert build_digest(ARTICLE, len(ARTICLE)) == ARTICLE
+
+def test_digest_fits_max_chars_including_headings():
+    for max_chars in range(40, len(ARTICLE), 15):
+        digest = build_digest(ARTICLE, max_chars)
+        assert len(digest) <= max_chars, (max_chars, len(digest))
+
+def test_digest_keeps_article_order_under_headings():
+    digest = build_digest(ARTICLE, 400)
+    lines = [line for line in digest.splitlines() if line]
+    positions = [ARTICLE.index(line) for line in lines if not line.startswith("#")]
+    assert positions == sorted(positions)
+    assert any(line.startswith("## ") for line in lines)
+
+def test_extractive_summary():
+    summary = extractive_summary(ARTICLE, key_points=3, summary_words=30)
+    assert summary["title"] == "Millets for Everyday Cooking"
+    assert len(summary["key_points"]) == 3
+    assert not any(point.endswith(".") for point in summary["key_points"])
+    assert 0 < len(summary["summary"].split()) < 60
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Unit tests for request hedging
+Latency percentiles, first-successful-wins racing, and AIProcessor._call_hedged
+against stubbed model calls (no provider keys needed).
+
+Usage: python test_hedging.py
+"""
+
+import asyncio
+
+from services.hedging import LatencyTracker, first_successful
+from services.ai_processor import AIProcessor
+from services.token_accounting import count_prompt_tokens
+
+class StatusError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+async def answer(value, seconds: float = 0.0, error: Exception = None):
+    await asyncio.sleep(seconds)
+    if error:
+        raise error
+    return value
+
+def test_latency_percentile_needs_min_samples():
+    tracker = LatencyTracker(window=10, min_samples=5)
+    for seconds in (0.1, 0.2, 0.3, 0.4):
+        tracker.record("summarization", "gpt-4", seconds)
+    assert tracker.percentile("summarization", "gpt-4", 0.9) is None
+    for seconds in range(1, 21):
+        tracker.record("summarization", "gpt-4", seconds / 10)
+    # Only the last 10 samples (1.1s-2.0s) are kept
+    assert tracker.percentile("summarization", "gpt-4", 0.9) == 2.0
+    assert tracker.percentile("summarization", "gpt-4", 0.5) == 1.6
+    assert tracker.metrics()["summarization:gpt-4"]["samples"] == 10
+
+def test_first_successful_primary_wins():
+    async def run():
+        primary = asyncio.create_task(answer("primary", 0.01))
+        hedge = asyncio.create_task(answer("hedge", 0.5))
+        winner, result = await first_successful([primary, hedge])
+        assert winner is primary and result == "primary"
+        assert hedge.cancelled()
+
+    asyncio.run(run())
+
+def test_first_successful_hedge_wins():
+    async def run():
+        primary = asyncio.create_task(answer("primary", 0.5))
+        hedge = asyncio.create_task(answer("hedge", 0.01))
+        winner, result = await first_successful([primary, hedge])
+        assert winner is hedge and result == "hedge"
+        assert primary.cancelled()
+
+    asyncio.run(run())
+
+def test_first_successful_skips_a_failed_racer():
+    async def run():
+        primary = asyncio.create_task(answer("primary", 0.0, StatusError(503)))
+        hedge = asyncio.create_task(answer("hedge", 0.05))
+        winner, result = await first_successful([primary, hedge])
+        assert winner is hedge and result == "hedge"
+
+    asyncio.run(run())
+
+def test_first_successful_both_fail_raises_primary_error():
+    async def run():
+        primary = asyncio.create_task(answer("primary", 0.02, StatusError(503)))
+        hedge = asyncio.create_task(answer("hedge", 0.01, StatusError(502)))
+        try:
+            await first_successful([primary, hedge])
+            raise AssertionError("expected the primary's error")
+        except StatusError as e:
+            assert e.status_code == 503
+
+    asyncio.run(run())
+
+def hedging_processor(latencies, errors=None):
+    """AIProcessor that hedges summarization calls on gpt-4 after 20ms, with stubbed model calls"""
+    processor = AIProcessor()
+    processor.hedging_enabled = True
+    processor.latency_tracker = LatencyTracker(min_samples=1)
+    processor.latency_tracker.record("summarization", "gpt-4", 0.02)
+    calls = []
+
+    async def call_model(model, prompt, **kwargs):
+        calls.append(model)
+        await asyncio.sleep(latencies[model])
+        if errors and model in errors:
+            raise errors[model]
+        return {
+            "content": f"answer from {model}", "model": model, "input_tokens": 100, "output_tokens": 400,
+            "cached_tokens": 0, "tokens_used": 500, "cache_hit": False
+        }
+
+    processor._call_model = call_model
+    return processor, calls
+
+def test_hedge_wins_is_recorded_on_the_hedge_provider():
+    processor, calls = hedging_processor({"gpt-4": 0.5, "claude-3-haiku-20240307": 0.01})
+    result = asyncio.run(processor._call_hedged("summarization", "gpt-4", "claude-3-haiku-20240307", "prompt"))
+
+    assert calls == ["gpt-4", "claude-3-haiku-20240307"]
+    assert result["hedged"] and result["hedge_won"]
+    assert result["content"] == "answer from claude-3-haiku-20240307"
+    assert processor.circuit_breakers["anthropic"].metrics()["consecutive_failures"] == 0
+    # The cancelled gpt-4 call is priced at gpt-4 rates with its own prompt tokens
+    expected = processor._model_cost("gpt-4", count_prompt_tokens("gpt-4", "prompt"), 400)
+    assert expected > 0
+    assert abs(result["hedge_extra_cost"] - expected) < 1e-9
+
+def test_primary_wins_prices_the_cancelled_hedge():
+    processor, calls = hedging_processor({"gpt-4": 0.06, "claude-3-haiku-20240307": 0.5})
+    result = asyncio.run(processor._call_hedged("summarization", "gpt-4", "claude-3-haiku-20240307", "prompt"))
+
+    assert result["hedged"] and not result["hedge_won"]
+    # The hedge started 20ms in, so it ran for about two thirds of the primary's time
+    full = processor._model_cost(
+        "claude-3-haiku-20240307", count_prompt_tokens("claude-3-haiku-20240307", "prompt"), 400
+    )
+    assert 0 < result["hedge_extra_cost"] < full
+
+def test_primary_failing_before_the_delay_is_not_hedged():
+    processor, calls = hedging_processor(
+        {"gpt-4": 0.0, "claude-3-haiku-20240307": 0.0}, errors={"gpt-4": StatusError(503)}
+    )
+    try:
+        asyncio.run(processor._call_hedged("summarization", "gpt-4", "claude-3-haiku-20240307", "prompt"))
+        raise AssertionError("expected the primary's error")
+    except StatusError:
+        pass
+    assert calls == ["gpt-4"]
+
+def test_both_failing_records_the_hedge_failure():
+    processor, calls = hedging_processor(
+        {"gpt-4": 0.05, "claude-3-haiku-20240307": 0.01},
+        errors={"gpt-4": StatusError(503), "claude-3-haiku-20240307": StatusError(529)}
+    )
+    try:
+        asyncio.run(processor._call_hedged("summarization", "gpt-4", "claude-3-haiku-20240307", "prompt"))
+        raise AssertionError("expected the primary's error")
+    except StatusError as e:
+        assert e.status_code == 503
+    assert processor.circuit_breakers["anthropic"].total_failures == 1
+    # The primary's failure is left to the caller
+    assert processor.circuit_breakers["openai"].total_failures == 0
+
+def test_open_hedge_circuit_skips_the_hedge():
+    processor, calls = hedging_processor({"gpt-4": 0.05, "claude-3-haiku-20240307": 0.0})
+    breaker = processor.circuit_breakers["anthropic"]
+    breaker.failure_threshold = 1
+    breaker.record_failure()
+    result = asyncio.run(processor._call_hedged("summarization", "gpt-4", "claude-3-haiku-20240307", "prompt"))
+    assert calls == ["gpt-4"]
+    assert not result["hedged"]
+    assert breaker.rejected_calls == 1
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the generation job pool
+Worker concurrency, queue backpressure, progress tracking and event
+subscriptions of GenerationJobManager with stub runners (no models or
+database needed).
+
+Usage: python test_jobs.py
+"""
+
+import asyncio
+
+from services.jobs import GenerationJobManager, JobQueueFullError
+
+class GatedRunner:
+    """Runs each job until its gate opens; records how many ran at once"""
+
+    def __init__(self):
+        self.gates = {}
+        self.running = 0
+        self.peak = 0
+        self.started = []
+
+    def gate(self, session_id):
+        return self.gates.setdefault(session_id, asyncio.Event())
+
+    async def __call__(self, session_id, job, report):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        self.started.append(session_id)
+        try:
+            for step in job.get("steps", []):
+                await report("step", {"step": step})
+            await self.gate(session_id).wait()
+            if job.get("error"):
+                raise RuntimeError(job["error"])
+        finally:
+            self.running -= 1
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+def test_workers_bound_concurrency_and_run_jobs_in_order():
+    async def run():
+        runner = GatedRunner()
+        manager = GenerationJobManager(runner, workers=2, max_queue_size=10)
+        await manager.start()
+        for session_id in range(1, 6):
+            manager.submit(session_id, {})
+        await settle()
+
+        assert runner.started == [1, 2] and runner.running == 2
+        assert manager.metrics()["queue_depth"] == 3 and manager.metrics()["running"] == 2
+
+        for session_id in range(1, 6):
+            runner.gate(session_id).set()
+        await manager._queue.join()
+
+        assert runner.started == [1, 2, 3, 4, 5] and runner.peak == 2
+        metrics = manager.metrics()
+        assert metrics["submitted"] == 5 and metrics["completed"] == 5 and metrics["queue_depth"] == 0
+        await manager.stop()
+
+    asyncio.run(run())
+
+def test_full_queue_rejects_without_tracking():
+    async def run():
+        runner = GatedRunner()
+        manager = GenerationJobManager(runner, workers=1, max_queue_size=2)
+        await manager.start()
+        manager.submit(1, {})
+        await settle()
+        manager.submit(2, {})
+        manager.submit(3, {})
+
+        try:
+            manager.submit(4, {})
+            raise AssertionError("job accepted past capacity")
+        except JobQueueFullError:
+            pass
+        assert manager.get_progress(4) is None
+        assert manager.metrics()["rejected"] == 1 and manager.metrics()["submitted"] == 3
+        await manager.stop()
+
+    asyncio.run(run())
+
+def test_progress_follows_the_job():
+    async def run():
+        runner = GatedRunner()
+        manager = GenerationJobManager(runner, workers=1)
+        await manager.start()
+        manager.submit(1, {"steps": ["content_generation", "fact_checking"]})
+        manager.submit(2, {})
+
+        assert manager.get_progress(2)["status"] == "queued"
+        await settle()
+        progress = manager.get_progress(1)
+        assert progress["status"] == "running" and progress["current_step"] == "fact_checking"
+        assert progress["steps_completed"] == ["content_generation", "fact_checking"]
+
+        # Callers get a copy, not the live list
+        progress["steps_completed"].append("tampered")
+        assert manager.get_progress(1)["steps_completed"] == ["content_generation", "fact_checking"]
+
+        runner.gate(1).set()
+        await settle()
+        progress = manager.get_progress(1)
+        assert progress["status"] == "completed" and progress["current_step"] is None
+        assert "finished_at" in progress
+        assert manager.get_progress(2)["status"] == "running"
+        await manager.stop()
+
+    asyncio.run(run())
+
+def test_failed_job_is_recorded_and_the_worker_keeps_going():
+    async def run():
+        runner = GatedRunner()
+        manager = GenerationJobManager(runner, workers=1)
+        await manager.start()
+        manager.submit(1, {"error": "provider down"})
+        manager.submit(2, {})
+        runner.gate(1).set()
+        runner.gate(2).set()
+        await manager._queue.join()
+
+        assert manager.get_progress(1)["status"] == "failed"
+        assert manager.get_progress(1)["error"] == "provider down"
+        assert manager.get_progress(2)["status"] == "completed"
+        assert manager.metrics()["failed"] == 1 and manager.metrics()["completed"] == 1
+        await manager.stop()
+
+    asyncio.run(run())
+
+def test_subscribers_receive_events_until_the_job_ends():
+    async def run():
+        runner = GatedRunner()
+        manager = GenerationJobManager(runner, workers=1)
+        await manager.start()
+
+        async def collect():
+            return [event async for event in manager.subscribe(1)]
+
+        early = asyncio.create_task(collect())
+        await settle()
+        manager.submit(1, {"steps": ["content_generation"]})
+        await settle()
+        midway = asyncio.create_task(collect())
+        await settle()
+        runner.gate(1).set()
+        early_events, midway_events = await asyncio.wait_for(asyncio.gather(early, midway), 1.0)
+
+        assert [event["event"] for event in early_events] == ["running", "step", "completed"]
+        assert early_events[1]["data"] == {"session_id": 1, "step": "content_generation"}
+        assert [event["event"] for event in midway_events] == ["status", "completed"]
+        assert midway_events[0]["data"]["status"] == "running"
+        assert manager._subscribers == {}
+
+        # A late subscriber gets the final status and returns at once
+        late = [event async for event in manager.subscribe(1)]
+        assert len(late) == 1 and late[0]["data"]["status"] == "completed"
+        await manager.stop()
+
+    asyncio.run(run())
+
+def test_oldest_progress_is_evicted_past_max_tracked_jobs():
+    async def run():
+        runner = GatedRunner()
+        manager = GenerationJobManager(runner, workers=1, max_tracked_jobs=2)
+        await manager.start()
+        for session_id in range(1, 4):
+            runner.gate(session_id).set()
+            manager.submit(session_id, {})
+        await manager._queue.join()
+
+        assert manager.get_progress(1) is None
+        assert [manager.get_progress(i)["status"] for i in (2, 3)] == ["completed", "completed"]
+        await manager.stop()
+
+    asyncio.run(run())
+
+def test_stop_cancels_running_jobs():
+    async def run():
+        runner = GatedRunner()
+        manager = GenerationJobManager(runner, workers=2)
+        await manager.start()
+        manager.submit(1, {})
+        manager.submit(2, {})
+        await settle()
+        assert runner.running == 2
+
+        await asyncio.wait_for(manager.stop(), 1.0)
+        assert runner.running == 0 and manager._tasks == []
+        assert manager.metrics()["completed"] == 0 and manager.metrics()["failed"] == 0
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
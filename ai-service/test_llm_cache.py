@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the LLM response cache
+Key derivation, the LRU memory tier, TTL expiry and the on-disk tier.
+
+Usage: python test_llm_cache.py
+"""
+
+import os
+import time
+import asyncio
+import tempfile
+
+from services.llm_cache import LLMResponseCache
+
+RESPONSE = {"content": "Lentils are legumes.", "input_tokens": 10, "output_tokens": 5}
+
+def key(prompt: str = "prompt", **overrides) -> str:
+    request = {"provider": "openai", "model": "gpt-4", "prompt": prompt, "temperature": 0.7, "max_tokens": 100}
+    request.update(overrides)
+    return LLMResponseCache.make_key(**request)
+
+def test_key_covers_every_request_field():
+    base = key()
+    assert key() == base
+    assert key("other prompt") != base
+    assert key(provider="anthropic") != base
+    assert key(model="gpt-4o") != base
+    assert key(temperature=0.3) != base
+    assert key(max_tokens=200) != base
+    assert key(system="You are a chef.") != base
+    assert key(system="") == key(system=None)
+
+def test_memory_hit_and_miss():
+    async def run():
+        cache = LLMResponseCache(max_entries=4)
+        assert await cache.get(key()) is None
+        await cache.set(key(), RESPONSE)
+        assert await cache.get(key()) == RESPONSE
+        stats = cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1 and stats["memory_hits"] == 1
+
+    asyncio.run(run())
+
+def test_lru_evicts_least_recently_used():
+    async def run():
+        cache = LLMResponseCache(max_entries=2)
+        await cache.set(key("a"), RESPONSE)
+        await cache.set(key("b"), RESPONSE)
+        await cache.get(key("a"))  # "b" is now the oldest
+        await cache.set(key("c"), RESPONSE)
+        assert await cache.get(key("b")) is None
+        assert await cache.get(key("a")) == RESPONSE
+        assert await cache.get(key("c")) == RESPONSE
+        assert cache.stats()["evictions"] == 1
+
+    asyncio.run(run())
+
+def test_expired_entries_are_misses():
+    async def run():
+        cache = LLMResponseCache(ttl_seconds=0.05)
+        await cache.set(key(), RESPONSE)
+        time.sleep(0.06)
+        assert await cache.get(key()) is None
+        assert cache.stats()["entries"] == 0
+
+    asyncio.run(run())
+
+def test_disk_tier_survives_a_new_instance():
+    async def run(disk_dir):
+        await LLMResponseCache(disk_dir=disk_dir).set(key(), RESPONSE)
+
+        cache = LLMResponseCache(disk_dir=disk_dir)
+        assert await cache.get(key()) == RESPONSE
+        assert cache.stats()["disk_hits"] == 1
+        # Promoted into memory: the next lookup does not touch the disk
+        assert await cache.get(key()) == RESPONSE
+        assert cache.stats()["memory_hits"] == 1
+
+    with tempfile.TemporaryDirectory() as disk_dir:
+        asyncio.run(run(disk_dir))
+
+def test_disk_tier_evicts_oldest_over_size_limit():
+    async def run(disk_dir):
+        entry_size = len('{"stored_at": 0000000000.000000, "value": {"content": "x"}}')
+        cache = LLMResponseCache(disk_dir=disk_dir, max_disk_bytes=entry_size * 3)
+        start = time.time() - 60
+        for index in range(6):
+            await cache.set(key(str(index)), {"content": "x"})
+            os.utime(cache._path(key(str(index))), (start + index, start + index))  # Distinct ages, oldest first
+
+        remaining = {os.path.basename(path) for path, _, _ in cache._disk_files()}
+        assert f"{key('5')}.json" in remaining
+        assert f"{key('0')}.json" not in remaining
+        assert len(remaining) >= 2
+        assert sum(size for _, _, size in cache._disk_files()) <= cache.max_disk_bytes
+
+    with tempfile.TemporaryDirectory() as disk_dir:
+        asyncio.run(run(disk_dir))
+
+def test_concurrent_disk_writes_keep_an_exact_size():
+    async def run(disk_dir):
+        cache = LLMResponseCache(disk_dir=disk_dir)
+        # The same keys written many times at once, on several worker threads
+        await asyncio.gather(*[
+            cache.set(key(str(index % 4)), {"content": "x" * (index % 7)})
+            for index in range(64)
+        ])
+
+        files = list(cache._disk_files())
+        assert len(files) == 4
+        assert cache.stats()["disk_bytes"] == sum(size for _, _, size in files)
+        leftovers = [name for _, _, names in os.walk(disk_dir) for name in names if not name.endswith(".json")]
+        assert leftovers == []
+
+    with tempfile.TemporaryDirectory() as disk_dir:
+        asyncio.run(run(disk_dir))
+
+def test_failed_disk_write_leaves_no_temp_file():
+    async def run(disk_dir):
+        cache = LLMResponseCache(disk_dir=disk_dir)
+        try:
+            cache._write_disk(key(), time.time(), {"content": {("tuple", "key"): "not JSON"}})
+            raise AssertionError("unserialisable entry was written")
+        except TypeError:
+            pass
+        await cache.set(key("ok"), RESPONSE)
+
+        names = [name for _, _, names in os.walk(disk_dir) for name in names]
+        assert names == [f"{key('ok')}.json"]
+
+    with tempfile.TemporaryDirectory() as disk_dir:
+        asyncio.run(run(disk_dir))
+
+def test_disabled_by_env():
+    previous = os.environ.get("LLM_CACHE_ENABLED")
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+    try:
+        assert LLMResponseCache.from_env() is None
+    finally:
+        if previous is None:
+            del os.environ["LLM_CACHE_ENABLED"]
+        else:
+            os.environ["LLM_CACHE_ENABLED"] = previous
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Unit tests for schema migrations
+Ordering, checksum verification, rollback of a failed migration and the
+advisory lock of MigrationRunner against an in-memory database (no
+PostgreSQL needed).
+
+Usage: python test_migrations.py
+"""
+
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from services.migrations import MigrationError, MigrationRunner, latest_version, load_migrations
+
+class FakeDatabase:
+    """ai_schema_migrations plus a log of executed migration SQL, shared by connections"""
+
+    def __init__(self):
+        self.rows = {}
+        self.executed = []
+        self.advisory_lock = threading.Lock()
+        self.lock_held = False
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.database = connection.database
+        self.result = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        database = self.database
+        if "pg_advisory_lock" in sql:
+            database.advisory_lock.acquire()
+            database.lock_held = True
+        elif "pg_advisory_unlock" in sql:
+            database.lock_held = False
+            database.advisory_lock.release()
+        elif "CREATE TABLE IF NOT EXISTS ai_schema_migrations" in sql:
+            pass
+        elif "FROM ai_schema_migrations" in sql:
+            self.result = [dict(database.rows[version]) for version in sorted(database.rows)]
+        elif "INSERT INTO ai_schema_migrations" in sql:
+            version, name, checksum, execution_ms = params
+            self.connection.pending_rows[version] = {
+                "version": version, "name": name, "checksum": checksum, "applied_at": datetime(2024, 1, 1)
+            }
+        else:
+            assert database.lock_held, "migration SQL ran without the advisory lock"
+            if "fail" in sql:
+                raise RuntimeError("syntax error")
+            time.sleep(0.01)
+            self.connection.pending_sql.append(sql.strip())
+
+    def fetchall(self):
+        return self.result
+
+class FakeConnection:
+    def __init__(self, database):
+        self.database = database
+        self.pending_rows = {}
+        self.pending_sql = []
+        self.closed = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.database.rows.update(self.pending_rows)
+        self.database.executed.extend(self.pending_sql)
+        self.rollback()
+
+    def rollback(self):
+        self.pending_rows = {}
+        self.pending_sql = []
+
+    def close(self):
+        self.closed = True
+
+class FakeRunner(MigrationRunner):
+    def __init__(self, database, directory):
+        super().__init__("postgresql://unused", directory)
+        self.database = database
+        self.connections = []
+
+    def _connect(self):
+        connection = FakeConnection(self.database)
+        self.connections.append(connection)
+        return connection
+
+@contextmanager
+def migrations_dir(files):
+    with tempfile.TemporaryDirectory() as directory:
+        for name, sql in files.items():
+            (Path(directory) / name).write_text(sql, encoding="utf-8")
+        yield Path(directory)
+
+FILES = {
+    "10_add_index.sql": "-- ten",
+    "2_add_column.sql": "-- two",
+    "1_create_table.sql": "-- one",
+}
+
+def test_pending_migrations_apply_in_version_order_once():
+    with migrations_dir(FILES) as directory:
+        database = FakeDatabase()
+        runner = FakeRunner(database, directory)
+
+        applied = runner.migrate()
+        assert [m.version for m in applied] == [1, 2, 10]
+        assert database.executed == ["-- one", "-- two", "-- ten"]
+        assert {v: row["checksum"] for v, row in database.rows.items()} == {
+            m.version: m.checksum for m in load_migrations(directory)
+        }
+        assert latest_version(directory) == 10
+
+        assert runner.migrate() == []
+        assert len(database.executed) == 3
+        assert not database.lock_held
+        assert all(connection.closed for connection in runner.connections)
+
+def test_target_stops_at_version():
+    with migrations_dir(FILES) as directory:
+        database = FakeDatabase()
+        assert [m.version for m in FakeRunner(database, directory).migrate(target=2)] == [1, 2]
+        assert sorted(database.rows) == [1, 2]
+
+def test_changed_migration_stops_the_run():
+    with migrations_dir(FILES) as directory:
+        database = FakeDatabase()
+        FakeRunner(database, directory).migrate(target=2)
+        (directory / "2_add_column.sql").write_text("-- two, edited", encoding="utf-8")
+
+        try:
+            FakeRunner(database, directory).migrate()
+            raise AssertionError("changed migration was accepted")
+        except MigrationError as e:
+            assert "2_add_column.sql changed" in str(e)
+        assert sorted(database.rows) == [1, 2]
+        assert len(database.executed) == 2
+        assert not database.lock_held
+
+def test_migration_older_than_applied_is_rejected():
+    with migrations_dir({"1_create_table.sql": "-- one", "3_add_index.sql": "-- three"}) as directory:
+        database = FakeDatabase()
+        FakeRunner(database, directory).migrate()
+        (directory / "2_late_branch.sql").write_text("-- two", encoding="utf-8")
+
+        try:
+            FakeRunner(database, directory).migrate()
+            raise AssertionError("out-of-order migration was applied")
+        except MigrationError as e:
+            assert "Migration 2 is older than applied migration 3" in str(e)
+        assert sorted(database.rows) == [1, 3]
+
+def test_failed_migration_is_rolled_back_and_not_recorded():
+    with migrations_dir({**FILES, "2_add_column.sql": "-- fail"}) as directory:
+        database = FakeDatabase()
+        try:
+            FakeRunner(database, directory).migrate()
+            raise AssertionError("failing migration did not raise")
+        except MigrationError as e:
+            assert "2_add_column.sql failed" in str(e)
+        assert sorted(database.rows) == [1]
+        assert database.executed == ["-- one"]
+        assert not database.lock_held
+
+def test_concurrent_runners_apply_each_migration_once():
+    with migrations_dir(FILES) as directory:
+        database = FakeDatabase()
+        results = []
+        runners = [
+            threading.Thread(target=lambda: results.append(FakeRunner(database, directory).migrate()))
+            for _ in range(4)
+        ]
+        for runner in runners:
+            runner.start()
+        for runner in runners:
+            runner.join()
+
+        assert sorted(len(applied) for applied in results) == [0, 0, 0, 3]
+        assert database.executed == ["-- one", "-- two", "-- ten"]
+
+def test_status_reports_each_state():
+    with migrations_dir(FILES) as directory:
+        database = FakeDatabase()
+        FakeRunner(database, directory).migrate(target=2)
+        (directory / "1_create_table.sql").write_text("-- one, edited", encoding="utf-8")
+        (directory / "2_add_column.sql").unlink()
+
+        states = {row["version"]: (row["name"], row["state"]) for row in FakeRunner(database, directory).status()}
+        assert states == {
+            1: ("create_table", "changed"),
+            2: ("add_column", "missing"),
+            10: ("add_index", "pending"),
+        }
+
+def test_bad_file_names_are_rejected():
+    for files, message in [
+        ({"create_table.sql": ""}, "does not match NNN_name.sql"),
+        ({"1_create_table.sql": "", "001_add_column.sql": ""}, "share version 1"),
+    ]:
+        with migrations_dir(files) as directory:
+            try:
+                load_migrations(directory)
+                raise AssertionError(f"{sorted(files)} was accepted")
+            except MigrationError as e:
+                assert message in str(e)
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
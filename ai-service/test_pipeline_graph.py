@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the pipeline graph scheduler
+Dependency ordering, parallel branches, validation errors, failure
+handling and restoring steps from checkpoints, with small async steps.
+
+Usage: python test_pipeline_graph.py
+"""
+
+import time
+import asyncio
+
+from services.pipeline_graph import PipelineGraph, PipelineStep
+
+def step(name, inputs, outputs, delay=0.0, log=None, fail=False):
+    """Step that sleeps for delay, then returns "<name>(<inputs>)" for each output"""
+    async def func(**kwargs):
+        if log is not None:
+            log.append(("start", name))
+        await asyncio.sleep(delay)
+        if fail:
+            raise RuntimeError(f"{name} failed")
+        if log is not None:
+            log.append(("end", name))
+        value = f"{name}({','.join(str(kwargs[i]) for i in inputs)})"
+        return {**{output: value for output in outputs}, "tokens_used": 1}
+
+    return PipelineStep(name, func, inputs, outputs)
+
+def diamond(log=None, delay=0.05):
+    return PipelineGraph([
+        step("draft", ["topic"], ["content"], delay, log),
+        step("check", ["content"], ["checked"], delay, log),
+        step("summary", ["content"], ["summary"], delay, log),
+        step("format", ["checked", "summary"], ["article"], delay, log),
+    ])
+
+def test_steps_run_in_dependency_order():
+    log = []
+    run = asyncio.run(diamond(log).run({"topic": "lentils"}))
+    assert run["state"]["article"] == "format(check(draft(lentils)),summary(draft(lentils)))"
+    order = [name for event, name in log if event == "start"]
+    assert order[0] == "draft" and order[-1] == "format"
+    assert set(run["timings"]) == {"draft", "check", "summary", "format"}
+    assert run["results"]["check"]["tokens_used"] == 1
+
+def test_independent_steps_run_in_parallel():
+    start = time.perf_counter()
+    run = asyncio.run(diamond(delay=0.1).run({"topic": "lentils"}))
+    elapsed = time.perf_counter() - start
+    # draft -> (check | summary) -> format: three steps deep, not four
+    assert elapsed < 0.35
+    assert 0.28 <= run["critical_path_seconds"] < 0.35
+
+def test_on_step_complete_sees_every_step():
+    seen = []
+
+    async def on_step_complete(name, result):
+        seen.append(name)
+
+    asyncio.run(diamond(delay=0.0).run({"topic": "lentils"}, on_step_complete=on_step_complete))
+    assert sorted(seen) == ["check", "draft", "format", "summary"]
+
+def test_duplicate_names_and_outputs_are_rejected():
+    for steps in (
+        [step("a", [], ["x"]), step("a", [], ["y"])],
+        [step("a", [], ["x"]), step("b", [], ["x"])],
+    ):
+        try:
+            PipelineGraph(steps)
+        except ValueError:
+            continue
+        raise AssertionError("expected ValueError")
+
+def test_unsatisfiable_and_cyclic_graphs_fail():
+    for graph in (
+        PipelineGraph([step("a", ["missing"], ["x"])]),
+        PipelineGraph([step("a", ["y"], ["x"]), step("b", ["x"], ["y"])]),
+    ):
+        try:
+            asyncio.run(graph.run({}))
+        except ValueError:
+            continue
+        raise AssertionError("expected ValueError")
+
+def test_missing_output_fails():
+    async def incomplete(**kwargs):
+        return {"other": 1}
+
+    graph = PipelineGraph([PipelineStep("a", incomplete, [], ["x"])])
+    try:
+        asyncio.run(graph.run({}))
+    except ValueError as e:
+        assert "did not produce" in str(e)
+    else:
+        raise AssertionError("expected ValueError")
+
+def test_failure_cancels_running_siblings():
+    log = []
+    graph = PipelineGraph([
+        step("draft", ["topic"], ["content"], 0.0, log),
+        step("check", ["content"], ["checked"], 0.01, log, fail=True),
+        step("summary", ["content"], ["summary"], 0.5, log),
+    ])
+    try:
+        asyncio.run(graph.run({"topic": "lentils"}))
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("expected RuntimeError")
+    assert ("start", "summary") in log
+    assert ("end", "summary") not in log
+
+def test_restorable_needs_outputs_and_restored_dependencies():
+    graph = diamond()
+    completed = {
+        "draft": {"content": "saved draft"},
+        "check": {"checked": "saved check"},
+        "summary": {"tokens_used": 3},  # Missing its output
+        "format": {"article": "saved article"},
+    }
+    # format depends on summary, which cannot be restored
+    assert graph.restorable(completed) == ["draft", "check"]
+    # check without its dependency is not restorable either
+    assert graph.restorable({"check": {"checked": "saved check"}}) == []
+
+def test_run_resumes_from_checkpoints():
+    log = []
+    completed = {"draft": {"content": "saved draft"}, "check": {"checked": "saved check"}}
+    run = asyncio.run(diamond(log, delay=0.0).run({"topic": "lentils"}, completed=completed))
+
+    assert run["restored"] == ["draft", "check"]
+    assert [name for event, name in log if event == "start"] == ["summary", "format"]
+    assert run["state"]["article"] == "format(saved check,summary(saved draft))"
+    assert run["results"]["draft"] == completed["draft"]
+    assert set(run["timings"]) == {"summary", "format"}
+
+def test_restored_steps_are_not_checkpointed_again():
+    saved = []
+
+    async def on_step_complete(name, result):
+        saved.append(name)
+
+    completed = {"draft": {"content": "saved draft"}}
+    asyncio.run(diamond(delay=0.0).run({"topic": "lentils"}, on_step_complete=on_step_complete, completed=completed))
+    assert sorted(saved) == ["check", "format", "summary"]
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Unit tests for prompt layout
+The static instructions live in the system prompt and the request-specific
+part after it, and only prefixes above the providers' prompt-cache minimum
+are marked cacheable.
+
+Usage: python test_prompts.py
+"""
+
+from models import GenerationOptions, ArticleCategory
+from services.prompts import PromptTemplates
+from services.ai_processor import AIProcessor
+from services.token_accounting import count_tokens, PROMPT_CACHE_MIN_TOKENS
+
+CACHED_SYSTEMS = [
+    "get_content_generation_system",
+    "get_recipe_generation_system",
+    "get_fact_checking_system",
+    "get_section_fact_checking_system",
+    "get_passage_fact_checking_system",
+    "get_claim_verification_system",
+]
+
+def test_system_prompts_are_static():
+    prompts = PromptTemplates()
+    for name in CACHED_SYSTEMS:
+        system = getattr(prompts, name)()
+        assert system == getattr(prompts, name)()
+
+def test_request_parts_carry_the_variable_text():
+    prompts = PromptTemplates()
+    topic = "Sprouting green lentils"
+    options = GenerationOptions(category=ArticleCategory.MILLETS)
+    content = prompts.get_content_generation_prompt(topic, options)
+    assert topic in content and "Millets Context:" in content
+    assert "Lentils Context:" in prompts.get_recipe_generation_prompt(topic, GenerationOptions(category=ArticleCategory.LENTILS))
+    assert topic in prompts.get_section_fact_checking_prompt("## Protein\nLentils have protein.", topic)
+    assert "[[P1]] Lentils have protein." in prompts.get_passage_fact_checking_prompt([("P1", "Lentils have protein.")], topic)
+    assert "1. Lentils have protein." in prompts.get_claim_verification_prompt(["Lentils have protein."], topic)
+    for name in CACHED_SYSTEMS:
+        system = getattr(prompts, name)()
+        assert topic not in system and "Context:" not in system
+
+def test_only_prefixes_above_the_cache_minimum_are_cacheable():
+    processor = AIProcessor()
+    system = processor.prompts.get_content_generation_system()
+    short = processor._build_request("anthropic", "claude-3-5-sonnet-20241022", "Topic: lentils", system, 1000, 0.7)
+    assert short["cacheable"] == (count_tokens(system, "claude-3-5-sonnet-20241022") >= PROMPT_CACHE_MIN_TOKENS["anthropic"])
+    assert short["kwargs"]["cache_prefix"] == short["cacheable"]
+
+    long_system = system + "\n" + "Write clearly about lentils and millets. " * 200
+    long = processor._build_request("anthropic", "claude-3-5-sonnet-20241022", "Topic: lentils", long_system, 1000, 0.7)
+    assert long["cacheable"] and long["kwargs"]["cache_prefix"]
+    assert not processor._build_request("anthropic", "claude-3-5-sonnet-20241022", long_system, None, 1000, 0.7)["cacheable"]
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the provider rate limiter
+Token-bucket refill, RPM/TPM waits, FIFO order, reconciliation and 429
+back-off, using per-minute limits high enough to keep the waits short.
+
+Usage: python test_rate_limiter.py
+"""
+
+import os
+import time
+import asyncio
+
+from services.rate_limiter import TokenBucket, RateLimiter, rate_limit_retry_after
+
+class RateLimitError(Exception):
+    def __init__(self, retry_after=None):
+        super().__init__("429")
+        self.status_code = 429
+        self.response = type("Response", (), {"headers": {"retry-after": retry_after} if retry_after else {}})()
+
+def test_bucket_refills_over_a_minute():
+    bucket = TokenBucket(600)  # 10 per second
+    bucket.consume(600)
+    assert 0.95 <= bucket.seconds_until(10) <= 1.0
+    time.sleep(0.2)
+    assert 0.75 <= bucket.seconds_until(10) <= 0.8
+    # A request larger than the bucket waits for a full bucket, not forever
+    assert bucket.seconds_until(10_000) <= 60
+
+def test_unlimited_models_never_wait():
+    async def run():
+        limiter = RateLimiter()
+        start = time.monotonic()
+        for _ in range(100):
+            await limiter.acquire("gpt-4", 1000, 1000)
+        assert time.monotonic() - start < 0.1
+        assert limiter.metrics()["gpt-4"]["requests"] == 100
+
+    asyncio.run(run())
+
+def test_rpm_limit_spaces_requests():
+    async def run():
+        limiter = RateLimiter(limits={"gpt-4": {"rpm": 600}})  # Burst of 600, then 10 per second
+        limiter.for_model("gpt-4")._requests.consume(598)
+        start = time.monotonic()
+        for _ in range(4):
+            await limiter.acquire("gpt-4", 10)
+        # Two from the bucket, two more at 10 per second
+        assert 0.15 <= time.monotonic() - start < 0.35
+        assert limiter.metrics()["gpt-4"]["throttled_requests"] >= 1
+
+    asyncio.run(run())
+
+def test_tpm_counts_prompt_and_completion_budget():
+    async def run():
+        limiter = RateLimiter(default_tpm=60_000)  # 1000 tokens per second
+        estimated = await limiter.acquire("claude-3-haiku", 40_000, 20_000)
+        assert estimated == 60_000
+        start = time.monotonic()
+        await limiter.acquire("claude-3-haiku", 150, 50)
+        assert 0.15 <= time.monotonic() - start < 0.35
+
+    asyncio.run(run())
+
+def test_reconcile_returns_unused_tokens():
+    async def run():
+        limiter = RateLimiter(default_tpm=60_000)
+        estimated = await limiter.acquire("gpt-4", 10_000, 50_000)
+        limiter.reconcile("gpt-4", estimated, 12_000)
+        start = time.monotonic()
+        await limiter.acquire("gpt-4", 40_000, 0)
+        assert time.monotonic() - start < 0.05
+        assert limiter.metrics()["gpt-4"]["actual_tokens"] == 12_000
+
+    asyncio.run(run())
+
+def test_waiters_are_served_in_arrival_order():
+    async def run():
+        limiter = RateLimiter(default_rpm=600)
+        limiter.for_model("gpt-4")._requests.consume(600)
+        order = []
+
+        async def request(index):
+            await limiter.acquire("gpt-4", 1)
+            order.append(index)
+
+        await asyncio.gather(*[request(index) for index in range(4)])
+        assert order == [0, 1, 2, 3]
+
+    asyncio.run(run())
+
+def test_penalize_blocks_until_retry_after():
+    async def run():
+        limiter = RateLimiter()
+        limiter.penalize("gpt-4", 0.2)
+        start = time.monotonic()
+        await limiter.acquire("gpt-4", 1)
+        assert time.monotonic() - start >= 0.19
+        assert limiter.metrics()["gpt-4"]["provider_rate_limits"] == 1
+
+    asyncio.run(run())
+
+def test_retry_after_from_429():
+    assert rate_limit_retry_after(RateLimitError("2.5")) == 2.5
+    assert rate_limit_retry_after(RateLimitError()) == 1.0
+    assert rate_limit_retry_after(ValueError("not a rate limit")) is None
+
+def test_from_env_ignores_invalid_json():
+    os.environ["AI_RATE_LIMITS"] = '{"gpt-4": {"rpm": 500'
+    try:
+        assert RateLimiter.from_env().limits == {}
+        os.environ["AI_RATE_LIMITS"] = '{"gpt-4": {"rpm": 500, "tpm": 30000}}'
+        assert RateLimiter.from_env().limits["gpt-4"]["tpm"] == 30000
+    finally:
+        del os.environ["AI_RATE_LIMITS"]
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
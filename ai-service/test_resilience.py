@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the provider resilience layer
+Retry policy, circuit breaker, and failover in AIProcessor._call_with_failover
+against stubbed model calls (no provider keys needed).
+
+Usage: python test_resilience.py
+"""
+
+import time
+import asyncio
+
+from services.resilience import (
+    RetryPolicy,
+    CircuitBreaker,
+    StepBudgetExceededError,
+    is_retryable,
+    is_timeout,
+    is_provider_error,
+    should_fail_over
+)
+from services.ai_processor import AIProcessor
+
+class StatusError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+def test_retryable_errors():
+    assert is_retryable(asyncio.TimeoutError())
+    assert is_retryable(ConnectionError())
+    assert is_retryable(StatusError(429))
+    assert is_retryable(StatusError(503))
+    assert not is_retryable(StatusError(400))
+    assert not is_retryable(StatusError(401))
+    assert not is_retryable(ValueError("bad"))
+    assert is_timeout(asyncio.TimeoutError())
+    assert not is_timeout(StatusError(503))
+
+def test_failover_errors():
+    assert should_fail_over(StatusError(503))
+    assert should_fail_over(asyncio.TimeoutError())
+    assert is_provider_error(StatusError(401)) and should_fail_over(StatusError(401))
+    assert should_fail_over(StatusError(403))
+    assert not should_fail_over(StatusError(400))
+    assert not should_fail_over(StatusError(422))
+    assert not should_fail_over(ValueError("bad"))
+
+def test_retry_delay_is_jittered_and_capped():
+    policy = RetryPolicy(base_delay=0.5, max_delay=2.0)
+    for attempt in range(8):
+        delay = policy.delay(attempt)
+        assert 0 <= delay <= min(2.0, 0.5 * 2 ** attempt)
+
+def test_attempt_timeout_grows_with_max_tokens():
+    policy = RetryPolicy(attempt_timeout=20, min_tokens_per_second=20)
+    assert policy.timeout_for(0) == 20
+    assert policy.timeout_for(4000) == 220
+    assert policy.timeout_for(8000) > policy.timeout_for(1000)
+
+def test_breaker_opens_after_threshold_and_half_opens():
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=0.05)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.rejected_calls == 1
+
+    time.sleep(0.06)
+    # One probe at a time while half-open
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+def test_failed_probe_reopens_breaker():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.times_opened == 2
+
+def test_release_frees_the_probe_without_closing():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+
+def stub_processor(behaviour, attempt_timeout: float = 0.05):
+    """AIProcessor whose model calls run behaviour(model) instead of a provider"""
+    processor = AIProcessor()
+    processor.retry_policy = RetryPolicy(
+        max_attempts=3, base_delay=0.0, max_delay=0.0,
+        attempt_timeout=attempt_timeout, min_tokens_per_second=1e9
+    )
+    processor.hedging_enabled = False
+    calls = []
+
+    async def call_model(model, prompt, **kwargs):
+        calls.append(model)
+        await behaviour(model)
+        return {
+            "content": f"answer from {model}", "input_tokens": 1, "output_tokens": 1,
+            "cached_tokens": 0, "tokens_used": 2, "cache_hit": False
+        }
+
+    processor._call_model = call_model
+    return processor, calls
+
+def test_timeout_fails_over_instead_of_retrying():
+    async def behaviour(model):
+        if model == "fake-slow":
+            await asyncio.sleep(1)
+
+    processor, calls = stub_processor(behaviour)
+    result = asyncio.run(processor._call_with_failover("summarization", ["fake-slow", "fake-fast"], "prompt"))
+    assert calls == ["fake-slow", "fake-fast"]
+    assert result["failover_model"] == "fake-fast"
+    assert result["retries"] == 0
+
+def test_transient_errors_are_retried_on_the_same_model():
+    failures = {"count": 0}
+
+    async def behaviour(model):
+        if failures["count"] < 2:
+            failures["count"] += 1
+            raise StatusError(503)
+
+    processor, calls = stub_processor(behaviour)
+    result = asyncio.run(processor._call_with_failover("summarization", ["fake-a", "fake-b"], "prompt"))
+    assert calls == ["fake-a", "fake-a", "fake-a"]
+    assert result["retries"] == 2
+    assert result["failover_model"] is None
+
+def test_client_errors_are_raised_without_failover():
+    async def behaviour(model):
+        if model == "fake-a":
+            raise StatusError(400)
+
+    processor, calls = stub_processor(behaviour)
+    for _ in range(10):
+        try:
+            asyncio.run(processor._call_with_failover("summarization", ["fake-a", "fake-b"], "prompt"))
+            raise AssertionError("expected the 400 to be raised")
+        except StatusError as e:
+            assert e.status_code == 400
+    # Neither retried nor re-sent to the fallback, and the circuit stays closed
+    assert calls == ["fake-a"] * 10
+    breaker = processor.circuit_breakers["fake"]
+    assert breaker.state == "closed"
+    assert breaker.total_failures == 0
+
+def test_auth_errors_fail_over_without_retrying():
+    async def behaviour(model):
+        if model == "fake-a":
+            raise StatusError(401)
+
+    processor, calls = stub_processor(behaviour)
+    result = asyncio.run(processor._call_with_failover("summarization", ["fake-a", "fake-b"], "prompt"))
+    assert calls == ["fake-a", "fake-b"]
+    assert result["failover_model"] == "fake-b"
+    assert processor.circuit_breakers["fake"].total_failures == 0
+
+def test_open_circuit_fails_over():
+    async def behaviour(model):
+        pass
+
+    processor, calls = stub_processor(behaviour)
+    breaker = processor.circuit_breakers["openai"]
+    breaker.failure_threshold = 1
+    breaker.record_failure()
+    result = asyncio.run(processor._call_with_failover("summarization", ["gpt-4", "fake-b"], "prompt"))
+    assert calls == ["fake-b"]
+    assert result["failover_model"] == "fake-b"
+    assert breaker.rejected_calls == 1
+
+def test_retries_exhausted_fail_over():
+    async def behaviour(model):
+        if model == "fake-a":
+            raise StatusError(503)
+
+    processor, calls = stub_processor(behaviour)
+    result = asyncio.run(processor._call_with_failover("summarization", ["fake-a", "fake-b"], "prompt"))
+    assert calls == ["fake-a", "fake-a", "fake-a", "fake-b"]
+    assert result["retries"] == 2
+    assert result["failover_model"] == "fake-b"
+
+def test_step_budget_bounds_retries():
+    async def behaviour(model):
+        raise StatusError(503)
+
+    processor, _ = stub_processor(behaviour)
+    processor.step_budgets["summarization"] = 0.0
+    try:
+        asyncio.run(processor._call_with_failover("summarization", ["fake-a"], "prompt"))
+    except StepBudgetExceededError:
+        pass
+    else:
+        raise AssertionError("expected StepBudgetExceededError")
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
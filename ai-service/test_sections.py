@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Unit tests for markdown section handling
+Section splitting and chunking, and cutting a stream at a "## " heading once
+its word target is met.
+
+Usage: python test_sections.py
+"""
+
+import asyncio
+
+from services.sections import SectionSplitter, split_sections, chunk_sections, join_sections, partial_marker
+from services.ai_processor import AIProcessor
+
+ARTICLE = (
+    "# Red Lentils\n\nIntro paragraph.\n\n"
+    "## Nutrition\n\nProtein and fibre.\n\n### Minerals\n\nIron and folate.\n\n"
+    "## Cooking\n\nRinse and simmer.\n"
+)
+
+def test_split_sections_at_level_two_headings():
+    sections = split_sections(ARTICLE)
+    assert len(sections) == 3
+    assert sections[0].startswith("# Red Lentils")
+    assert sections[1].startswith("## Nutrition") and "### Minerals" in sections[1]
+    assert sections[2].startswith("## Cooking")
+    assert "".join(sections) == ARTICLE
+    assert split_sections("") == []
+
+def test_splitter_returns_sections_once_complete():
+    splitter = SectionSplitter()
+    completed = []
+    for start in range(0, len(ARTICLE), 7):
+        for section in splitter.feed(ARTICLE[start:start + 7]):
+            # A section is only released once the next heading has started
+            assert section.endswith("\n")
+            completed.append(section)
+    assert len(completed) == 2
+    assert "## Cooking" not in completed[1]
+    remainder = splitter.flush()
+    assert remainder == ["## Cooking\n\nRinse and simmer.\n"]
+    assert "".join(completed + remainder) == ARTICLE
+    assert splitter.flush() == []
+
+def test_splitter_matches_split_sections():
+    splitter = SectionSplitter()
+    streamed = []
+    for character in ARTICLE:
+        streamed.extend(splitter.feed(character))
+    streamed.extend(splitter.flush())
+    assert streamed == split_sections(ARTICLE)
+
+def test_chunks_pack_whole_sections():
+    sections = split_sections(ARTICLE)
+    chunks = chunk_sections(ARTICLE, len(sections[0]) + len(sections[1]))
+    assert chunks == [sections[0] + sections[1], sections[2]]
+    assert chunk_sections(ARTICLE, len(ARTICLE)) == [ARTICLE]
+
+def test_large_section_splits_at_paragraphs():
+    section = "## Benefits\n\n" + "".join(f"Paragraph {index} about millets.\n\n" for index in range(10))
+    chunks = chunk_sections(section, 80)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 80 for chunk in chunks)
+    assert all(chunk.endswith("\n\n") for chunk in chunks)
+    assert "".join(chunks) == section
+
+def test_oversized_paragraph_stays_whole():
+    paragraph = "Millets " * 30 + "\n\n"
+    section = "## Millets\n\n" + paragraph + "Short.\n"
+    chunks = chunk_sections(section, 100)
+    assert paragraph in chunks
+    assert "".join(chunks) == section
+
+def test_join_sections_normalises_spacing():
+    assert join_sections(["# Title\n", "\n## One\nText\n\n\n", "  ", "## Two\nMore"]) == (
+        "# Title\n\n## One\nText\n\n## Two\nMore\n"
+    )
+
+def test_partial_marker():
+    assert partial_marker("text\n") == 1
+    assert partial_marker("text\n#") == 2
+    assert partial_marker("text\n##") == 3
+    assert partial_marker("text\n###") == 0
+    assert partial_marker("text #") == 0
+    assert partial_marker("") == 0
+
+def collect(deltas, stop_after_words):
+    """(content, forwarded text) of _collect_stream over the given text deltas"""
+    forwarded = []
+
+    async def stream():
+        for text in deltas:
+            yield {"type": "text", "text": text}
+        yield {"type": "usage", "input_tokens": 10, "output_tokens": 20, "cached_tokens": 0}
+
+    async def on_token(text):
+        forwarded.append(text)
+
+    result = asyncio.run(AIProcessor()._collect_stream(
+        stream(), on_token, api_model="fake-model", prompt_tokens=10, stop_after_words=stop_after_words
+    ))
+    return result["content"], "".join(forwarded)
+
+def test_stream_stops_at_next_heading():
+    content, forwarded = collect(["## One\none two three\n", "## Two\nfour five\n", "## Three\nsix\n"], 4)
+    assert content == "## One\none two three\n"
+    assert forwarded == content
+
+def test_heading_split_across_deltas_leaves_no_fragment():
+    deltas = ["## One\none two three four", "\n#", "# Two\nfive six\n"]
+    content, forwarded = collect(deltas, 4)
+    assert content == "## One\none two three four\n"
+    assert forwarded == content
+
+def test_level_three_heading_is_not_a_stop():
+    deltas = ["## One\none two three four\n#", "## Sub\nfive\n", "## Two\nsix\n"]
+    content, forwarded = collect(deltas, 4)
+    assert content == "## One\none two three four\n### Sub\nfive\n"
+    assert forwarded == content
+
+def test_stream_without_target_is_forwarded_whole():
+    deltas = ["## One\none\n", "## Two\ntwo\n#"]
+    content, forwarded = collect(deltas, None)
+    assert content == forwarded == "".join(deltas)
+    content, forwarded = collect(deltas, 100)
+    assert content == forwarded == "".join(deltas)
+
+class SectionedProvider:
+    """Provider stub streaming a long article; complete() would miss the stop"""
+    name = "fake"
+
+    async def complete(self, model, prompt, **kwargs):
+        raise AssertionError("a call with a word target must stream")
+
+    async def stream(self, model, prompt, **kwargs):
+        for index in range(10):
+            yield {"type": "text", "text": f"## Part {index}\n\n" + "lentil " * 50 + "\n\n"}
+        yield {"type": "usage", "input_tokens": 10, "output_tokens": 2000, "cached_tokens": 0}
+
+def test_non_streaming_call_stops_at_word_target():
+    processor = AIProcessor()
+    processor.response_cache = None
+    processor.providers["fake"] = SectionedProvider()
+    result = asyncio.run(processor._call_model("fake-model", "Write", max_tokens=4000, stop_after_words=120))
+    assert result["content"].count("## Part") == 3
+    assert result["content"].endswith("\n")
+    assert result["output_tokens"] < 2000
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Unit tests for token accounting
+Local token counts, context-window clamping and the per-model price table
+(no provider SDKs or API keys needed; tiktoken is replaced by a stub).
+
+Usage: python test_token_accounting.py
+"""
+
+import os
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from services import token_accounting
+from services.token_accounting import (
+    MESSAGE_OVERHEAD_TOKENS,
+    PRICE_TABLE_VERSION,
+    PriceTable,
+    context_window,
+    count_prompt_tokens,
+    count_tokens,
+    fit_max_tokens,
+    provider_family
+)
+
+@contextmanager
+def stub_tiktoken():
+    """tiktoken stand-in with one token per whitespace-separated word"""
+    requested = []
+
+    def encoding_for_model(model):
+        requested.append(model)
+        if model == "gpt-unknown":
+            raise KeyError(model)
+        return SimpleNamespace(encode=str.split)
+
+    def get_encoding(name):
+        requested.append(name)
+        return SimpleNamespace(encode=str.split)
+
+    original = token_accounting.tiktoken
+    token_accounting.tiktoken = SimpleNamespace(encoding_for_model=encoding_for_model, get_encoding=get_encoding)
+    token_accounting._encoding.cache_clear()
+    try:
+        yield requested
+    finally:
+        token_accounting.tiktoken = original
+        token_accounting._encoding.cache_clear()
+
+@contextmanager
+def environment(**values):
+    originals = {name: os.environ.get(name) for name in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for name, value in originals.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+def test_provider_family():
+    assert [provider_family(m) for m in ("gpt-4o", "gemini-pro", "fake-fast", "claude-3-haiku")] == [
+        "openai", "gemini", "fake", "anthropic"
+    ]
+
+def test_character_ratio_per_provider():
+    text = "Red lentils cook quickly without soaking."  # 41 characters, 6 words + 1 symbol
+    assert count_tokens(text, "claude-3-sonnet") == 12  # ceil(41 / 3.5)
+    assert count_tokens(text, "gemini-pro") == 11  # ceil(41 / 4)
+    assert count_tokens("", "gpt-4") == 0 and count_tokens(None, "gpt-4") == 0
+    if token_accounting.tiktoken is None:
+        assert count_tokens(text, "gpt-4") == 11
+
+def test_word_count_floors_dense_text():
+    # Short words and symbols tokenise finer than the character ratio suggests
+    text = "a, b; c. " * 40
+    assert count_tokens(text, "gemini-pro") == 240 * 3 // 4
+    assert count_tokens(text, "gemini-pro") > len(text) / 4
+
+def test_openai_counts_use_tiktoken_when_installed():
+    with stub_tiktoken() as requested:
+        assert count_tokens("one two three four", "gpt-4o") == 4
+        assert count_tokens("one two", "gpt-unknown") == 2
+        assert count_tokens("one two three", "gpt-4o") == 3
+        assert count_tokens("one two three", "claude-3-haiku") == 4  # Other providers keep the ratio
+        assert requested == ["gpt-4o", "gpt-unknown", "cl100k_base"]  # Encodings are cached per model
+
+def test_prompt_tokens_include_message_overhead():
+    prompt, system = "Write about millet.", "You are a food writer."
+    model = "claude-3-haiku"
+    assert count_prompt_tokens(model, prompt) == count_tokens(prompt, model) + MESSAGE_OVERHEAD_TOKENS
+    assert count_prompt_tokens(model, prompt, system) == (
+        count_tokens(prompt, model) + count_tokens(system, model) + 2 * MESSAGE_OVERHEAD_TOKENS
+    )
+
+def test_context_window_uses_the_longest_prefix():
+    assert context_window("gpt-4-32k-0613") == 32768
+    assert context_window("gpt-4-0613") == 8192
+    assert context_window("gpt-4o-mini") == 128000
+    assert context_window("claude-3-opus-20240229") == 200000
+    assert context_window("mystery-model") is None
+
+def test_fit_max_tokens_clamps_to_the_context_window():
+    assert fit_max_tokens("gpt-4", 6000, 2000) == 2000
+    assert fit_max_tokens("gpt-4", 7000, 2000) == 1192
+    assert fit_max_tokens("gpt-4", 9000, 2000) == 1  # Never zero; the provider reports the overflow
+    assert fit_max_tokens("mystery-model", 10 ** 7, 2000) == 2000
+
+def test_price_lookup_uses_the_longest_prefix():
+    table = PriceTable()
+    assert table.price("gpt-4o-mini-2024-07-18") == (0.15, 0.60)
+    assert table.price("gpt-4o-2024-05-13") == (5.00, 15.00)
+    assert table.price("gpt-4-0613") == (30.00, 60.00)
+    assert table.price("claude-3-5-sonnet-20240620") == (3.00, 15.00)
+    assert table.version == PRICE_TABLE_VERSION
+
+def test_cost_bills_cached_input_at_the_cache_read_rate():
+    table = PriceTable()
+    assert table.cost("gpt-4", 1000, 500) == 0.06  # 1000 * 30 + 500 * 60 per 1M
+    # 1000 input of which 800 cached at 10% (Anthropic): 200 * 3 + 800 * 0.3 + 100 * 15
+    assert table.cost("claude-3-sonnet", 1000, 100, cached_tokens=800) == 0.00234
+    # OpenAI cache reads are half price: 400 * 5 + 600 * 2.5
+    assert table.cost("gpt-4o", 1000, 0, cached_tokens=600) == 0.0035
+
+def test_unknown_model_costs_nothing_and_warns_once():
+    table = PriceTable(prices={"gpt-4": (30.0, 60.0)})
+    assert table.cost("mystery-model", 1000, 1000) == 0.0
+    assert table.cost("mystery-model", 1000, 1000) == 0.0
+    assert table._warned == {"mystery-model"}
+
+def test_prices_from_environment():
+    with environment(AI_MODEL_PRICES='{"gpt-4o": [2.5, 10], "house-model": [1, 2]}', AI_PRICE_TABLE_VERSION="2024-08-06"):
+        table = PriceTable.from_env()
+    assert table.version == "2024-08-06"
+    assert table.price("gpt-4o-2024-08-06") == (2.5, 10)
+    assert table.price("house-model-v2") == (1, 2)
+    assert table.price("gpt-4o-mini") == (0.15, 0.60)  # Built-in entries stay
+
+    with environment(AI_MODEL_PRICES="not json"):
+        table = PriceTable.from_env()
+    assert table.price("gpt-4o") == (5.00, 15.00)
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
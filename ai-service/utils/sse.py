@@ -0,0 +1,11 @@
+"""
+Server-Sent Events helpers
+"""
+
+import json
+from typing import Any
+
+def format_sse(event: str, data: Any) -> str:
+    """Encode one server-sent event"""
+    payload = json.dumps(data, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"